@@ -0,0 +1,95 @@
+"""
+Compares deidentify_text against the previous implementation, which rebuilt the whole
+string for every entity, on long documents with dense entities.
+
+Run from the repository root with:
+    python benchmarks/bench_deidentify_text.py
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from privateai_client.components import AnalyzeTextResponse  # noqa: E402
+from privateai_client.post_processing import (  # noqa: E402
+    MarkerEntityProcessor,
+    deidentify_text,
+)
+
+
+def legacy_deidentify_text(text, response, entity_processors, default_processor):
+    modified_texts = []
+    for t, entities in zip(text, response.entities):
+        offset = 0
+        modified_text = t
+        for entity in sorted(entities, key=lambda e: e["location"]["stt_idx"]):
+            start_idx = entity["location"]["stt_idx"] + offset
+            end_idx = entity["location"]["end_idx"] + offset
+            processor = entity_processors.get(entity["best_label"], default_processor)
+            modified_entity_text = processor(entity)
+            offset += len(modified_entity_text) - len(entity["text"])
+            modified_text = (
+                modified_text[:start_idx]
+                + modified_entity_text
+                + modified_text[end_idx:]
+            )
+        modified_texts.append(modified_text)
+    return modified_texts
+
+
+def make_document(entity_count):
+    words, entities, position = [], [], 0
+    for i in range(entity_count):
+        filler = "some filler words between entities "
+        name = f"Name{i}"
+        words.append(filler + name + " ")
+        entities.append(
+            {
+                "text": name,
+                "location": {
+                    "stt_idx": position + len(filler),
+                    "end_idx": position + len(filler) + len(name),
+                },
+                "best_label": "NAME",
+            }
+        )
+        position += len(filler) + len(name) + 1
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps([{"entities": entities}]).encode("utf-8")
+    return ["".join(words)], AnalyzeTextResponse(response)
+
+
+def main():
+    for entity_count in [1000, 5000, 20000]:
+        text, response = make_document(entity_count)
+        response.entities  # parse the body before timing
+        results = {}
+        for name, fn in [
+            ("legacy", legacy_deidentify_text),
+            ("single pass", deidentify_text),
+        ]:
+            results[name] = min(
+                timeit.repeat(
+                    lambda: fn(text, response, {}, MarkerEntityProcessor()),
+                    number=1,
+                    repeat=3,
+                )
+            )
+        assert legacy_deidentify_text(
+            text, response, {}, MarkerEntityProcessor()
+        ) == deidentify_text(text, response, {}, MarkerEntityProcessor())
+        print(
+            f"{entity_count} entities ({len(text[0]) / 1e6:.1f} MB of text): "
+            f"legacy {results['legacy'] * 1000:.1f} ms, "
+            f"single pass {results['single pass'] * 1000:.1f} ms, "
+            f"{results['legacy'] / results['single pass']:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
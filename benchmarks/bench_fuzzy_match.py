@@ -0,0 +1,85 @@
+"""
+Compares FuzzyMatchEntityProcessor lookups, one entity at a time and with process_many,
+against the previous implementation, which computed the distance to every known word
+(lowering each one) for every entity.
+
+Run from the repository root with:
+    python benchmarks/bench_fuzzy_match.py
+"""
+import random
+import string
+import sys
+import timeit
+from pathlib import Path
+
+from pyxdameraulevenshtein import damerau_levenshtein_distance
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from privateai_client.post_processing import FuzzyMatchEntityProcessor  # noqa: E402
+
+
+def legacy_is_similar(text, known_words_list, threshold):
+    lower_text = text.lower()
+    min_dist = min(
+        damerau_levenshtein_distance(lower_text, word.lower())
+        for word in known_words_list
+    )
+    return min_dist <= threshold
+
+
+def random_name(rng):
+    return "".join(
+        rng.choice(string.ascii_letters) for _ in range(int(rng.gauss(7, 2)) or 1)
+    )
+
+
+def main():
+    rng = random.Random(0)
+    for known_count in [1000, 2000, 5000]:
+        known_words = [random_name(rng) for _ in range(known_count)]
+        entities = [
+            {"text": random_name(rng), "best_label": "NAME"} for _ in range(200)
+        ]
+        # A quarter of the entities are known words, found by exact match
+        entities += [
+            {"text": rng.choice(known_words), "best_label": "NAME"} for _ in range(50)
+        ]
+        processor = FuzzyMatchEntityProcessor(
+            known_words_list=known_words, threshold=2, process_type="MASK"
+        )
+        legacy = min(
+            timeit.repeat(
+                lambda: [
+                    legacy_is_similar(entity["text"], known_words, 2)
+                    for entity in entities
+                ],
+                number=1,
+                repeat=1,
+            )
+        )
+        indexed = min(
+            timeit.repeat(
+                lambda: [processor(entity) for entity in entities], number=1, repeat=1
+            )
+        )
+        # A new processor each time, so packing the known words is included
+        many = min(
+            timeit.repeat(
+                lambda: FuzzyMatchEntityProcessor(
+                    known_words_list=known_words, threshold=2, process_type="MASK"
+                ).process_many(entities),
+                number=1,
+                repeat=3,
+            )
+        )
+        print(
+            f"{known_count} known words, {len(entities)} entities: "
+            f"legacy {legacy * 1000:.1f} ms, "
+            f"indexed {indexed * 1000:.1f} ms ({legacy / indexed:.1f}x faster), "
+            f"process_many {many * 1000:.1f} ms ({legacy / many:.1f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares sending many concurrent process_text requests to a local server over pooled
+HTTP/1.1 connections and over HTTP/2, where the requests are multiplexed over one connection.
+Each response is delayed to stand in for the container's processing time.
+
+Requires httpx and h2 (pip install privateai_client[http2]).
+
+Run from the repository root with:
+    python benchmarks/bench_http2.py
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from privateai_client import PAIClient, __version__  # noqa: E402
+from privateai_client.tests.utils import H2Server, echo_text_handler  # noqa: E402
+
+DELAY = 0.05
+
+
+class HTTP1Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._send(200, {"app_version": __version__})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(DELAY)
+        self._send(*echo_text_handler(self.path, json.loads(body)))
+
+    def _send(self, status_code, body):
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTP1Server(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+def run(url, requests_count, concurrency, **client_kwargs):
+    with PAIClient(url=url, **client_kwargs) as client:
+        client.get_version()
+        start = time.perf_counter()
+        results = list(
+            client.map(
+                "process_text",
+                ({"text": [f"text {i}"]} for i in range(requests_count)),
+                concurrency=concurrency,
+            )
+        )
+        elapsed = time.perf_counter() - start
+    assert all(result.error is None for result in results)
+    return elapsed
+
+
+def main():
+    requests_count = 1000
+    for concurrency in [10, 50, 200]:
+        http1_server = HTTP1Server(("127.0.0.1", 0), HTTP1Handler)
+        threading.Thread(target=http1_server.serve_forever, daemon=True).start()
+        http1 = run(
+            f"http://127.0.0.1:{http1_server.server_address[1]}",
+            requests_count,
+            concurrency,
+            pool_maxsize=concurrency,
+        )
+        http1_server.shutdown()
+
+        with H2Server(echo_text_handler, delay=DELAY) as h2_server:
+            http2 = run(h2_server.url, requests_count, concurrency, http2=True)
+
+        print(
+            f"concurrency {concurrency:>3}: "
+            f"HTTP/1.1 {requests_count / http1:7.0f} req/s over {http1_server.connections:>3} connections"
+            f"  HTTP/2 {requests_count / http2:7.0f} req/s over {h2_server.connections:>3} connections"
+        )
+
+
+if __name__ == "__main__":
+    main()
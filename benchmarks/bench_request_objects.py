@@ -0,0 +1,105 @@
+"""
+Compares serializing request objects with to_dict when the attributes are kept in __dict__
+and inspected on every call (the previous behaviour) and when they are kept in __slots__ and
+walked from per-class field metadata.
+
+Run from the repository root with:
+    python benchmarks/bench_request_objects.py
+"""
+import inspect
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from privateai_client.components.request_objects import (  # noqa: E402
+    AnalyzeTextRequest,
+    BaseRequestObject,
+    EntityDetection,
+    EntityTypeSelector,
+    FilterSelector,
+    ProcessedText,
+    ProcessTextRequest,
+)
+
+
+class LegacyRequestObject:
+    """
+    A request object holding its attributes in __dict__, serialized as before
+    """
+
+    def to_dict(self):
+        dict_obj = dict()
+        for key, value in self.__dict__.items():
+            if value in [None, [], {}]:
+                continue
+            name = key if key[0] != "_" else key[1:]
+            if self._issubclass(value):
+                dict_obj[name] = value.to_dict()
+            elif type(value) is list:
+                dict_obj[name] = [
+                    row.to_dict() if self._issubclass(row) else row for row in value
+                ]
+            elif not key.startswith("__") and not callable(key):
+                dict_obj[name] = value
+        return dict_obj
+
+    def _issubclass(self, obj):
+        return inspect.isclass(type(obj)) and issubclass(type(obj), LegacyRequestObject)
+
+
+def to_legacy(value):
+    # Copies a request object graph into dict-backed objects with the same attributes
+    if isinstance(value, BaseRequestObject):
+        legacy = LegacyRequestObject()
+        for attr, _ in value._fields:
+            if hasattr(value, attr):
+                setattr(legacy, attr, to_legacy(getattr(value, attr)))
+        return legacy
+    if type(value) is list:
+        return [to_legacy(row) for row in value]
+    return value
+
+
+def make_requests():
+    entity_detection = EntityDetection(
+        accuracy="high",
+        entity_types=[EntityTypeSelector(type="ENABLE", value=["NAME", "LOCATION"])],
+        filter=[FilterSelector(type="ALLOW", pattern="Alice")],
+    )
+    return {
+        "small process_text": ProcessTextRequest(text=["Hello, my name is Alice."]),
+        "process_text with options": ProcessTextRequest(
+            text=["Hello, my name is Alice."],
+            link_batch=True,
+            entity_detection=entity_detection,
+            processed_text=ProcessedText(type="MASK", mask_character="*"),
+        ),
+        "analyze_text": AnalyzeTextRequest(
+            text=["Hello, my name is Alice."],
+            locale="en-US",
+            entity_detection=entity_detection,
+        ),
+    }
+
+
+def main():
+    number = 20000
+    for name, request in make_requests().items():
+        legacy = to_legacy(request)
+        assert legacy.to_dict() == request.to_dict()
+        results = {}
+        for label, obj in [("__dict__", legacy), ("__slots__", request)]:
+            results[label] = (
+                min(timeit.repeat(obj.to_dict, number=number, repeat=5)) / number
+            )
+        print(
+            f"{name:>28}: __dict__ {results['__dict__'] * 1e6:6.2f}us"
+            f"  __slots__ {results['__slots__'] * 1e6:6.2f}us"
+            f"  speedup {results['__dict__'] / results['__slots__']:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
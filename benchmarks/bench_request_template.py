@@ -0,0 +1,71 @@
+"""
+Compares encoding a process_text payload when the whole request object is built, serialized
+and encoded for every call (the previous behaviour) and when a RequestTemplate stamps the
+text into its pre-encoded options.
+
+Run from the repository root with:
+    python benchmarks/bench_request_template.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from privateai_client.components import (  # noqa: E402
+    EntityDetection,
+    EntityTypeSelector,
+    FilterSelector,
+    ProcessedText,
+    ProcessTextRequest,
+    RequestTemplate,
+    get_codec,
+)
+
+
+def make_options():
+    return {
+        "link_batch": True,
+        "entity_detection": EntityDetection(
+            accuracy="high",
+            entity_types=[
+                EntityTypeSelector(type="ENABLE", value=["NAME", "LOCATION", "SSN"])
+            ],
+            filter=[
+                FilterSelector(type="ALLOW", pattern="Alice"),
+                FilterSelector(type="BLOCK", pattern="[0-9]{9}", entity_type="SSN"),
+            ],
+        ),
+        "processed_text": ProcessedText(type="MARKER", pattern="[BEST_ENTITY_TYPE]"),
+    }
+
+
+def main():
+    number = 20000
+    options = make_options()
+    template = RequestTemplate(ProcessTextRequest(text=[], **options))
+    for codec_name in ["json", "auto"]:
+        codec = get_codec(codec_name)
+        for texts in [["Hello, my name is Alice."], ["Hello, my name is Alice."] * 20]:
+
+            def per_call():
+                return codec.dumps(ProcessTextRequest(text=texts, **options).to_dict())
+
+            def templated():
+                return template.with_text(texts).encode(codec)
+
+            assert per_call() == templated()
+            results = {
+                name: min(timeit.repeat(encode, number=number, repeat=5)) / number
+                for name, encode in [("per call", per_call), ("template", templated)]
+            }
+            print(
+                f"{codec.name:>6} codec, {len(texts):>2} texts: "
+                f"per call {results['per call'] * 1e6:6.2f}us"
+                f"  template {results['template'] * 1e6:6.2f}us"
+                f"  speedup {results['per call'] / results['template']:4.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
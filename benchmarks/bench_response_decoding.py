@@ -0,0 +1,107 @@
+"""
+Compares parsing a large gzipped process_text response from its content (the previous
+behaviour: the body is decompressed into a list of pieces, joined and kept on the response)
+and parsing it as it is read and decompressed from the connection with stream=True.
+Reports the time taken, the peak memory allocated while reading and parsing and the memory
+still held by the response afterwards.
+
+Run from the repository root with:
+    python benchmarks/bench_response_decoding.py
+"""
+import gzip
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import requests
+from urllib3 import HTTPResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from privateai_client.components import TextResponse, get_codec  # noqa: E402
+
+
+def make_body(texts):
+    return json.dumps(
+        [
+            {
+                "processed_text": f"Hello [NAME_1], this is text {i} " * 20,
+                "entities": [
+                    {
+                        "processed_text": "[NAME_1]",
+                        "text": "Alice",
+                        "location": {"stt_idx": 6, "end_idx": 11},
+                        "best_label": "NAME",
+                        "labels": {"NAME": 0.95},
+                    }
+                ]
+                * 5,
+                "entities_present": True,
+                "characters_processed": 600,
+                "languages_detected": {"en": 1.0},
+            }
+            for i in range(texts)
+        ]
+    ).encode("utf-8")
+
+
+def make_response(compressed):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Encoding"] = "gzip"
+    response.raw = HTTPResponse(
+        body=io.BytesIO(compressed),
+        headers=response.headers,
+        status=200,
+        preload_content=False,
+    )
+    return response
+
+
+def read_content(response, codec):
+    response.content
+    text_response = TextResponse(response, codec)
+    text_response.processed_text
+    return text_response
+
+
+def read_streamed(response, codec):
+    text_response = TextResponse(response, codec)
+    text_response.processed_text
+    return text_response
+
+
+def measure(read, compressed, codec):
+    response = make_response(compressed)
+    tracemalloc.start()
+    start = time.perf_counter()
+    text_response = read(response, codec)
+    elapsed = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del text_response
+    return elapsed, peak, held
+
+
+def main():
+    codec = get_codec()
+    for texts in [1000, 10000]:
+        body = make_body(texts)
+        compressed = gzip.compress(body, compresslevel=6)
+        print(
+            f"{texts} texts: {len(body) / 1e6:.1f} MB, "
+            f"{len(compressed) / 1e6:.2f} MB gzipped"
+        )
+        for name, read in [("content", read_content), ("streamed", read_streamed)]:
+            elapsed, peak, held = measure(read, compressed, codec)
+            print(
+                f"  {name:>8}: {elapsed * 1e3:7.1f}ms, "
+                f"peak {peak / 1e6:6.1f} MB, held {held / 1e6:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares reading every property of a large batch TextResponse when the JSON body is
+parsed on every access (the previous behaviour) and when it is parsed once and cached.
+
+Run from the repository root with:
+    python benchmarks/bench_response_parsing.py
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from privateai_client.components.pai_responses import TextResponse  # noqa: E402
+
+
+class UncachedTextResponse(TextResponse):
+    @property
+    def body(self):
+        return self().json()
+
+
+def make_response(texts, entities_per_text):
+    body = [
+        {
+            "processed_text": " ".join(f"[NAME_{j}]" for j in range(entities_per_text)),
+            "entities": [
+                {
+                    "processed_text": f"[NAME_{j}]",
+                    "text": f"Name{j}",
+                    "location": {"stt_idx": j * 6, "end_idx": j * 6 + 5},
+                    "best_label": "NAME",
+                    "labels": {"NAME": 0.9},
+                }
+                for j in range(entities_per_text)
+            ],
+            "entities_present": True,
+            "characters_processed": entities_per_text * 6,
+            "languages_detected": {"en": 1.0},
+        }
+        for _ in range(texts)
+    ]
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(body).encode("utf-8")
+    return response
+
+
+def read_all_properties(response_class, response):
+    text_response = response_class(response)
+    text_response.processed_text
+    text_response.entities
+    text_response.entities_present
+    text_response.best_labels
+    text_response.characters_processed
+    text_response.languages_detected
+    text_response.get_reidentify_entities()
+
+
+def main():
+    for texts, entities_per_text in [(100, 10), (1000, 10), (1000, 50)]:
+        response = make_response(texts, entities_per_text)
+        size_mb = len(response.content) / 1e6
+        results = {}
+        for name, response_class in [
+            ("uncached", UncachedTextResponse),
+            ("cached", TextResponse),
+        ]:
+            results[name] = (
+                min(
+                    timeit.repeat(
+                        lambda: read_all_properties(response_class, response),
+                        number=3,
+                        repeat=3,
+                    )
+                )
+                / 3
+            )
+        print(
+            f"{texts} texts x {entities_per_text} entities ({size_mb:.1f} MB): "
+            f"uncached {results['uncached'] * 1000:.1f} ms, "
+            f"cached {results['cached'] * 1000:.1f} ms, "
+            f"{results['uncached'] / results['cached']:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares the latency of process_text requests to a local server over TCP loopback and
+over a unix domain socket, as for a container deployed as a sidecar on the same host.
+Requests are sent one after the other over a kept-alive connection.
+
+Run from the repository root with:
+    python benchmarks/bench_unix_socket.py
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from privateai_client import PAIClient  # noqa: E402
+from privateai_client.tests.utils import HTTPServer, echo_text_handler  # noqa: E402
+
+
+def run(url, requests_count, texts):
+    payload = {"text": [f"Hello John, this is text {i}" for i in range(texts)]}
+    latencies = []
+    with PAIClient(url=url) as client:
+        client.get_version()
+        for _ in range(requests_count):
+            start = time.perf_counter()
+            client.process_text(payload)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return (
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99)],
+    )
+
+
+def main():
+    requests_count = 1000
+    for texts in [1, 20]:
+        results = {}
+        for name, unix_socket in [("TCP loopback", False), ("unix socket", True)]:
+            with HTTPServer(echo_text_handler, unix_socket=unix_socket) as server:
+                results[name] = run(server.url, requests_count, texts)
+        print(f"{texts} texts per request:")
+        for name, (p50, p99) in results.items():
+            print(f"  {name:>12}: p50 {p50 * 1e6:6.0f}us, p99 {p99 * 1e6:6.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from .__about__ import __version__
+from .async_pai_client import AsyncPAIClient
 from .objects import request_objects
 from .pai_client import PAIClient
-from .__about__ import __version__
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Union
+
+from .__about__ import __version__
+from .components import *
+from .components.async_pai_requests import (
+    AsyncPAIGetRequests,
+    AsyncPAIPostRequests,
+    create_async_client,
+)
+
+
+class AsyncPAIClient:
+    """
+    Asyncio client used to connect to private-ai's deidentication service.
+    Every endpoint of PAIClient is available as a coroutine and returns the same response objects.
+    With version_check="eager", the container's version is checked when entering the client's context.
+    """
+
+    version_checks = ["lazy", "eager", "off"]
+
+    def __init__(
+        self,
+        scheme: str = None,
+        host: str = None,
+        port: str = None,
+        url: str = None,
+        async_client=None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        json_codec: Union[str, JSONCodec] = "auto",
+        version_check: str = "lazy",
+        version_check_ttl: Optional[float] = None,
+        **kwargs,
+    ):
+        # Add source url
+        self._uris = PAIURIs(url, scheme, host, port)
+        if self._uris.unix_socket:
+            raise ValueError(
+                "Invalid value for url. Accepted value is an http or https url, unix sockets are only supported by PAIClient."
+            )
+        self._owns_async_client = async_client is None
+        self._async_client = (
+            async_client
+            if async_client is not None
+            else create_async_client(
+                max_connections, max_keepalive_connections, keepalive_expiry
+            )
+        )
+        self._codec = get_codec(json_codec)
+        self.get = AsyncPAIGetRequests(self._uris, self._async_client, self._codec)
+        self.post = AsyncPAIPostRequests(self._uris, self._async_client, self._codec)
+        if "api_key" in kwargs.keys():
+            self.add_api_key(kwargs["api_key"])
+        elif "bearer_token" in kwargs.keys():
+            self.add_bearer_token(kwargs["bearer_token"])
+        self._container_version = None
+        # The container's version is checked before the first request, or before each request
+        # made version_check_ttl seconds after the last check, and once whatever the concurrency
+        if version_check not in self.version_checks:
+            raise ValueError(
+                f"{version_check} is not valid. version_check can only be one of the following: {', '.join(self.version_checks)}"
+            )
+        self._version_check = version_check
+        self._version_check_ttl = version_check_ttl
+        self._version_checked_at = None
+        # Created in the running event loop on first use, as locks created outside of it are
+        # bound to another loop before Python 3.10
+        self._version_lock = None
+
+    async def __aenter__(self):
+        if self._version_check == "eager":
+            await self.check_version_compatibility()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    @property
+    def async_client(self):
+        return self._async_client
+
+    @property
+    def json_codec(self):
+        return self._codec
+
+    async def aclose(self):
+        """
+        Closes the pooled connections held by the client.
+        Clients passed in by the caller are left open for the caller to manage.
+        """
+        if self._owns_async_client:
+            await self._async_client.aclose()
+
+    def _add_auth(self, auth_type, auth_val):
+        auth_header = {}
+        if auth_type == "api_key":
+            auth_header = {"x-api-key": auth_val}
+        elif auth_type == "bearer_token":
+            auth_header = {"Authorization": f"Bearer {auth_val}"}
+        else:
+            raise ValueError(
+                f"{auth_type} is not currently a supported method of authorization"
+            )
+        for subclass in [self.get, self.post]:
+            subclass.headers = {**auth_header, **subclass.base_header}
+
+    def _version_warning(self) -> None:
+        # only compare major and minor version numbers
+        parsed_container_version = self._container_version.split(".")[:2]
+        parsed_client_version = __version__.split(".")[:2]
+
+        if parsed_container_version != parsed_client_version:
+            logging.warning(
+                f"Version mismatch: privateai_client {__version__} may be incompatible with PAI container "
+                f"{self._container_version}. Please install the appropriate client version!"
+            )
+
+    async def check_version_compatibility(self) -> None:
+        """
+        Warns when the container's version may be incompatible with the client's.
+        Does nothing with version_check="off" or when the version was checked recently.
+        """
+        if self._version_check == "off" or self._version_is_fresh():
+            return
+        if self._version_lock is None:
+            self._version_lock = asyncio.Lock()
+        async with self._version_lock:
+            # Another caller may have checked while this one waited for the lock
+            if not self._version_is_fresh():
+                await self.get_version()
+
+    def _version_is_fresh(self) -> bool:
+        checked_at = self._version_checked_at
+        return checked_at is not None and (
+            self._version_check_ttl is None
+            or time.monotonic() - checked_at < self._version_check_ttl
+        )
+
+    def add_api_key(self, api_key: str):
+        self._add_auth("api_key", api_key)
+
+    def add_bearer_token(self, token: str):
+        self._add_auth("bearer_token", token)
+
+    def _get_payload(self, request_object, request_class, article="a"):
+        if type(request_object) is request_class:
+            return request_object.to_dict()
+        elif type(request_object) is dict:
+            return request_object
+        elif (
+            type(request_object) is TemplatedRequest
+            and request_object.request_class is request_class
+        ):
+            return request_object.encode(self._codec)
+        raise ValueError(
+            f"request_object can only be a dictionary or {article} {request_class.__name__} object"
+        )
+
+    async def ping(self):
+        """
+        Makes a call to the Private-AI service's health endpoint.
+        Can be used as a validator to ensure the service is running.
+        """
+        response = await self.get.health()
+        if response.status_code != 200:
+            logging.warning(f"The Private AI server cannot be reached")
+            return False
+        return True
+
+    async def get_metrics(self):
+        """
+        Returns information about the Private-AI's server
+        """
+        await self.check_version_compatibility()
+        return MetricsResponse(await self.get.metrics(), self._codec)
+
+    async def get_version(self):
+        """
+        Returns the version of the container application code
+        """
+        ret = VersionResponse(await self.get.version(), self._codec)
+        self._container_version = ret.app_version
+        self._version_checked_at = time.monotonic()
+        self._version_warning()
+        return ret
+
+    async def get_diagnostics(self):
+        """
+        Returns diagnostic information about the Private-AI container host
+        """
+        await self.check_version_compatibility()
+        return DiagnosticResponse(await self.get.diagnostics(), self._codec)
+
+    async def process_text(
+        self, request_object: Union[dict, ProcessTextRequest, TemplatedRequest]
+    ):
+        """
+        Used to deidentify text
+        """
+        payload = self._get_payload(request_object, ProcessTextRequest)
+        await self.check_version_compatibility()
+        return TextResponse(await self.post.process_text(payload), self._codec)
+
+    async def reidentify_text(self, request_object: Union[dict, ReidentifyTextRequest]):
+        """
+        Used to reidentify text
+        """
+        payload = self._get_payload(request_object, ReidentifyTextRequest)
+        await self.check_version_compatibility()
+        return ReidentifyTextResponse(
+            await self.post.reidentify_text(payload), self._codec
+        )
+
+    async def process_files_uri(
+        self, request_object: Union[dict, ProcessFileUriRequest]
+    ):
+        """
+        Used to deidentify files by uri
+        """
+        payload = self._get_payload(request_object, ProcessFileUriRequest)
+        await self.check_version_compatibility()
+        return FilesUriResponse(await self.post.process_files_uri(payload), self._codec)
+
+    async def process_files_base64(
+        self, request_object: Union[dict, ProcessFileBase64Request]
+    ):
+        """
+        Used to deidentify base64 files
+        """
+        payload = self._get_payload(request_object, ProcessFileBase64Request)
+        await self.check_version_compatibility()
+        return FilesBase64Response(
+            await self.post.process_files_base64(payload), self._codec
+        )
+
+    async def bleep(self, request_object: Union[dict, BleepRequest]):
+        """
+        Used to deidentify audio files by uri
+        """
+        payload = self._get_payload(request_object, BleepRequest)
+        await self.check_version_compatibility()
+        return BleepResponse(await self.post.bleep(payload), self._codec)
+
+    async def ner_text(
+        self, request_object: Union[dict, NerTextRequest, TemplatedRequest]
+    ):
+        """
+        Used to deidentify text
+        """
+        payload = self._get_payload(request_object, NerTextRequest)
+        await self.check_version_compatibility()
+        return NerTextResponse(await self.post.ner_text(payload), self._codec)
+
+    async def analyze_text(
+        self, request_object: Union[dict, AnalyzeTextRequest, TemplatedRequest]
+    ):
+        """
+        Used to analyze text
+        """
+        payload = self._get_payload(request_object, AnalyzeTextRequest, "an")
+        await self.check_version_compatibility()
+        return AnalyzeTextResponse(await self.post.analyze_text(payload), self._codec)
@@ -1,6 +1,15 @@
-from .pai_requests import PAIGetRequests, PAIPostRequests
+from .batching import pack_texts
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .compression import CompressionPolicy, CompressionStats
+from .fan_out import MapResult, fan_out
+from .hedging import HedgingPolicy, HedgingStats
+from .http2 import HTTP2Adapter
+from .json_codec import JSONCodec, OrjsonCodec, UjsonCodec, get_codec
+from .load_balancer import Host, LoadBalancer
+from .pai_requests import PAIGetRequests, PAIPostRequests, create_session
 from .pai_responses import (
     AnalyzeTextResponse,
+    BatchedTextResponse,
     BleepResponse,
     DiagnosticResponse,
     FilesBase64Response,
@@ -13,3 +22,8 @@ from .pai_responses import (
 )
 from .pai_uris import PAIURIs
 from .request_objects import *
+from .request_template import RequestTemplate, TemplatedRequest
+from .retry import RetryPolicy, RetryStats
+from .streaming import Base64FileReader, StreamingJSONBody
+from .timeouts import DeadlineExceeded, Timeout, get_timeout
+from .unix_socket import UnixSocketAdapter
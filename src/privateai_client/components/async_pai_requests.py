@@ -0,0 +1,186 @@
+import asyncio
+from typing import Optional, Union
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .json_codec import JSONCodec, get_codec
+from .pai_uris import PAIURIs
+from .streaming import StreamingJSONBody, encode_payload
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - depends on the environment
+    httpx = None
+
+
+def to_requests_response(response: "httpx.Response") -> requests.Response:
+    """
+    Converts an httpx.Response into a requests.Response so the response classes
+    in pai_responses can be reused for the async client
+    """
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.reason = response.reason_phrase
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted.url = str(response.url)
+    converted.encoding = response.encoding
+    converted._content = response.content
+    return converted
+
+
+async def _aiter_body(body: StreamingJSONBody):
+    # Files are read and encoded in a worker thread so the event loop is not blocked
+    loop = asyncio.get_running_loop()
+    chunks = iter(body)
+    while True:
+        chunk = await loop.run_in_executor(None, next, chunks, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+def create_async_client(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 5.0,
+) -> "httpx.AsyncClient":
+    """
+    Creates an httpx.AsyncClient with its own connection pool.
+
+    max_connections bounds the number of concurrent connections, max_keepalive_connections
+    the number of idle connections kept open and keepalive_expiry how long, in seconds,
+    an idle connection is kept.
+    """
+    if httpx is None:
+        raise ImportError(
+            "The async client requires httpx. Install it with 'pip install privateai_client[async]'"
+        )
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=None)
+
+
+class AsyncPAIRequests:
+    def __init__(
+        self,
+        uris: PAIURIs,
+        async_client: Optional["httpx.AsyncClient"] = None,
+        codec: Union[str, JSONCodec, None] = None,
+    ):
+        self._uris = uris
+        self._async_client = (
+            async_client if async_client is not None else create_async_client()
+        )
+        self._codec = get_codec(codec)
+        self.headers = self.base_header
+
+    @property
+    def uris(self):
+        return self._uris
+
+    @property
+    def async_client(self):
+        return self._async_client
+
+    @property
+    def codec(self):
+        return self._codec
+
+    @property
+    def base_header(self):
+        return {"Accept": "application/json"}
+
+    async def make_request(
+        self,
+        request_type: str,
+        uri: str,
+        payload: dict = None,
+    ):
+        headers = self.headers
+        content = None
+        if payload is not None:
+            content = encode_payload(payload, self.codec)
+            headers = {**headers, "Content-Type": self.codec.content_type}
+            if isinstance(content, StreamingJSONBody):
+                headers["Content-Length"] = str(len(content))
+                content = _aiter_body(content)
+        response = await self.async_client.request(
+            request_type, uri, content=content, headers=headers
+        )
+        return to_requests_response(response)
+
+
+class AsyncPAIGetRequests(AsyncPAIRequests):
+    def __init__(
+        self,
+        uris: PAIURIs,
+        async_client: Optional["httpx.AsyncClient"] = None,
+        codec: Union[str, JSONCodec, None] = None,
+    ):
+        """
+        A class of async get requests used by the async client
+        """
+        self.request_type = "GET"
+        super(AsyncPAIGetRequests, self).__init__(uris, async_client, codec)
+
+    async def health(self):
+        return await self.make_request(self.request_type, self.uris.health)
+
+    async def metrics(self):
+        return await self.make_request(self.request_type, self.uris.metrics)
+
+    async def version(self):
+        return await self.make_request(self.request_type, self.uris.version)
+
+    async def diagnostics(self):
+        return await self.make_request(self.request_type, self.uris.diagnostics)
+
+
+class AsyncPAIPostRequests(AsyncPAIRequests):
+    def __init__(
+        self,
+        uris: PAIURIs,
+        async_client: Optional["httpx.AsyncClient"] = None,
+        codec: Union[str, JSONCodec, None] = None,
+    ):
+        self.request_type = "POST"
+        super(AsyncPAIPostRequests, self).__init__(uris, async_client, codec)
+
+    async def process_text(self, request_object):
+        return await self.make_request(
+            self.request_type, self.uris.process_text, request_object
+        )
+
+    async def process_files_uri(self, request_object):
+        return await self.make_request(
+            self.request_type, self.uris.process_files_uri, request_object
+        )
+
+    async def process_files_base64(self, request_object):
+        return await self.make_request(
+            self.request_type, self.uris.process_files_base64, request_object
+        )
+
+    async def bleep(self, request_object):
+        return await self.make_request(
+            self.request_type, self.uris.bleep, request_object
+        )
+
+    async def reidentify_text(self, request_object):
+        return await self.make_request(
+            self.request_type, self.uris.reidentify_text, request_object
+        )
+
+    async def ner_text(self, request_object):
+        return await self.make_request(
+            self.request_type, self.uris.ner_text, request_object
+        )
+
+    async def analyze_text(self, request_object):
+        return await self.make_request(
+            self.request_type, self.uris.analyze_text, request_object
+        )
@@ -0,0 +1,45 @@
+from typing import List, Tuple, Union
+
+
+def pack_texts(
+    texts: List[Union[str, List[str]]], max_items: int, max_chars: int
+) -> List[Tuple[List[str], bool]]:
+    """
+    Packs texts into consecutive batches of at most max_items texts and max_chars characters.
+
+    Strings are packed greedily in input order, which gives the fewest batches possible
+    while keeping every batch a contiguous slice of the input. A nested list is a linked
+    group: it is always sent as its own batch with link_batch enabled and never split,
+    even when it exceeds the limits. Empty groups are skipped. A single string longer than
+    max_chars is sent on its own.
+
+    Returns a list of (texts, linked) tuples.
+    """
+    if not isinstance(max_items, int) or max_items < 1:
+        raise ValueError("max_items must be a positive integer")
+    if not isinstance(max_chars, int) or max_chars < 1:
+        raise ValueError("max_chars must be a positive integer")
+
+    batches = []
+    current, current_chars = [], 0
+    for text in texts:
+        if isinstance(text, list):
+            if not text:
+                continue
+            if current:
+                batches.append((current, False))
+                current, current_chars = [], 0
+            batches.append((text, True))
+            continue
+        if type(text) is not str:
+            raise TypeError("texts can only contain strings or lists of strings")
+        if current and (
+            len(current) >= max_items or current_chars + len(text) > max_chars
+        ):
+            batches.append((current, False))
+            current, current_chars = [], 0
+        current.append(text)
+        current_chars += len(text)
+    if current:
+        batches.append((current, False))
+    return batches
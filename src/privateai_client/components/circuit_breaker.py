@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+
+import requests
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Raised instead of sending a request to a container whose circuit is open
+    """
+
+
+class _Circuit:
+    def __init__(self, window_size: int):
+        self.state = "closed"
+        self.outcomes = deque(maxlen=window_size)
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a container that keeps failing, so they fail fast with a
+    CircuitOpenError, or go to another container when the client has several urls,
+    instead of waiting on an unhealthy one. Each container has its own circuit.
+
+    A circuit opens when at least failure_rate_threshold of the last window_size requests failed,
+    once minimum_requests have been made. Connection errors, timeouts and 502, 503 and 504
+    responses are failures. After cooldown seconds the circuit is half open and lets
+    half_open_requests requests through: it closes if they all succeed and opens again otherwise.
+    """
+
+    # Responses that count as a failure of the container
+    failure_statuses = frozenset([502, 503, 504])
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        minimum_requests: int = 10,
+        window_size: int = 20,
+        cooldown: float = 30.0,
+        half_open_requests: int = 1,
+    ):
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError(
+                "Invalid value for failure_rate_threshold. Accepted value is a number between 0 and 1."
+            )
+        for name, value in [
+            ("minimum_requests", minimum_requests),
+            ("window_size", window_size),
+            ("half_open_requests", half_open_requests),
+        ]:
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(
+                    f"Invalid value for {name}. Accepted value is a positive integer."
+                )
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_requests = minimum_requests
+        self.window_size = window_size
+        self.cooldown = cooldown
+        self.half_open_requests = half_open_requests
+        self.rejected = 0
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, base_uri: str) -> _Circuit:
+        if base_uri not in self._circuits:
+            self._circuits[base_uri] = _Circuit(self.window_size)
+        circuit = self._circuits[base_uri]
+        if (
+            circuit.state == "open"
+            and time.monotonic() - circuit.opened_at >= self.cooldown
+        ):
+            circuit.state = "half_open"
+            circuit.probes = 0
+            circuit.probe_successes = 0
+        return circuit
+
+    def state(self, base_uri: str) -> str:
+        with self._lock:
+            return self._circuit(base_uri).state
+
+    @property
+    def states(self) -> dict:
+        """
+        The state of the circuit of every container requests were made to, by url
+        """
+        with self._lock:
+            return {
+                base_uri: self._circuit(base_uri).state for base_uri in self._circuits
+            }
+
+    def available(self, base_uri: str) -> bool:
+        """
+        Whether a request to base_uri would be let through, without counting it as sent
+        """
+        with self._lock:
+            circuit = self._circuit(base_uri)
+            return circuit.state == "closed" or (
+                circuit.state == "half_open"
+                and circuit.probes < self.half_open_requests
+            )
+
+    def before_request(self, base_uri: str):
+        """
+        Raises a CircuitOpenError if no request may be sent to base_uri
+        """
+        with self._lock:
+            circuit = self._circuit(base_uri)
+            if circuit.state == "closed":
+                return
+            if (
+                circuit.state == "half_open"
+                and circuit.probes < self.half_open_requests
+            ):
+                circuit.probes += 1
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"The circuit for {base_uri} is open")
+
+    def record_response(self, base_uri: str, status_code: int):
+        self._record(base_uri, status_code not in self.failure_statuses)
+
+    def record_success(self, base_uri: str):
+        self._record(base_uri, True)
+
+    def record_failure(self, base_uri: str):
+        self._record(base_uri, False)
+
+    def reset(self, base_uri: str):
+        with self._lock:
+            self._circuits.pop(base_uri, None)
+
+    def _record(self, base_uri: str, success: bool):
+        with self._lock:
+            circuit = self._circuit(base_uri)
+            if circuit.state == "half_open":
+                if not success:
+                    self._open(circuit)
+                    return
+                circuit.probe_successes += 1
+                if circuit.probe_successes >= self.half_open_requests:
+                    circuit.state = "closed"
+                    circuit.outcomes.clear()
+                return
+            if circuit.state == "open":
+                # A request sent before the circuit opened
+                return
+            circuit.outcomes.append(success)
+            requests_made = len(circuit.outcomes)
+            failures = circuit.outcomes.count(False)
+            if (
+                requests_made >= self.minimum_requests
+                and failures >= self.failure_rate_threshold * requests_made
+            ):
+                self._open(circuit)
+
+    def _open(self, circuit: _Circuit):
+        circuit.state = "open"
+        circuit.opened_at = time.monotonic()
+        circuit.outcomes.clear()
@@ -0,0 +1,152 @@
+import gzip
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from urllib3.util import make_headers
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+valid_encodings = ["gzip", "zstd"]
+# The response encodings urllib3 can decode here: gzip and deflate, and br and zstd
+# when brotli and zstandard are installed. httpx, which decodes them with http2=True,
+# does too from 0.27, the version the http2 extra requires
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+# The endpoints that send a request body
+valid_endpoints = [
+    "process_text",
+    "process_files_uri",
+    "process_files_base64",
+    "bleep",
+    "reidentify_text",
+    "ner_text",
+    "analyze_text",
+]
+
+
+class CompressionPolicy:
+    """
+    Compresses request bodies of at least threshold bytes with encoding, "gzip" or "zstd",
+    and sends them with a Content-Encoding header. The container, or the proxy in front of it,
+    must accept compressed requests.
+
+    thresholds sets the threshold of individual endpoints by name, e.g.
+    {"process_files_base64": 16384, "reidentify_text": None}, where None disables compression.
+    Bodies that do not get smaller are sent uncompressed, as are files created with
+    File.from_path, which are streamed from disk.
+    """
+
+    # Fast levels: higher ones shrink text batches a little more for several times the CPU
+    # time, see benchmarks/bench_compression.py
+    default_levels = {"gzip": 1, "zstd": 3}
+
+    def __init__(
+        self,
+        encoding: str = "gzip",
+        threshold: Optional[int] = 1024,
+        thresholds: Optional[Dict[str, Optional[int]]] = None,
+        level: Optional[int] = None,
+    ):
+        if encoding not in valid_encodings:
+            raise ValueError(
+                f"{encoding} is not valid. encoding can only be one of the following: {', '.join(valid_encodings)}"
+            )
+        if encoding == "zstd" and zstandard is None:
+            raise ImportError(
+                "zstd compression requires zstandard. Install it with 'pip install privateai_client[zstd]'"
+            )
+        thresholds = dict(thresholds or {})
+        for endpoint, value in [("threshold", threshold), *thresholds.items()]:
+            if endpoint != "threshold" and endpoint not in valid_endpoints:
+                raise ValueError(
+                    f"{endpoint} is not valid. thresholds can only contain the following endpoints: {', '.join(valid_endpoints)}"
+                )
+            if value is not None and (not isinstance(value, int) or value < 0):
+                raise ValueError(
+                    f"Invalid value for {endpoint}. Accepted value is a non-negative integer or None."
+                )
+        self.encoding = encoding
+        self.threshold = threshold
+        self.thresholds = thresholds
+        self.level = self.default_levels[encoding] if level is None else level
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=self.level)
+            self._compressor_lock = threading.Lock()
+
+    def threshold_for(self, endpoint: Optional[str]) -> Optional[int]:
+        return self.thresholds.get(endpoint, self.threshold)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "gzip":
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        # A ZstdCompressor may not be used by several threads at once
+        with self._compressor_lock:
+            return self._compressor.compress(data)
+
+    def apply(
+        self,
+        data: bytes,
+        endpoint: Optional[str] = None,
+        stats: Optional["CompressionStats"] = None,
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Returns the body to send for data and its Content-Encoding, None when it is not compressed
+        """
+        threshold = self.threshold_for(endpoint)
+        if threshold is None or len(data) < threshold:
+            return data, None
+        start = time.thread_time()
+        compressed = self.compress(data)
+        cpu_time = time.thread_time() - start
+        worthwhile = len(compressed) < len(data)
+        if stats is not None:
+            stats.record(len(data), len(compressed), cpu_time, worthwhile)
+        if not worthwhile:
+            return data, None
+        return compressed, self.encoding
+
+
+class CompressionStats:
+    """
+    Counts the request bodies compressed by a client. bytes_in and bytes_out are the sizes of the
+    compressed bodies before and after compression and cpu_time the CPU seconds spent compressing.
+    uncompressed counts the bodies sent uncompressed because they did not get smaller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.uncompressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_time = 0.0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    @property
+    def ratio(self) -> Optional[float]:
+        # The compressed size as a fraction of the original size
+        return self.bytes_out / self.bytes_in if self.bytes_in else None
+
+    def record(self, size: int, compressed_size: int, cpu_time: float, sent: bool):
+        with self._lock:
+            self.cpu_time += cpu_time
+            if sent:
+                self.compressed += 1
+                self.bytes_in += size
+                self.bytes_out += compressed_size
+            else:
+                self.uncompressed += 1
+
+    def reset(self):
+        with self._lock:
+            self.compressed = 0
+            self.uncompressed = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.cpu_time = 0.0
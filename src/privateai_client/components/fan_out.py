@@ -0,0 +1,91 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+
+class MapResult(NamedTuple):
+    """
+    The outcome of one request sent through PAIClient.map.
+    index is the position of the request in the input, and exactly one of response and error is set.
+    """
+
+    index: int
+    request: Any
+    response: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _get_result(index, request, future) -> MapResult:
+    try:
+        return MapResult(index, request, response=future.result())
+    except Exception as e:
+        return MapResult(index, request, error=e)
+
+
+def fan_out(
+    fn: Callable[[Any], Any],
+    requests: Iterable,
+    concurrency: int,
+    ordered: bool = True,
+) -> Iterator[MapResult]:
+    """
+    Calls fn on every item of requests from a pool of concurrency threads and yields MapResults.
+
+    At most concurrency requests are in flight at once, and items are only pulled from the
+    requests iterable as earlier ones finish, so arbitrarily large or lazy inputs can be used.
+    Exceptions raised by fn are captured in MapResult.error instead of being raised.
+    When ordered is False, results are yielded as soon as they complete.
+    """
+    # Validated here rather than in the generator, so bad arguments fail when fan_out is called
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ValueError("concurrency must be a positive integer")
+    return _fan_out(fn, requests, concurrency, ordered)
+
+
+def _fan_out(
+    fn: Callable[[Any], Any],
+    requests: Iterable,
+    concurrency: int,
+    ordered: bool,
+) -> Iterator[MapResult]:
+    items = enumerate(requests)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    in_flight = deque() if ordered else {}
+
+    def submit_next():
+        for index, request in items:
+            future = executor.submit(fn, request)
+            if ordered:
+                in_flight.append((index, request, future))
+            else:
+                in_flight[future] = (index, request)
+            return True
+        return False
+
+    try:
+        while len(in_flight) < concurrency and submit_next():
+            pass
+        while in_flight:
+            if ordered:
+                index, request, future = in_flight.popleft()
+                result = _get_result(index, request, future)
+                submit_next()
+                yield result
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                results = []
+                for future in done:
+                    index, request = in_flight.pop(future)
+                    results.append(_get_result(index, request, future))
+                    submit_next()
+                yield from results
+    finally:
+        # Stop work that has not started yet if the caller stops iterating early
+        futures = [future for _, _, future in in_flight] if ordered else list(in_flight)
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
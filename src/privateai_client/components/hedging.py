@@ -0,0 +1,251 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional
+
+import requests
+
+# The endpoints whose requests can be sent twice without side effects
+valid_endpoints = [
+    "process_text",
+    "process_files_base64",
+    "bleep",
+    "reidentify_text",
+    "ner_text",
+    "analyze_text",
+]
+
+
+class HedgingPolicy:
+    """
+    Sends a second copy of a request to another container if it has not been answered after the
+    given percentile of the recent latencies of its endpoint, and uses whichever response comes
+    first. This cuts the tail latency caused by a slow container. It needs several urls.
+
+    Latencies are the time until the response headers arrive, kept for the last window requests
+    of each endpoint. Requests are not hedged until min_samples latencies have been seen, and
+    never sooner than min_delay seconds. budget caps the extra load: every request earns budget
+    hedges, e.g. 0.05 for at most one hedge per 20 requests, up to max_burst saved up.
+
+    Only the endpoints given are hedged, by default the text endpoints, and only while another
+    container is available. The copy that loses is closed as soon as its response arrives, so its
+    body is not downloaded; the container still processes it. At most max_workers copies are in
+    flight at once, see Hedger.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        budget: float = 0.05,
+        max_burst: float = 10.0,
+        window: int = 1000,
+        min_samples: int = 20,
+        min_delay: float = 0.0,
+        max_workers: int = 32,
+        endpoints: Iterable[str] = (
+            "process_text",
+            "reidentify_text",
+            "ner_text",
+            "analyze_text",
+        ),
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError(
+                "Invalid value for percentile. Accepted value is a number between 0 and 100."
+            )
+        if budget < 0 or max_burst < 1:
+            raise ValueError(
+                "Invalid value for budget or max_burst. Accepted values are a non-negative number and a number of at least 1."
+            )
+        for name, value in [("window", window), ("max_workers", max_workers)]:
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(
+                    f"Invalid value for {name}. Accepted value is a positive integer."
+                )
+        endpoints = list(endpoints)
+        for endpoint in endpoints:
+            if endpoint not in valid_endpoints:
+                raise ValueError(
+                    f"{endpoint} is not valid. endpoints can only contain the following: {', '.join(valid_endpoints)}"
+                )
+        self.percentile = percentile
+        self.budget = budget
+        self.max_burst = max_burst
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self.endpoints = frozenset(endpoints)
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {}
+        self._credit = 0.0
+
+    def record_latency(self, endpoint: str, seconds: float):
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(seconds)
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """
+        Returns how long to wait before hedging a request to endpoint, None when there are too few
+        latencies to tell
+        """
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            latencies = sorted(latencies)
+        index = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+        return max(latencies[index], self.min_delay)
+
+    def earn(self):
+        with self._lock:
+            self._credit = min(self._credit + self.budget, self.max_burst)
+
+    def spend(self) -> bool:
+        """
+        Takes a hedge from the budget, returning False when the budget is spent
+        """
+        with self._lock:
+            if self._credit < 1:
+                return False
+            self._credit -= 1
+            return True
+
+
+class HedgingStats:
+    """
+    Counts the requests sent by a client under a hedging policy. hedged counts the requests a
+    second copy was sent for, hedge_wins those answered by the copy first and budget_exhausted
+    the requests that were not hedged because the budget was spent.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def record(self, hedged: bool, hedge_won: bool, budget_exhausted: bool):
+        with self._lock:
+            self.requests += 1
+            self.hedged += hedged
+            self.hedge_wins += hedge_won
+            self.budget_exhausted += budget_exhausted
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.hedged = 0
+            self.hedge_wins = 0
+            self.budget_exhausted = 0
+
+
+def _succeeded(future: Future) -> bool:
+    return future.exception() is None and future.result().status_code < 500
+
+
+def _close_response(future: Future):
+    if future.exception() is None:
+        future.result().close()
+
+
+class Hedger:
+    """
+    Sends requests under a hedging policy. The copies of a hedged request are sent from a pool of
+    at most max_workers threads shared by the client's requests; when every thread is busy,
+    requests are sent from the calling thread without hedging rather than queued.
+    """
+
+    def __init__(
+        self, policy: HedgingPolicy, stats: HedgingStats, max_workers: int = 32
+    ):
+        self.policy = policy
+        self.stats = stats
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="pai-hedge")
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def _submit(self, fn: Callable[[], requests.Response]) -> Optional[Future]:
+        # The caller must have taken one of the slots, which is released when fn returns
+        def run():
+            try:
+                return fn()
+            finally:
+                self._slots.release()
+
+        try:
+            return self._executor.submit(run)
+        except RuntimeError:
+            # The executor was shut down by close
+            self._slots.release()
+            return None
+
+    def send(
+        self,
+        endpoint: str,
+        send: Callable[[List[str], List[str]], requests.Response],
+        can_hedge: Callable[[List[str]], bool],
+    ) -> requests.Response:
+        """
+        Calls send, and again if it has not returned after the policy's delay, and returns the
+        first successful response, or the first one's outcome when neither succeeds.
+
+        send is called with the base uris of the containers to avoid and a list that it appends
+        the base uri of the container it chose to, which the hedge then avoids. The hedge is only
+        sent when can_hedge returns True for those base uris, i.e. another container is available.
+        Responses must be streamed, so the losing one can be closed without reading its body.
+        """
+        policy = self.policy
+        policy.earn()
+        hosts: List[str] = []
+
+        def timed_send(exclude: List[str], chosen: List[str]) -> requests.Response:
+            start = time.monotonic()
+            response = send(exclude, chosen)
+            policy.record_latency(endpoint, time.monotonic() - start)
+            return response
+
+        delay = policy.delay(endpoint)
+        primary = None
+        if delay is not None and self._slots.acquire(blocking=False):
+            primary = self._submit(lambda: timed_send([], hosts))
+        if primary is None:
+            try:
+                return timed_send([], hosts)
+            finally:
+                self.stats.record(False, False, False)
+
+        hedge = None
+        budget_exhausted = False
+        if (
+            wait([primary], timeout=delay).not_done
+            and can_hedge(list(hosts))
+            and self._slots.acquire(blocking=False)
+        ):
+            if policy.spend():
+                hedge = self._submit(lambda: timed_send(list(hosts), []))
+            else:
+                self._slots.release()
+                budget_exhausted = True
+
+        pending = {primary} if hedge is None else {primary, hedge}
+        winner = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if _succeeded(future)), None)
+            if winner is not None:
+                break
+        if winner is None:
+            winner = primary
+        for future in [primary, hedge]:
+            if future is not None and future is not winner:
+                future.add_done_callback(_close_response)
+        self.stats.record(hedge is not None, winner is hedge, budget_exhausted)
+        return winner.result()
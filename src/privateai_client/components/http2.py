@@ -0,0 +1,196 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .async_pai_requests import _aiter_body
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - depends on the environment
+    httpx = None
+
+try:
+    import h2
+except ImportError:  # pragma: no cover - depends on the environment
+    h2 = None
+
+# Headers that only apply to an HTTP/1.1 connection and are not allowed in HTTP/2
+_hop_by_hop_headers = frozenset(
+    ["connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"]
+)
+
+
+class _StreamedBody:
+    """
+    The file-like raw body of a streamed response, read by requests.Response.iter_content
+    """
+
+    def __init__(
+        self,
+        adapter: "HTTP2Adapter",
+        response: "httpx.Response",
+        request: Optional[requests.PreparedRequest] = None,
+    ):
+        self._adapter = adapter
+        self._response = response
+        self._request = request
+        self._chunks: Optional[AsyncIterator[bytes]] = None
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1, **kwargs) -> bytes:
+        if self._chunks is None:
+            self._chunks = self._response.aiter_bytes()
+        while size < 0 or len(self._buffer) < size:
+            try:
+                chunk = self._adapter._run(_next_chunk(self._chunks))
+            except httpx.TransportError as e:
+                raise _to_requests_error(e, self._request)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def close(self):
+        self._adapter._run(self._response.aclose())
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    A requests transport adapter that sends requests over HTTP/2 with httpx, so many
+    concurrent requests share a few connections instead of needing one connection each.
+
+    https connections negotiate HTTP/2 and fall back to HTTP/1.1 if the server does not support it.
+    Plain http connections use HTTP/2 directly, which the server must support (h2c).
+    max_connections bounds the number of connections per host. Certificates are verified
+    with the system's trust store; the verify and cert arguments of requests are not used.
+
+    The requests of every thread are sent from one event loop running in a daemon thread,
+    as the synchronous httpx client can send the streams of a connection out of order when
+    it is shared by several threads.
+    """
+
+    def __init__(self, max_connections: int = 10):
+        super().__init__()
+        if httpx is None or h2 is None:
+            raise ImportError(
+                "HTTP/2 requires httpx and h2. Install them with 'pip install privateai_client[http2]'"
+            )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        limits = httpx.Limits(max_connections=max_connections)
+        self._client = self._run(self._create_client(limits))
+
+    async def _create_client(self, limits: "httpx.Limits") -> "httpx.AsyncClient":
+        return httpx.AsyncClient(
+            timeout=None,
+            mounts={
+                "http://": httpx.AsyncHTTPTransport(
+                    http1=False, http2=True, limits=limits
+                ),
+                "https://": httpx.AsyncHTTPTransport(http2=True, limits=limits),
+            },
+        )
+
+    @property
+    def client(self):
+        return self._client
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ) -> requests.Response:
+        headers = [
+            (key, value)
+            for key, value in request.headers.items()
+            if key.lower() not in _hop_by_hop_headers
+        ]
+        content = request.body
+        if hasattr(content, "read"):
+            # Streamed bodies, such as files created with File.from_path
+            content = _aiter_body(content)
+        httpx_request = self._client.build_request(
+            request.method,
+            request.url,
+            headers=headers,
+            content=content,
+            timeout=_to_httpx_timeout(timeout),
+        )
+        try:
+            response = self._run(self._client.send(httpx_request, stream=stream))
+        except httpx.TransportError as e:
+            raise _to_requests_error(e, request)
+        return self._build_response(request, response, stream)
+
+    def _build_response(
+        self,
+        request: requests.PreparedRequest,
+        response: "httpx.Response",
+        stream: bool,
+    ) -> requests.Response:
+        converted = requests.Response()
+        converted.status_code = response.status_code
+        converted.reason = response.reason_phrase
+        converted.headers = CaseInsensitiveDict(response.headers)
+        converted.encoding = get_encoding_from_headers(converted.headers)
+        converted.url = request.url
+        converted.request = request
+        converted.connection = self
+        if stream:
+            converted.raw = _StreamedBody(self, response, request)
+        else:
+            converted._content = response.content
+            converted._content_consumed = True
+        return converted
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._run(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _to_requests_error(
+    error: "httpx.TransportError", request: Optional[requests.PreparedRequest]
+) -> requests.RequestException:
+    # Callers handle the exceptions of requests, whichever transport sent the request
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.ConnectTimeout(error, request=request)
+    if isinstance(error, httpx.TimeoutException):
+        return requests.ReadTimeout(error, request=request)
+    return requests.ConnectionError(error, request=request)
+
+
+async def _next_chunk(chunks: AsyncIterator[bytes]) -> Optional[bytes]:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def _to_httpx_timeout(timeout) -> "httpx.Timeout":
+    # requests takes a number or a (connect, read) tuple
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+    return httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
@@ -0,0 +1,88 @@
+import json
+from typing import Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - depends on the environment
+    ujson = None
+
+
+class JSONCodec:
+    """
+    Encodes request payloads to bytes and decodes response bodies from bytes, bytearray or str.
+    The default implementation uses the standard library json module.
+    """
+
+    name = "json"
+    content_type = "application/json"
+
+    def dumps(self, obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode(
+            "utf-8"
+        )
+
+    def loads(self, data: Union[bytes, bytearray, str]):
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("The orjson codec requires orjson to be installed")
+
+    def dumps(self, obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, bytearray, str]):
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def __init__(self):
+        if ujson is None:
+            raise ImportError("The ujson codec requires ujson to be installed")
+
+    def dumps(self, obj) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, bytearray, str]):
+        if isinstance(data, bytearray):
+            data = bytes(data)
+        return ujson.loads(data)
+
+
+valid_codecs = ["auto", "json", "orjson", "ujson"]
+
+
+def get_codec(codec: Union[str, JSONCodec, None] = "auto") -> JSONCodec:
+    """
+    Returns a JSONCodec from its name. "auto" picks the fastest installed library,
+    preferring orjson, then ujson, then the standard library.
+    JSONCodec instances are returned unchanged.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is None or codec == "auto":
+        if orjson is not None:
+            return OrjsonCodec()
+        if ujson is not None:
+            return UjsonCodec()
+        return JSONCodec()
+    if codec == "json":
+        return JSONCodec()
+    if codec == "orjson":
+        return OrjsonCodec()
+    if codec == "ujson":
+        return UjsonCodec()
+    raise ValueError(
+        f"{codec} is not valid. json_codec can only be a JSONCodec or one of the following: {', '.join(valid_codecs)}"
+    )
@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Collection, Iterator, List, Optional
+
+from .circuit_breaker import CircuitBreaker
+
+valid_strategies = ["least_outstanding", "power_of_two"]
+
+
+class Host:
+    """
+    A container the load balancer sends requests to
+    """
+
+    def __init__(self, base_uri: str):
+        self.base_uri = base_uri
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def __repr__(self):
+        return f"Host({self.base_uri!r}, outstanding={self.outstanding}, healthy={self.healthy})"
+
+
+class LoadBalancer:
+    """
+    Spreads requests over several containers.
+
+    With the "least_outstanding" strategy each request goes to the host with the fewest requests
+    in flight, and with "power_of_two" to the least busy of two hosts picked at random, which
+    avoids every client piling onto the same host when many clients share a fleet.
+
+    A host that fails eject_after requests in a row (connection errors, timeouts and 502, 503
+    and 504 responses) is ejected for eject_for seconds, or until a health check passes.
+    Hosts whose circuit is open in circuit_breaker are skipped in the same way.
+    When every host is ejected, requests are spread over all of them.
+    """
+
+    # Responses that count as a failure of the host
+    failure_statuses = frozenset([502, 503, 504])
+
+    def __init__(
+        self,
+        base_uris: List[str],
+        strategy: str = "least_outstanding",
+        eject_after: int = 3,
+        eject_for: float = 30.0,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        if strategy not in valid_strategies:
+            raise ValueError(
+                f"{strategy} is not valid. load_balancing can only be one of the following: {', '.join(valid_strategies)}"
+            )
+        if not base_uris:
+            raise ValueError("The load balancer needs at least one url")
+        self.hosts = [Host(base_uri) for base_uri in base_uris]
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.eject_for = eject_for
+        self.circuit_breaker = circuit_breaker
+        self._lock = threading.Lock()
+        self._stop_health_checks: Optional[threading.Event] = None
+
+    def choose(self) -> Host:
+        with self._lock:
+            return self._choose()
+
+    def _choose(self, exclude: Collection[str] = ()) -> Host:
+        hosts = [host for host in self.hosts if self._available(host)]
+        hosts = (
+            [host for host in hosts if host.base_uri not in exclude]
+            or hosts
+            or self.hosts
+        )
+        if self.strategy == "power_of_two" and len(hosts) > 2:
+            hosts = random.sample(hosts, 2)
+        fewest = min(host.outstanding for host in hosts)
+        # Ties are broken at random so idle hosts share the load
+        return random.choice([host for host in hosts if host.outstanding == fewest])
+
+    def _available(self, host: Host) -> bool:
+        return host.healthy and (
+            self.circuit_breaker is None
+            or self.circuit_breaker.available(host.base_uri)
+        )
+
+    def has_available(self, exclude: Collection[str] = ()) -> bool:
+        """
+        Whether a host whose base uri is not in exclude is available, i.e. neither ejected nor
+        behind an open circuit
+        """
+        with self._lock:
+            return any(
+                self._available(host)
+                for host in self.hosts
+                if host.base_uri not in exclude
+            )
+
+    @contextmanager
+    def acquire(self, exclude: Collection[str] = ()) -> Iterator[Host]:
+        """
+        Chooses a host, other than those whose base uri is in exclude if there are others,
+        and counts the request as outstanding on it until the block exits
+        """
+        with self._lock:
+            host = self._choose(exclude)
+            host.outstanding += 1
+        try:
+            yield host
+        finally:
+            with self._lock:
+                host.outstanding -= 1
+
+    def record_response(self, host: Host, status_code: int):
+        if status_code in self.failure_statuses:
+            self.record_failure(host)
+        else:
+            self.record_success(host)
+
+    def record_success(self, host: Host):
+        with self._lock:
+            host.consecutive_failures = 0
+
+    def record_failure(self, host: Host):
+        with self._lock:
+            host.consecutive_failures += 1
+            if host.consecutive_failures >= self.eject_after:
+                host.ejected_until = time.monotonic() + self.eject_for
+
+    def check_health(self, is_healthy: Callable[[str], bool]) -> dict:
+        """
+        Calls is_healthy with the base uri of every host, ejecting the hosts it returns False for
+        and readmitting the others. Returns whether each host is healthy by base uri.
+        """
+        results = {}
+        for host in self.hosts:
+            healthy = is_healthy(host.base_uri)
+            with self._lock:
+                if healthy:
+                    host.consecutive_failures = 0
+                    host.ejected_until = 0.0
+                else:
+                    host.ejected_until = time.monotonic() + self.eject_for
+            results[host.base_uri] = healthy
+        return results
+
+    def start_health_checks(self, is_healthy: Callable[[str], bool], interval: float):
+        """
+        Runs check_health every interval seconds in a daemon thread until stop_health_checks is called
+        """
+        self.stop_health_checks()
+        stop = self._stop_health_checks = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.check_health(is_healthy)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def stop_health_checks(self):
+        if self._stop_health_checks is not None:
+            self._stop_health_checks.set()
+            self._stop_health_checks = None
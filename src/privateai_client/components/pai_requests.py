@@ -1,86 +1,506 @@
-from typing import Union
+import time
+from typing import Collection, List, Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .compression import (
+    ACCEPT_ENCODING,
+    CompressionPolicy,
+    CompressionStats,
+    valid_endpoints,
+)
+from .hedging import Hedger, HedgingPolicy, HedgingStats
+from .http2 import HTTP2Adapter
+from .json_codec import JSONCodec, get_codec
+from .load_balancer import LoadBalancer
 from .pai_uris import PAIURIs
+from .retry import RetryPolicy, RetryStats
+from .streaming import StreamingJSONBody, encode_payload
+from .timeouts import DeadlineExceeded, Timeout, get_timeout
+from .unix_socket import UNIX_SOCKET_SCHEME, UnixSocketAdapter
+
+
+def create_session(
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
+    pool_block: bool = False,
+    keep_alive: bool = True,
+    http2: bool = False,
+) -> requests.Session:
+    """
+    Creates a requests.Session with a pooled HTTPAdapter mounted for http and https.
+
+    pool_connections is the number of per-host connection pools to cache, pool_maxsize the
+    maximum number of connections kept open per host and pool_block whether requests wait
+    for a free connection instead of opening a throwaway one when the pool is exhausted.
+    With http2, an HTTP2Adapter that multiplexes requests over at most pool_maxsize
+    connections per host is mounted instead. A pooled UnixSocketAdapter is mounted for
+    containers listening on a unix domain socket.
+    """
+    if http2 and not keep_alive:
+        raise ValueError(
+            "Invalid value for keep_alive. Accepted value is True when http2 is enabled."
+        )
+    session = requests.Session()
+    if http2:
+        adapter = HTTP2Adapter(max_connections=pool_maxsize)
+    else:
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.mount(
+        f"{UNIX_SOCKET_SCHEME}://",
+        UnixSocketAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        ),
+    )
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
 
 
 class PAIRequests:
-    def __init__(self, uris: PAIURIs):
+    def __init__(
+        self,
+        uris: PAIURIs,
+        session: Optional[requests.Session] = None,
+        codec: Union[str, JSONCodec, None] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_stats: Optional[RetryStats] = None,
+        load_balancer: Optional[LoadBalancer] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        timeout: Union[Timeout, float, tuple, None] = None,
+        compression: Optional[CompressionPolicy] = None,
+        compression_stats: Optional[CompressionStats] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        hedging_stats: Optional[HedgingStats] = None,
+    ):
         self._uris = uris
+        self._session = session if session is not None else create_session()
+        self._codec = get_codec(codec)
+        self._retry_policy = retry_policy
+        self._retry_stats = retry_stats if retry_stats is not None else RetryStats()
+        self._load_balancer = load_balancer
+        self._circuit_breaker = circuit_breaker
+        self._timeout = get_timeout(timeout)
+        self._compression = compression
+        self._compression_stats = (
+            compression_stats if compression_stats is not None else CompressionStats()
+        )
+        self._hedging = hedging
+        self._hedging_stats = (
+            hedging_stats if hedging_stats is not None else HedgingStats()
+        )
+        self._hedger = (
+            Hedger(hedging, self._hedging_stats, hedging.max_workers)
+            if hedging is not None
+            else None
+        )
+        # Lets the compression and hedging policies tell endpoints apart by their uri
+        self._endpoints = {getattr(uris, name): name for name in valid_endpoints}
         self.headers = self.base_header
 
     @property
     def uris(self):
         return self._uris
 
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def codec(self):
+        return self._codec
+
+    @property
+    def retry_policy(self):
+        return self._retry_policy
+
+    @property
+    def retry_stats(self):
+        return self._retry_stats
+
+    @property
+    def load_balancer(self):
+        return self._load_balancer
+
+    @property
+    def circuit_breaker(self):
+        return self._circuit_breaker
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def compression(self):
+        return self._compression
+
+    @property
+    def compression_stats(self):
+        return self._compression_stats
+
+    @property
+    def hedging(self):
+        return self._hedging
+
+    @property
+    def hedging_stats(self):
+        return self._hedging_stats
+
+    def close(self):
+        """
+        Stops the threads hedged requests are sent from
+        """
+        if self._hedger is not None:
+            self._hedger.close()
+
     @property
     def base_header(self):
-        return {"Accept": "application/json"}
+        return {"Accept": "application/json", "Accept-Encoding": ACCEPT_ENCODING}
 
     def make_request(
         self,
-        request_type: Union[requests.get, requests.post],
+        request_type: str,
         uri: str,
         payload: dict = None,
+        stream: bool = False,
+        idempotent: Optional[bool] = None,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ):
+        """
+        Sends a request, retrying it as allowed by the retry policy.
+        idempotent defaults to True for GET requests and False otherwise.
+        timeout replaces the timeout set on initialization for this request.
+        """
+        if idempotent is None:
+            idempotent = request_type == "GET"
+        timeout = self.timeout if timeout is None else get_timeout(timeout)
+        deadline_at = timeout.start()
+        headers = self.headers
+        endpoint = self._endpoints.get(uri)
+        data = None
+        if payload is not None:
+            # The payload is encoded here rather than by requests so the codec can be chosen
+            # and files created with File.from_path can be streamed
+            data = encode_payload(payload, self.codec)
+            headers = {**headers, "Content-Type": self.codec.content_type}
+            if self.compression is not None and isinstance(data, bytes):
+                data, encoding = self.compression.apply(
+                    data, endpoint, self.compression_stats
+                )
+                if encoding is not None:
+                    headers["Content-Encoding"] = encoding
+        # Streamed bodies, such as files created with File.from_path, cannot be sent twice
+        hedged = (
+            self.hedging is not None
+            and self.load_balancer is not None
+            and idempotent
+            and endpoint in self.hedging.endpoints
+            and not isinstance(data, StreamingJSONBody)
+        )
+
+        attempt = 1
+        while True:
+            response = error = None
+            try:
+                if hedged:
+                    response = self._send_hedged(
+                        request_type,
+                        uri,
+                        endpoint,
+                        data,
+                        headers,
+                        stream,
+                        timeout.for_attempt(deadline_at),
+                    )
+                else:
+                    response = self._send(
+                        request_type,
+                        uri,
+                        data,
+                        headers,
+                        stream,
+                        timeout.for_attempt(deadline_at),
+                    )
+            except DeadlineExceeded:
+                raise
+            except requests.RequestException as e:
+                error = e
+            if self.retry_policy is None or not self.retry_policy.is_retryable(
+                idempotent, response, error
+            ):
+                break
+            if attempt >= self.retry_policy.max_attempts:
+                self.retry_stats.record_exhausted()
+                break
+
+            delay = self.retry_policy.delay(attempt, response)
+            if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+                # The next attempt could not start before the deadline
+                self.retry_stats.record_exhausted()
+                break
+            if response is not None:
+                self.retry_stats.record_retry(response.status_code)
+                # Releases the connection of a streamed response
+                response.close()
+            else:
+                self.retry_stats.record_retry(type(error).__name__)
+            time.sleep(delay)
+            if isinstance(data, StreamingJSONBody):
+                data.rewind()
+            attempt += 1
+
+        if error is not None:
+            raise error
+        return response
+
+    def _send_hedged(
+        self,
+        request_type: str,
+        uri: str,
+        endpoint: str,
+        data,
+        headers: dict,
+        stream: bool,
+        timeout,
     ):
-        response = request_type(uri, json=payload, headers=self.headers)
+        # Both copies are streamed so the one that loses can be closed without reading its body
+        response = self._hedger.send(
+            endpoint,
+            lambda exclude, chosen: self._send(
+                request_type, uri, data, headers, True, timeout, exclude, chosen
+            ),
+            self.load_balancer.has_available,
+        )
+        if not stream:
+            response.content
+        return response
+
+    def _send(
+        self,
+        request_type: str,
+        uri: str,
+        data,
+        headers: dict,
+        stream: bool,
+        timeout,
+        exclude: Collection[str] = (),
+        chosen: Optional[List[str]] = None,
+    ):
+        """
+        Sends a request to a container chosen by the load balancer, other than those in exclude
+        if possible, and appends its base uri to chosen
+        """
+        if self.load_balancer is None:
+            return self._send_to(
+                self.uris.pai_uri, request_type, uri, data, headers, stream, timeout
+            )
+        # Each attempt picks a host, so retries can go to another container
+        with self.load_balancer.acquire(exclude) as host:
+            if chosen is not None:
+                chosen.append(host.base_uri)
+            try:
+                response = self._send_to(
+                    host.base_uri, request_type, uri, data, headers, stream, timeout
+                )
+            except CircuitOpenError:
+                raise
+            except requests.RequestException:
+                self.load_balancer.record_failure(host)
+                raise
+        self.load_balancer.record_response(host, response.status_code)
+        return response
+
+    def _send_to(
+        self,
+        base_uri: str,
+        request_type: str,
+        uri: str,
+        data,
+        headers: dict,
+        stream: bool,
+        timeout,
+    ):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request(base_uri)
+        try:
+            response = self.session.request(
+                request_type,
+                self.uris.for_base(uri, base_uri),
+                data=data,
+                headers=headers,
+                stream=stream,
+                timeout=timeout,
+            )
+        except Exception:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure(base_uri)
+            raise
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_response(base_uri, response.status_code)
         return response
 
 
 class PAIGetRequests(PAIRequests):
-    def __init__(self, uris: PAIURIs):
+    def __init__(
+        self,
+        uris: PAIURIs,
+        session: Optional[requests.Session] = None,
+        codec: Union[str, JSONCodec, None] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_stats: Optional[RetryStats] = None,
+        load_balancer: Optional[LoadBalancer] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        timeout: Union[Timeout, float, tuple, None] = None,
+        compression: Optional[CompressionPolicy] = None,
+        compression_stats: Optional[CompressionStats] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        hedging_stats: Optional[HedgingStats] = None,
+    ):
         """
         A class of get requests used by the client
         """
-        self.request_type = requests.get
-        super(PAIGetRequests, self).__init__(uris)
+        self.request_type = "GET"
+        super(PAIGetRequests, self).__init__(
+            uris,
+            session,
+            codec,
+            retry_policy,
+            retry_stats,
+            load_balancer,
+            circuit_breaker,
+            timeout,
+            compression,
+            compression_stats,
+            hedging,
+            hedging_stats,
+        )
 
-    def health(self):
-        return self.make_request(self.request_type, self.uris.health)
+    def health(self, timeout=None):
+        return self.make_request(self.request_type, self.uris.health, timeout=timeout)
 
-    def metrics(self):
-        return self.make_request(self.request_type, self.uris.metrics)
+    def metrics(self, timeout=None):
+        return self.make_request(self.request_type, self.uris.metrics, timeout=timeout)
 
-    def version(self):
-        return self.make_request(self.request_type, self.uris.version)
+    def version(self, timeout=None):
+        return self.make_request(self.request_type, self.uris.version, timeout=timeout)
 
-    def diagnostics(self):
-        return self.make_request(self.request_type, self.uris.diagnostics)
+    def diagnostics(self, timeout=None):
+        return self.make_request(
+            self.request_type, self.uris.diagnostics, timeout=timeout
+        )
 
 
 class PAIPostRequests(PAIRequests):
-    def __init__(self, uris: PAIURIs):
-        self.request_type = requests.post
-        super(PAIPostRequests, self).__init__(uris)
+    def __init__(
+        self,
+        uris: PAIURIs,
+        session: Optional[requests.Session] = None,
+        codec: Union[str, JSONCodec, None] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_stats: Optional[RetryStats] = None,
+        load_balancer: Optional[LoadBalancer] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        timeout: Union[Timeout, float, tuple, None] = None,
+        compression: Optional[CompressionPolicy] = None,
+        compression_stats: Optional[CompressionStats] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        hedging_stats: Optional[HedgingStats] = None,
+    ):
+        """
+        A class of post requests used by the client. All endpoints but process_files_uri,
+        which writes files on the container, are idempotent and retried as such.
+        """
+        self.request_type = "POST"
+        super(PAIPostRequests, self).__init__(
+            uris,
+            session,
+            codec,
+            retry_policy,
+            retry_stats,
+            load_balancer,
+            circuit_breaker,
+            timeout,
+            compression,
+            compression_stats,
+            hedging,
+            hedging_stats,
+        )
 
-    def process_text(self, request_object):
+    def process_text(self, request_object, *, stream: bool = False, timeout=None):
         return self.make_request(
-            self.request_type, self.uris.process_text, request_object
+            self.request_type,
+            self.uris.process_text,
+            request_object,
+            stream,
+            idempotent=True,
+            timeout=timeout,
         )
 
-    def process_files_uri(self, request_object):
+    def process_files_uri(self, request_object, *, timeout=None):
         return self.make_request(
-            self.request_type, self.uris.process_files_uri, request_object
+            self.request_type,
+            self.uris.process_files_uri,
+            request_object,
+            timeout=timeout,
         )
 
-    def process_files_base64(self, request_object):
+    def process_files_base64(
+        self, request_object, *, stream: bool = False, timeout=None
+    ):
         return self.make_request(
-            self.request_type, self.uris.process_files_base64, request_object
+            self.request_type,
+            self.uris.process_files_base64,
+            request_object,
+            stream,
+            idempotent=True,
+            timeout=timeout,
         )
 
-    def bleep(self, request_object):
-        return self.make_request(self.request_type, self.uris.bleep, request_object)
+    def bleep(self, request_object, *, stream: bool = False, timeout=None):
+        return self.make_request(
+            self.request_type,
+            self.uris.bleep,
+            request_object,
+            stream,
+            idempotent=True,
+            timeout=timeout,
+        )
 
-    def reidentify_text(self, request_object):
+    def reidentify_text(self, request_object, *, timeout=None):
         return self.make_request(
-            self.request_type, self.uris.reidentify_text, request_object
+            self.request_type,
+            self.uris.reidentify_text,
+            request_object,
+            idempotent=True,
+            timeout=timeout,
         )
 
-    def ner_text(self, request_object):
-        return self.make_request(self.request_type, self.uris.ner_text, request_object)
+    def ner_text(self, request_object, *, stream: bool = False, timeout=None):
+        return self.make_request(
+            self.request_type,
+            self.uris.ner_text,
+            request_object,
+            stream,
+            idempotent=True,
+            timeout=timeout,
+        )
 
-    def analyze_text(self, request_object):
+    def analyze_text(self, request_object, *, stream: bool = False, timeout=None):
         return self.make_request(
-            self.request_type, self.uris.analyze_text, request_object
+            self.request_type,
+            self.uris.analyze_text,
+            request_object,
+            stream,
+            idempotent=True,
+            timeout=timeout,
         )
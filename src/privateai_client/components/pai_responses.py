@@ -1,19 +1,48 @@
+import json
+import os
+from typing import BinaryIO, List, Optional, Union
+
 from requests import HTTPError, Response
 
+from .json_codec import JSONCodec
 from .request_objects import Entity, ReidentifyTextRequest
+from .streaming import decode_base64_field
+
+# Size of the pieces a base64 file is decoded in when it is saved
+SAVE_CHUNK_SIZE = 64 * 1024
+# Size of the pieces a streamed body is read and decompressed in
+READ_CHUNK_SIZE = 256 * 1024
 
 
 class BaseResponse:
-    def __init__(self, response_object: Response, json_response: bool = True):
+    # Whether a streamed json body is decompressed in chunks and parsed once, without keeping
+    # the raw content. Responses holding a file keep it so the file can still be saved.
+    _parse_streamed_body = True
+
+    def __init__(
+        self,
+        response_object: Response,
+        json_response: bool = True,
+        codec: Optional[JSONCodec] = None,
+    ):
         self._response = response_object
         # Should be json or text
         self._json_response = json_response
+        self._codec = codec
+        # The body is parsed once, on first access
+        self._body = None
         if not self.response.ok:
             message = (
                 f"The request returned with a {self.response.status_code} {self.reason}"
             )
-            if self.response.status_code == 400:
-                message += f" -- {self.body}"
+            try:
+                if self.response.status_code == 400:
+                    message += f" -- {self.body}"
+            finally:
+                # Returns the connection of a streamed response to the pool, as its body is
+                # otherwise never read
+                if self.response._content is False:
+                    self.response.close()
             raise HTTPError(message)
 
     def __call__(self):
@@ -41,16 +70,70 @@ class BaseResponse:
 
     @property
     def body(self):
-        if self._json_response:
-            return self().json()
-        else:
-            return self().text
+        if self._body is None:
+            response = self()
+            if (
+                self._json_response
+                and self._parse_streamed_body
+                and response._content is False
+            ):
+                self._body = self._read_streamed_body()
+            elif self._json_response and self._codec is not None:
+                self._body = self._codec.loads(self().content)
+            elif self._json_response:
+                self._body = self().json()
+            else:
+                self._body = self().text
+        return self._body
+
+    def _read_streamed_body(self):
+        # The body is decompressed piece by piece into one buffer, instead of a list of
+        # pieces joined into the content, and released once it is parsed
+        response = self()
+        content = bytearray()
+        try:
+            for chunk in response.iter_content(READ_CHUNK_SIZE):
+                content += chunk
+        finally:
+            response.close()
+        if self._codec is not None:
+            return self._codec.loads(content)
+        return json.loads(content)
 
     @response.setter
     def response(self, new_response):
         if type(new_response) is not Response:
             raise ValueError("response must be a Response object")
         self._response = new_response
+        self._body = None
+
+    def _save_base64_entry(
+        self,
+        name: str,
+        file: Union[str, os.PathLike, BinaryIO],
+        chunk_size: int = SAVE_CHUNK_SIZE,
+    ) -> int:
+        # Decodes a base64 string in the body to file, without building the whole string
+        response = self()
+        streamed = response._content is False
+        if streamed:
+            chunks = response.iter_content(chunk_size)
+        else:
+            content = response.content
+            chunks = (
+                content[i : i + chunk_size] for i in range(0, len(content), chunk_size)
+            )
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "wb") as output:
+                written, rest = decode_base64_field(chunks, name, output)
+        else:
+            written, rest = decode_base64_field(chunks, name, file)
+        if streamed and self._body is None:
+            # Keep the rest of the body, without the decoded string, for the other properties
+            self._body = (
+                self._codec.loads(rest) if self._codec is not None else json.loads(rest)
+            )
+        return written
 
     def get_attribute_entries(self, name):
         # Used for any nested data in the response body
@@ -58,19 +141,23 @@ class BaseResponse:
             raise ValueError("get_attribute_entries needs a response of type json")
         body = self.body
         if type(body) is list:
-            return [row.get(name) for row in self().json()]
+            return [row.get(name) for row in body]
         elif type(body) is dict:
             return body.get(name)
 
 
 class MetricsResponse(BaseResponse):
-    def __init__(self, response_object: Response = None):
-        super(MetricsResponse, self).__init__(response_object, False)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(MetricsResponse, self).__init__(response_object, False, codec)
 
 
 class VersionResponse(BaseResponse):
-    def __init__(self, response_object: Response = None):
-        super(VersionResponse, self).__init__(response_object, True)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(VersionResponse, self).__init__(response_object, True, codec)
 
     @property
     def app_version(self):
@@ -78,8 +165,10 @@ class VersionResponse(BaseResponse):
 
 
 class DiagnosticResponse(BaseResponse):
-    def __init__(self, response_object: Response = None):
-        super(DiagnosticResponse, self).__init__(response_object, True)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(DiagnosticResponse, self).__init__(response_object, True, codec)
 
     @property
     def get_platform(self):
@@ -103,8 +192,10 @@ class DiagnosticResponse(BaseResponse):
 
 
 class DemiTextResponse(BaseResponse):
-    def __init__(self, response_object: Response = None):
-        super(DemiTextResponse, self).__init__(response_object, True)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(DemiTextResponse, self).__init__(response_object, True, codec)
 
     @property
     def processed_text(self):
@@ -148,8 +239,10 @@ class DemiTextResponse(BaseResponse):
 
 
 class NerTextResponse(BaseResponse):
-    def __init__(self, response_object: Response = None):
-        super(NerTextResponse, self).__init__(response_object, True)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(NerTextResponse, self).__init__(response_object, True, codec)
 
     @property
     def entities(self):
@@ -169,8 +262,10 @@ class NerTextResponse(BaseResponse):
 
 
 class AnalyzeTextResponse(NerTextResponse):
-    def __init__(self, response_object: Response = None):
-        super(AnalyzeTextResponse, self).__init__(response_object)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(AnalyzeTextResponse, self).__init__(response_object, codec=codec)
 
     @property
     def analysis_result(self):
@@ -178,8 +273,10 @@ class AnalyzeTextResponse(NerTextResponse):
 
 
 class TextResponse(DemiTextResponse):
-    def __init__(self, response_object: Response = None):
-        super(TextResponse, self).__init__(response_object)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(TextResponse, self).__init__(response_object, codec=codec)
 
     @property
     def characters_processed(self):
@@ -190,9 +287,39 @@ class TextResponse(DemiTextResponse):
         return self.get_attribute_entries("languages_detected")
 
 
+class BatchedTextResponse(TextResponse):
+    """
+    Merges the TextResponses of several process text requests into one response,
+    with entries in the order the requests were sent
+    """
+
+    def __init__(self, responses: List[TextResponse]):
+        # The individual responses were already checked for errors
+        self._responses = responses
+        self._json_response = True
+        self._response = responses[-1].response
+        self._body = None
+
+    @property
+    def responses(self):
+        return self._responses
+
+    @property
+    def ok(self):
+        return all(response.ok for response in self._responses)
+
+    @property
+    def body(self):
+        if self._body is None:
+            self._body = [row for response in self._responses for row in response.body]
+        return self._body
+
+
 class FilesUriResponse(DemiTextResponse):
-    def __init__(self, response_object: Response = None):
-        super(FilesUriResponse, self).__init__(response_object)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(FilesUriResponse, self).__init__(response_object, codec=codec)
 
     @property
     def result_uri(self):
@@ -200,23 +327,57 @@ class FilesUriResponse(DemiTextResponse):
 
 
 class FilesBase64Response(DemiTextResponse):
-    def __init__(self, response_object: Response = None):
-        super(FilesBase64Response, self).__init__(response_object)
+    _parse_streamed_body = False
+
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(FilesBase64Response, self).__init__(response_object, codec=codec)
 
     @property
     def processed_file(self):
         return self.get_attribute_entries("processed_file")
 
+    def save_processed_file(
+        self,
+        file: Union[str, os.PathLike, BinaryIO],
+        chunk_size: int = SAVE_CHUNK_SIZE,
+    ) -> int:
+        """
+        Decodes processed_file and writes it to a path or a writable binary buffer, piece by piece.
+        With a streamed response the file goes straight from the connection to disk, after which
+        processed_file is empty but the other properties are still available.
+        Returns the number of bytes written.
+        """
+        return self._save_base64_entry("processed_file", file, chunk_size)
+
 
 class BleepResponse(BaseResponse):
-    def __init__(self, response_object: Response = None):
-        super(BleepResponse, self).__init__(response_object, True)
+    _parse_streamed_body = False
+
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(BleepResponse, self).__init__(response_object, True, codec)
 
     @property
     def bleeped_file(self):
         return self.get_attribute_entries("bleeped_file")
 
+    def save_bleeped_file(
+        self,
+        file: Union[str, os.PathLike, BinaryIO],
+        chunk_size: int = SAVE_CHUNK_SIZE,
+    ) -> int:
+        """
+        Decodes bleeped_file and writes it to a path or a writable binary buffer, piece by piece.
+        Returns the number of bytes written.
+        """
+        return self._save_base64_entry("bleeped_file", file, chunk_size)
+
 
 class ReidentifyTextResponse(BaseResponse):
-    def __init__(self, response_object: Response = None):
-        super(ReidentifyTextResponse, self).__init__(response_object, True)
+    def __init__(
+        self, response_object: Response = None, codec: Optional[JSONCodec] = None
+    ):
+        super(ReidentifyTextResponse, self).__init__(response_object, True, codec)
@@ -1,28 +1,69 @@
 import logging
 
+from .unix_socket import UNIX_SOCKET_SCHEME, unix_socket_url
+
 
 class PAIURIs:
     def __init__(self, url=None, scheme=None, host=None, port=None, **kwargs):
-        if url:
-            self._pai_uri = url
+        # A list of urls is accepted for a fleet of containers. The uris below are built
+        # for the first one, see for_base for sending requests to the others.
+        if isinstance(url, (list, tuple)):
+            if not url:
+                raise ValueError("url must contain at least one url")
+            self._pai_uris = [self._from_url(x) for x in url]
+            self._pai_uri = self._pai_uris[0]
+        elif url:
+            self._pai_uri = self._from_url(url)
+            self._pai_uris = [self._pai_uri]
         elif scheme and host:
-            self.valid_schemes = ["http", "https"]
+            self.valid_schemes = ["http", "https", "unix"]
             scheme = scheme.split("://")[0]
             if scheme not in self.valid_schemes:
                 raise ValueError(
                     f"Scheme must be one of the following: {', '.join(self.valid_schemes)}"
                 )
-            port = f":{port}" if port else ""
-            self._pai_uri = f"{scheme}://{host}{port}"
+            if scheme == "unix":
+                # The host is the path of the socket
+                self._pai_uri = unix_socket_url(host)
+            else:
+                port = f":{port}" if port else ""
+                self._pai_uri = f"{scheme}://{host}{port}"
+            self._pai_uris = [self._pai_uri]
         else:
             raise ValueError(
                 "PAIClient needs either a url, or a scheme and host to initialize. You can find more information on which url to use here: https://docs.private-ai.com/thin-client/"
             )
 
+    @staticmethod
+    def _from_url(url: str) -> str:
+        # unix:///var/run/pai.sock is a container listening on a unix domain socket
+        if url.startswith("unix://"):
+            return unix_socket_url(url[len("unix://") :])
+        return url
+
     @property
     def pai_uri(self):
         return self._pai_uri
 
+    @property
+    def pai_uris(self):
+        return self._pai_uris
+
+    @property
+    def unix_socket(self) -> bool:
+        """
+        Whether any of the containers listens on a unix domain socket
+        """
+        return any(uri.startswith(f"{UNIX_SOCKET_SCHEME}://") for uri in self._pai_uris)
+
+    def for_base(self, uri: str, base_uri: str) -> str:
+        """
+        Returns uri, built for pai_uri, for the container at base_uri instead
+        """
+        if base_uri == self.pai_uri or not uri.startswith(self.pai_uri.rstrip("/")):
+            return uri
+        return self._create_uri(base_uri, uri[len(self.pai_uri.rstrip("/")) :])
+
     @property
     def bleep(self):
         return self._create_uri(self.pai_uri, "bleep")
@@ -1,27 +1,50 @@
-import inspect
+import os
 from typing import List, Optional, Union
 
+from .streaming import Base64FileReader
+
 
 class BaseRequestObject:
+    """
+    Request objects keep their attributes in __slots__. The attributes are serialized by to_dict
+    in the order of the slots, with a leading underscore removed from the key, and left out when
+    they are unset, None, an empty list or an empty dict.
+    """
+
+    __slots__ = ()
+    # (attribute, key) pairs, set for every subclass from the slots of its class hierarchy
+    _fields: tuple = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(
+            (slot, slot[1:] if slot[0] == "_" else slot)
+            for klass in reversed(cls.__mro__)
+            for slot in klass.__dict__.get("__slots__", ())
+        )
+
     def to_dict(self):
-        dict_obj = dict()
-        for key, value in self.__dict__.items():
-            if value in [None, [], {}]:
+        dict_obj = {}
+        for attr, name in self._fields:
+            value = getattr(self, attr, None)
+            if value is None:
                 continue
-            name = key if key[0] != "_" else key[1:]
-            if self._issubclass(value):
+            value_type = type(value)
+            if value_type is list:
+                if value:
+                    dict_obj[name] = [
+                        row.to_dict() if isinstance(row, BaseRequestObject) else row
+                        for row in value
+                    ]
+            elif value_type is dict:
+                if value:
+                    dict_obj[name] = value
+            elif isinstance(value, BaseRequestObject):
                 dict_obj[name] = value.to_dict()
-            elif type(value) is list:
-                dict_obj[name] = [
-                    row.to_dict() if self._issubclass(row) else row for row in value
-                ]
-            elif not key.startswith("__") and not callable(key):
+            else:
                 dict_obj[name] = value
         return dict_obj
 
-    def _issubclass(self, obj):
-        return inspect.isclass(type(obj)) and issubclass(type(obj), BaseRequestObject)
-
     def __call__(self):
         return self.to_dict()
 
@@ -31,6 +54,13 @@ class BaseRequestObject:
 
 
 class AudioOptions(BaseRequestObject):
+    __slots__ = (
+        "_bleep_start_padding",
+        "_bleep_end_padding",
+        "_bleep_frequency",
+        "_bleep_gain",
+    )
+
     default_bleep_start_padding: float = 0.5
     default_bleep_end_padding: float = 0.5
     default_bleep_frequency: Optional[int] = None
@@ -131,6 +161,11 @@ class AudioOptions(BaseRequestObject):
 
 
 class ImageOptions(BaseRequestObject):
+    __slots__ = (
+        "_masking_method",
+        "_palette",
+    )
+
     default_masking_method: str = "blur"
     default_palette: bool = False
     VALID_MASK_MODES = ["blur", "blackbox"]
@@ -188,6 +223,11 @@ class ImageOptions(BaseRequestObject):
 
 
 class Entity(BaseRequestObject):
+    __slots__ = (
+        "_processed_text",
+        "_text",
+    )
+
     def __init__(self, processed_text: str, text: str):
         if self._processed_text_validator(processed_text):
             self._processed_text = processed_text
@@ -235,6 +275,11 @@ class Entity(BaseRequestObject):
 
 
 class EntityTypeSelector(BaseRequestObject):
+    __slots__ = (
+        "_type",
+        "value",
+    )
+
     valid_types = ["DISABLE", "ENABLE"]
 
     def __init__(self, type: str, value: List[str] = []):
@@ -275,6 +320,11 @@ class EntityTypeSelector(BaseRequestObject):
 
 
 class File(BaseRequestObject):
+    __slots__ = (
+        "_data",
+        "_content_type",
+    )
+
     valid_content_types = [
         "application/json",
         "application/msword",
@@ -304,12 +354,20 @@ class File(BaseRequestObject):
         "audio/x-wav",
     ]
 
-    def __init__(self, data: str, content_type: str):
+    def __init__(self, data: Union[str, Base64FileReader], content_type: str):
         if self._data_validator(data):
             self._data = data
         if self._content_type_validator(content_type):
             self._content_type = content_type
 
+    @classmethod
+    def from_path(cls, path: Union[str, os.PathLike], content_type: str):
+        """
+        Creates a File that is read from disk and base64 encoded in chunks while the request is sent,
+        instead of holding the whole encoded file in memory
+        """
+        return cls(Base64FileReader(path), content_type)
+
     @property
     def data(self):
         return self._data
@@ -329,7 +387,7 @@ class File(BaseRequestObject):
             self._content_type = var
 
     def _data_validator(self, var):
-        if type(var) is not str:
+        if type(var) is not str and not isinstance(var, Base64FileReader):
             raise TypeError("data must be string-type")
         return True
 
@@ -349,6 +407,13 @@ class File(BaseRequestObject):
 
 
 class FilterSelector(BaseRequestObject):
+    __slots__ = (
+        "_type",
+        "_pattern",
+        "_entity_type",
+        "_threshold",
+    )
+
     valid_types = ["ALLOW", "BLOCK", "ALLOW_TEXT"]
     default_threshold = 1
 
@@ -446,6 +511,12 @@ class FilterSelector(BaseRequestObject):
 
 
 class PDFOptions(BaseRequestObject):
+    __slots__ = (
+        "_density",
+        "_max_resolution",
+        "_enable_pdf_text_layer",
+    )
+
     default_density = 200
     default_max_resolution = 3000
     default_enable_pdf_text_layer: bool = True
@@ -513,6 +584,8 @@ class PDFOptions(BaseRequestObject):
 
 
 class OCROptions(BaseRequestObject):
+    __slots__ = ("_ocr_system",)
+
     default_ocr_system = "paddleocr"
     VALID_OCR_SYSTEM = [
         "azure_computer_vision",
@@ -549,6 +622,11 @@ class OCROptions(BaseRequestObject):
 
 
 class ObjectEntityTypeSelector(BaseRequestObject):
+    __slots__ = (
+        "_type",
+        "value",
+    )
+
     valid_types = ["DISABLE", "ENABLE"]
     valid_values = {"FACE", "LICENSE_PLATE", "LOGO", "SIGNATURE"}
 
@@ -593,7 +671,22 @@ class ObjectEntityTypeSelector(BaseRequestObject):
             )
 
 
-class ProcessedMarkerText(BaseRequestObject):
+class _ProcessedTextFields(BaseRequestObject):
+    # ProcessedText inherits from all three processed text classes, so their
+    # attributes share one set of slots
+    __slots__ = (
+        "_type",
+        "_pattern",
+        "_marker_language",
+        "_coreference_resolution",
+        "_mask_character",
+        "_synthetic_entity_accuracy",
+    )
+
+
+class ProcessedMarkerText(_ProcessedTextFields):
+    __slots__ = ()
+
     attributes = ["_pattern"]
     default_pattern = "[UNIQUE_NUMBERED_ENTITY_TYPE]"
     valid_patterns = [
@@ -674,7 +767,9 @@ class ProcessedMarkerText(BaseRequestObject):
         return True
 
 
-class ProcessedMaskText(BaseRequestObject):
+class ProcessedMaskText(_ProcessedTextFields):
+    __slots__ = ()
+
     attributes = ["_mask_character"]
 
     def __init__(self, mask_character: str = "#"):
@@ -703,7 +798,9 @@ class ProcessedMaskText(BaseRequestObject):
         return True
 
 
-class ProcessedSyntheticText(BaseRequestObject):
+class ProcessedSyntheticText(_ProcessedTextFields):
+    __slots__ = ()
+
     attributes = ["_synthetic_entity_accuracy"]
     valid_synthetic_accuracy_values = ["standard", "standard_multilingual"]
 
@@ -734,6 +831,8 @@ class ProcessedSyntheticText(BaseRequestObject):
 
 
 class ProcessedText(ProcessedMarkerText, ProcessedMaskText, ProcessedSyntheticText):
+    __slots__ = ()
+
     default_type = "MARKER"
     valid_types = ["MARKER", "MASK", "SYNTHETIC"]
 
@@ -769,6 +868,11 @@ class ProcessedText(ProcessedMarkerText, ProcessedMaskText, ProcessedSyntheticTe
 
 
 class Timestamp(BaseRequestObject):
+    __slots__ = (
+        "_start",
+        "_end",
+    )
+
     def __init__(self, start, end):
         if self._start_validator(start):
             self._start = start
@@ -812,6 +916,14 @@ class Timestamp(BaseRequestObject):
 
 
 class EntityDetection(BaseRequestObject):
+    __slots__ = (
+        "_accuracy",
+        "entity_types",
+        "filter",
+        "_return_entity",
+        "_enable_non_max_suppression",
+    )
+
     default_accuracy = "high_automatic"
     default_return_entity = True
     valid_accuracies = [
@@ -926,6 +1038,8 @@ class EntityDetection(BaseRequestObject):
 
 
 class ObjectEntityDetection(BaseRequestObject):
+    __slots__ = ("object_entity_types",)
+
     def __init__(self, object_entity_types: List[ObjectEntityTypeSelector] = []):
         if self._object_entity_types_validator(object_entity_types):
             self.object_entity_types = object_entity_types
@@ -960,6 +1074,11 @@ class ObjectEntityDetection(BaseRequestObject):
 
 
 class RelationDetection(BaseRequestObject):
+    __slots__ = (
+        "_coreference_resolution",
+        "_enable_relation_extraction",
+    )
+
     default_coreference_resolution = None
     valid_coreference_resolutions = ["heuristics", "model_prediction", "combined"]
 
@@ -1025,6 +1144,14 @@ class RelationDetection(BaseRequestObject):
 
 
 class ProcessTextRequest(BaseRequestObject):
+    __slots__ = (
+        "text",
+        "link_batch",
+        "entity_detection",
+        "processed_text",
+        "project_id",
+    )
+
     def __init__(
         self,
         text: List[str],
@@ -1058,6 +1185,13 @@ class ProcessTextRequest(BaseRequestObject):
 
 
 class NerTextRequest(BaseRequestObject):
+    __slots__ = (
+        "text",
+        "link_batch",
+        "entity_detection",
+        "project_id",
+    )
+
     def __init__(
         self,
         text: List[str],
@@ -1087,6 +1221,15 @@ class NerTextRequest(BaseRequestObject):
 
 
 class AnalyzeTextRequest(BaseRequestObject):
+    __slots__ = (
+        "text",
+        "locale",
+        "link_batch",
+        "entity_detection",
+        "project_id",
+        "relation_detection",
+    )
+
     def __init__(
         self,
         text: List[str],
@@ -1123,6 +1266,17 @@ class AnalyzeTextRequest(BaseRequestObject):
 
 
 class ProcessFileUriRequest(BaseRequestObject):
+    __slots__ = (
+        "uri",
+        "entity_detection",
+        "object_entity_detection",
+        "pdf_options",
+        "audio_options",
+        "image_options",
+        "project_id",
+        "ocr_options",
+    )
+
     def __init__(
         self,
         uri: str,
@@ -1170,6 +1324,17 @@ class ProcessFileUriRequest(BaseRequestObject):
 
 
 class ProcessFileBase64Request(BaseRequestObject):
+    __slots__ = (
+        "file",
+        "entity_detection",
+        "object_entity_detection",
+        "pdf_options",
+        "audio_options",
+        "image_options",
+        "project_id",
+        "ocr_options",
+    )
+
     def __init__(
         self,
         file: File,
@@ -1219,6 +1384,13 @@ class ProcessFileBase64Request(BaseRequestObject):
 
 
 class BleepRequest(BaseRequestObject):
+    __slots__ = (
+        "file",
+        "timestamps",
+        "bleep_frequency",
+        "bleep_gain",
+    )
+
     def __init__(
         self,
         file: File,
@@ -1252,6 +1424,13 @@ class BleepRequest(BaseRequestObject):
 
 
 class ReidentifyTextRequest(BaseRequestObject):
+    __slots__ = (
+        "reidentify_sensitive_fields",
+        "processed_text",
+        "entities",
+        "model",
+    )
+
     def __init__(
         self,
         processed_text: List[str] = [],
@@ -0,0 +1,90 @@
+import copy
+import uuid
+from typing import List, Union
+
+from .json_codec import JSONCodec
+from .request_objects import AnalyzeTextRequest, NerTextRequest, ProcessTextRequest
+
+TemplatableRequest = Union[ProcessTextRequest, NerTextRequest, AnalyzeTextRequest]
+
+
+class RequestTemplate:
+    """
+    The parts of a ProcessTextRequest, NerTextRequest or AnalyzeTextRequest that stay the same
+    from call to call, such as entity_detection and processed_text. They are serialized once per
+    codec and only the text is encoded for each request, with template.with_text(texts).
+
+    The template is a copy of the request when it is created: later changes to the request
+    object do not affect it. The text of the request is ignored.
+    """
+
+    def __init__(self, request_object: TemplatableRequest):
+        if type(request_object) not in (
+            ProcessTextRequest,
+            NerTextRequest,
+            AnalyzeTextRequest,
+        ):
+            raise ValueError(
+                "request_object can only be a ProcessTextRequest, NerTextRequest or AnalyzeTextRequest object"
+            )
+        self.request_class = type(request_object)
+        # The text is the first field of every request class, and is left out by to_dict when empty
+        fields = {"text": None, **request_object.to_dict()}
+        fields["text"] = None
+        self._fields = copy.deepcopy(fields)
+        self._encoded: dict = {}
+
+    def __repr__(self):
+        return f"RequestTemplate({self.request_class.__name__})"
+
+    def with_text(self, text: List[str]) -> "TemplatedRequest":
+        """
+        Returns a request made of this template and text
+        """
+        return TemplatedRequest(self, text)
+
+    def encoded(self, codec: JSONCodec) -> tuple:
+        """
+        Returns the bytes codec encodes before and after the text of a request
+        """
+        key = type(codec)
+        if key not in self._encoded:
+            placeholder = f"pai-text-{uuid.uuid4().hex}"
+            fields = {**self._fields, "text": placeholder}
+            prefix, suffix = codec.dumps(fields).split(f'"{placeholder}"'.encode())
+            self._encoded[key] = prefix, suffix
+        return self._encoded[key]
+
+    def to_dict(self, text: List[str]) -> dict:
+        return {
+            key: text if key == "text" else copy.deepcopy(value)
+            for key, value in self._fields.items()
+        }
+
+
+class TemplatedRequest:
+    """
+    A request made of a RequestTemplate and the text to send with it
+    """
+
+    __slots__ = ("template", "text")
+
+    def __init__(self, template: RequestTemplate, text: List[str]):
+        if type(text) is not list:
+            raise TypeError(f"{text} is not valid. text can only be a list")
+        self.template = template
+        self.text = text
+
+    @property
+    def request_class(self):
+        return self.template.request_class
+
+    def encode(self, codec: JSONCodec) -> bytes:
+        prefix, suffix = self.template.encoded(codec)
+        return prefix + codec.dumps(self.text) + suffix
+
+    def to_dict(self) -> dict:
+        return self.template.to_dict(self.text)
+
+    def __call__(self):
+        return self.to_dict()
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from .circuit_breaker import CircuitOpenError
+
+
+class RetryPolicy:
+    """
+    Decides which failed requests are sent again and how long to wait before each attempt.
+
+    max_attempts is the total number of attempts, including the first. The wait before retry n
+    is backoff_base * 2 ** (n - 1) seconds, capped at backoff_max, and with jitter a random
+    duration between zero and that. A Retry-After header sent by the server is used instead
+    when respect_retry_after is set, also capped at backoff_max.
+
+    Idempotent requests, i.e. GET requests and the text and base64 file processing endpoints,
+    are retried on retry_statuses and on connection errors and timeouts. Other requests, such as
+    process_files_uri which writes files on the container, are only retried on
+    non_idempotent_statuses, with which the server signals the request was not processed, and
+    when the request was never sent because the connection was refused or timed out or a
+    circuit breaker is open.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        jitter: bool = True,
+        retry_statuses: Iterable[int] = (429, 502, 503, 504),
+        non_idempotent_statuses: Iterable[int] = (429, 503),
+        respect_retry_after: bool = True,
+    ):
+        if not isinstance(max_attempts, int) or max_attempts < 1:
+            raise ValueError(
+                "Invalid value for max_attempts. Accepted value is a positive integer."
+            )
+        if backoff_base < 0 or backoff_max < 0:
+            raise ValueError(
+                "Invalid value for backoff_base or backoff_max. Accepted values are non-negative numbers."
+            )
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.non_idempotent_statuses = frozenset(non_idempotent_statuses)
+        self.respect_retry_after = respect_retry_after
+
+    def is_retryable(
+        self,
+        idempotent: bool,
+        response: Optional[requests.Response] = None,
+        error: Optional[Exception] = None,
+    ) -> bool:
+        if response is not None:
+            statuses = (
+                self.retry_statuses if idempotent else self.non_idempotent_statuses
+            )
+            return response.status_code in statuses
+        if isinstance(
+            error, (requests.ConnectTimeout, CircuitOpenError)
+        ) or _connection_failed(error):
+            # The request was never sent
+            return True
+        return idempotent and isinstance(
+            error, (requests.ConnectionError, requests.Timeout)
+        )
+
+    def delay(self, attempt: int, response: Optional[requests.Response] = None):
+        """
+        Returns the number of seconds to wait after the given attempt failed
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_base * 2 ** (attempt - 1), self.backoff_max)
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+def _connection_failed(error: Optional[Exception]) -> bool:
+    # requests raises a plain ConnectionError when the connection is refused, wrapping urllib3's
+    # NewConnectionError in a MaxRetryError
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After is either a number of seconds or an HTTP date
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryStats:
+    """
+    Counts the retries made by a client. retried counts the retries by status code,
+    or by exception name for connection errors and timeouts, and exhausted the requests
+    that still failed after their last attempt.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.exhausted = 0
+        self.retried: Counter = Counter()
+
+    def record_retry(self, reason):
+        with self._lock:
+            self.retries += 1
+            self.retried[reason] += 1
+
+    def record_exhausted(self):
+        with self._lock:
+            self.exhausted += 1
+
+    def reset(self):
+        with self._lock:
+            self.retries = 0
+            self.exhausted = 0
+            self.retried = Counter()
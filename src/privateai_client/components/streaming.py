@@ -0,0 +1,188 @@
+import base64
+import binascii
+import os
+import re
+import uuid
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Union
+
+from .json_codec import JSONCodec
+
+# Raw bytes read per chunk. A multiple of 3 so every chunk encodes to base64 without padding
+DEFAULT_CHUNK_SIZE = 3 * 64 * 1024
+
+
+class Base64FileReader:
+    """
+    A file on disk that is base64 encoded chunk by chunk while a request is being sent,
+    so the whole file or its encoding is never held in memory
+    """
+
+    def __init__(
+        self, path: Union[str, os.PathLike], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"{path} is not a file")
+        if chunk_size < 3 or chunk_size % 3:
+            raise ValueError("chunk_size must be a positive multiple of 3")
+        self._path = path
+        self._chunk_size = chunk_size
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def encoded_length(self) -> int:
+        return 4 * -(-os.path.getsize(self._path) // 3)
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        with open(self._path, "rb") as f:
+            while True:
+                chunk = f.read(self._chunk_size)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk)
+
+    def read_all(self) -> str:
+        return b"".join(self.iter_chunks()).decode("ascii")
+
+
+class StreamingJSONBody:
+    """
+    A JSON request body made of encoded JSON fragments and base64 file streams.
+    It is read lazily by the HTTP library and reports its length up front,
+    so the request is sent with a Content-Length instead of chunked encoding.
+    """
+
+    def __init__(self, parts: List[Union[bytes, Base64FileReader]]):
+        self._parts = parts
+        self._length = sum(
+            len(part) if isinstance(part, bytes) else part.encoded_length
+            for part in parts
+        )
+        self.rewind()
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+            else:
+                yield from part.iter_chunks()
+
+    def rewind(self):
+        # Lets the body be sent again, e.g. when a request is retried
+        self._chunks = None
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        if self._chunks is None:
+            self._chunks = iter(self)
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def _replace_streams(obj, streams: dict):
+    # Swaps Base64FileReaders for unique tokens, copying only the containers that hold one
+    if isinstance(obj, Base64FileReader):
+        token = f"pai-stream-{uuid.uuid4().hex}"
+        streams[token] = obj
+        return token
+    if isinstance(obj, (dict, list)):
+        replaced = None
+        items = obj.items() if isinstance(obj, dict) else enumerate(obj)
+        for key, value in items:
+            if isinstance(value, (dict, list, Base64FileReader)):
+                new_value = _replace_streams(value, streams)
+                if new_value is not value:
+                    if replaced is None:
+                        replaced = obj.copy()
+                    replaced[key] = new_value
+        return obj if replaced is None else replaced
+    return obj
+
+
+def encode_payload(payload, codec: JSONCodec) -> Union[bytes, StreamingJSONBody]:
+    """
+    Encodes a request payload with codec. Payloads that contain Base64FileReaders are
+    returned as a StreamingJSONBody where each reader is streamed in place of its data.
+    Payloads that are already encoded, such as those of a TemplatedRequest, are returned unchanged.
+    """
+    if isinstance(payload, bytes):
+        return payload
+    streams = {}
+    replaced = _replace_streams(payload, streams)
+    encoded = codec.dumps(replaced)
+    if not streams:
+        return encoded
+
+    parts = [encoded]
+    for token, stream in streams.items():
+        token = token.encode("ascii")
+        for i, part in enumerate(parts):
+            if isinstance(part, bytes) and token in part:
+                head, tail = part.split(token, 1)
+                parts[i : i + 1] = [head, stream, tail]
+                break
+    return StreamingJSONBody(parts)
+
+
+def decode_base64_field(
+    chunks: Iterable[bytes], field: str, output: BinaryIO
+) -> Tuple[int, bytes]:
+    """
+    Scans a JSON document arriving in chunks for the string value of field and writes it,
+    base64 decoded, to output as it arrives. Only a few bytes of the value are held at a time.
+
+    Returns the number of bytes written and the rest of the document with the value emptied,
+    which can still be parsed for the other fields.
+    """
+    key = re.compile(rb'"' + re.escape(field.encode("ascii")) + rb'"\s*:\s*"')
+    head = bytearray()
+    tail = bytearray()
+    pending = b""
+    written = 0
+    state = "head"
+    for chunk in chunks:
+        if state == "head":
+            # Only rescan the end of the previous chunk, in case the key straddles chunks
+            search_from = max(0, len(head) - len(field) - 64)
+            head += chunk
+            match = key.search(head, search_from)
+            if match is None:
+                continue
+            chunk = bytes(head[match.end() :])
+            del head[match.end() :]
+            state = "value"
+        if state == "value":
+            end = chunk.find(b'"')
+            value = chunk if end < 0 else chunk[:end]
+            # Some JSON encoders escape the '/' of the base64 alphabet
+            data = pending + value.replace(b"\\", b"")
+            usable = len(data) - len(data) % 4
+            try:
+                decoded = base64.b64decode(data[:usable], validate=True)
+            except binascii.Error:
+                raise ValueError(f"{field} does not contain valid base64 data")
+            output.write(decoded)
+            written += len(decoded)
+            pending = data[usable:]
+            if end < 0:
+                continue
+            tail += chunk[end:]
+            state = "tail"
+        else:
+            tail += chunk
+    if state != "tail" or pending:
+        raise ValueError(f"The response does not contain a complete {field} string")
+    return written, bytes(head + tail)
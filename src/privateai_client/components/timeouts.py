@@ -0,0 +1,89 @@
+import time
+from typing import Optional, Tuple, Union
+
+import requests
+
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    Raised when a request, including its retries, runs past its deadline
+    """
+
+
+class Timeout:
+    """
+    Bounds how long a request may take, in seconds. connect bounds establishing a connection and
+    read the wait for each piece of the response. deadline bounds the whole call, including
+    retries and the waits between them: each attempt's connect and read timeouts are lowered
+    to the time left. None means no limit.
+    """
+
+    def __init__(
+        self,
+        connect: Optional[float] = None,
+        read: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ):
+        for name, value in [
+            ("connect", connect),
+            ("read", read),
+            ("deadline", deadline),
+        ]:
+            # bool is an int, but True is never meant as a one second timeout
+            if value is not None and (
+                not isinstance(value, (int, float))
+                or isinstance(value, bool)
+                or value <= 0
+            ):
+                raise ValueError(
+                    f"Invalid value for {name}. Accepted value is a positive number or None."
+                )
+        self.connect = connect
+        self.read = read
+        self.deadline = deadline
+
+    def __repr__(self):
+        return f"Timeout(connect={self.connect}, read={self.read}, deadline={self.deadline})"
+
+    def start(self) -> Optional[float]:
+        """
+        Returns the time.monotonic() value the deadline of a call starting now falls on
+        """
+        return None if self.deadline is None else time.monotonic() + self.deadline
+
+    def for_attempt(
+        self, deadline_at: Optional[float] = None
+    ) -> Union[Tuple[Optional[float], Optional[float]], None]:
+        """
+        Returns the timeout to pass to requests for an attempt of a call ending at deadline_at
+        """
+        connect, read = self.connect, self.read
+        if deadline_at is not None:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"The deadline of {self.deadline}s was exceeded")
+            connect = remaining if connect is None else min(connect, remaining)
+            read = remaining if read is None else min(read, remaining)
+        if connect is None and read is None:
+            return None
+        return connect, read
+
+
+def get_timeout(
+    timeout: Union[Timeout, float, Tuple[float, float], None] = None
+) -> Timeout:
+    """
+    Returns a Timeout from a number, used for both connect and read as in requests,
+    a (connect, read) tuple or None. Timeout instances are returned unchanged.
+    """
+    if isinstance(timeout, Timeout):
+        return timeout
+    if timeout is None:
+        return Timeout()
+    if isinstance(timeout, tuple) and len(timeout) == 2:
+        return Timeout(connect=timeout[0], read=timeout[1])
+    if isinstance(timeout, (int, float)) and not isinstance(timeout, bool):
+        return Timeout(connect=timeout, read=timeout)
+    raise ValueError(
+        f"{timeout} is not valid. timeout can only be a Timeout, a number, a (connect, read) tuple or None"
+    )
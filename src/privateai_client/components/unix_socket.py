@@ -0,0 +1,92 @@
+import socket
+from urllib.parse import quote, unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.poolmanager import SSL_KEYWORDS
+
+# urls of containers listening on a unix domain socket, with the percent-encoded path of
+# the socket as host, e.g. http+unix://%2Fvar%2Frun%2Fpai.sock/process/text
+UNIX_SOCKET_SCHEME = "http+unix"
+
+
+def unix_socket_url(path: str) -> str:
+    """
+    Returns the base url of a container listening on the unix domain socket at path
+    """
+    if not path.startswith("/"):
+        raise ValueError(
+            "Invalid value for unix socket path. Accepted value is an absolute path."
+        )
+    return f"{UNIX_SOCKET_SCHEME}://{quote(path, safe='')}"
+
+
+class _UnixSocketConnection(HTTPConnection):
+    def __init__(self, *args, socket_path: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Otherwise the timeout is urllib3's default sentinel and the socket's default applies
+        if self.timeout is None or isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except socket.timeout as e:
+            sock.close()
+            raise ConnectTimeoutError(
+                self,
+                f"Connection to {self.socket_path} timed out. (connect timeout={self.timeout})",
+            ) from e
+        except OSError as e:
+            sock.close()
+            raise NewConnectionError(
+                self, f"Failed to establish a new connection: {e}"
+            ) from e
+        return sock
+
+
+class _UnixSocketConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _UnixSocketConnection
+
+    def __init__(self, host: str, port=None, **kwargs):
+        # requests passes the TLS settings of every request, which plain connections do not take
+        for keyword in SSL_KEYWORDS:
+            kwargs.pop(keyword, None)
+        super().__init__("localhost", port, **kwargs)
+        self.conn_kw["socket_path"] = unquote(host)
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    """
+    A requests transport adapter that sends http+unix:// requests over a unix domain socket,
+    for containers running as a sidecar on the same host, without going through the TCP stack.
+    Connections are pooled per socket like the HTTPAdapter pools them per host, with the same
+    pool_connections, pool_maxsize and pool_block arguments. Proxies are not used.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            **self.poolmanager.pool_classes_by_scheme,
+            UNIX_SOCKET_SCHEME: _UnixSocketConnectionPool,
+        }
+        self.poolmanager.key_fn_by_scheme = {
+            **self.poolmanager.key_fn_by_scheme,
+            UNIX_SOCKET_SCHEME: self.poolmanager.key_fn_by_scheme["http"],
+        }
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ) -> requests.Response:
+        return super().send(request, stream, timeout, verify, cert, proxies=None)
@@ -1,4 +1,5 @@
 from .components import request_objects as req_objects
+from .components.request_template import RequestTemplate
 
 
 class request_objects:
@@ -23,3 +24,4 @@ class request_objects:
     reidentify_text_obj = req_objects.ReidentifyTextRequest
     timestamp_obj = req_objects.Timestamp
     relation_detection_obj = req_objects.RelationDetection
+    request_template_obj = RequestTemplate
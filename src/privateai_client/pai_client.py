@@ -1,5 +1,10 @@
+import functools
 import logging
-from typing import Union
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Union
+
+import requests
 
 from .__about__ import __version__
 from .components import *
@@ -10,23 +15,199 @@ class PAIClient:
     Client used to connect to private-ai's deidentication service
     """
 
+    mappable_endpoints = [
+        "process_text",
+        "reidentify_text",
+        "process_files_uri",
+        "process_files_base64",
+        "bleep",
+        "ner_text",
+        "analyze_text",
+    ]
+    version_checks = ["lazy", "eager", "off"]
+
     def __init__(
         self,
         scheme: str = None,
         host: str = None,
         port: str = None,
-        url: str = None,
+        url: Union[str, List[str]] = None,
+        session: Optional[requests.Session] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        http2: bool = False,
+        json_codec: Union[str, JSONCodec] = "auto",
+        version_check: str = "lazy",
+        version_check_ttl: Optional[float] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        load_balancing: str = "least_outstanding",
+        eject_after: int = 3,
+        eject_for: float = 30.0,
+        health_check_interval: Optional[float] = None,
+        health_check_timeout: Union[Timeout, float, tuple] = 5.0,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        timeout: Union[Timeout, float, tuple, None] = None,
+        compression: Optional[CompressionPolicy] = None,
+        hedging: Optional[HedgingPolicy] = None,
         **kwargs,
     ):
         # Add source url
         self._uris = PAIURIs(url, scheme, host, port)
-        self.get = PAIGetRequests(self._uris)
-        self.post = PAIPostRequests(self._uris)
+        if http2 and self._uris.unix_socket:
+            raise ValueError(
+                "Invalid value for http2. Accepted value is False when url is a unix socket."
+            )
+        if hedging is not None and len(self._uris.pai_uris) < 2:
+            raise ValueError(
+                "Invalid value for hedging. Accepted value is None when a single url is given, as hedged requests are sent to another container."
+            )
+        # A single pooled session is shared by the get and post requests so
+        # connections to the container are reused across calls
+        self._owns_session = session is None
+        self._session = (
+            session
+            if session is not None
+            else create_session(
+                pool_connections, pool_maxsize, pool_block, keep_alive, http2
+            )
+        )
+        # The codec used to encode request payloads and decode response bodies
+        self._codec = get_codec(json_codec)
+        # Failed requests are only retried when a retry policy is given.
+        # The get and post requests share their retry counts
+        self._retry_stats = RetryStats()
+        # The get and post requests share their compression counts
+        self._compression_stats = CompressionStats()
+        # The get and post requests share their hedging counts
+        self._hedging_stats = HedgingStats()
+        # Requests are spread over the containers when a list of urls is given
+        self._load_balancer = None
+        if len(self._uris.pai_uris) > 1:
+            self._load_balancer = LoadBalancer(
+                self._uris.pai_uris,
+                load_balancing,
+                eject_after,
+                eject_for,
+                circuit_breaker,
+            )
+        request_args = (
+            self._uris,
+            self._session,
+            self._codec,
+            retry_policy,
+            self._retry_stats,
+            self._load_balancer,
+            circuit_breaker,
+            # Used by every request unless a timeout is passed to the endpoint
+            timeout,
+            # Request bodies are only compressed when a compression policy is given
+            compression,
+            self._compression_stats,
+            # Slow requests are only sent again when a hedging policy is given
+            hedging,
+            self._hedging_stats,
+        )
+        self.get = PAIGetRequests(*request_args)
+        self.post = PAIPostRequests(*request_args)
         if "api_key" in kwargs.keys():
             self.add_api_key(kwargs["api_key"])
         elif "bearer_token" in kwargs.keys():
             self.add_bearer_token(kwargs["bearer_token"])
         self._container_version = None
+        # The container's version is checked before the first request, or before each request
+        # made version_check_ttl seconds after the last check, and once whatever the concurrency
+        if version_check not in self.version_checks:
+            raise ValueError(
+                f"{version_check} is not valid. version_check can only be one of the following: {', '.join(self.version_checks)}"
+            )
+        self._version_check = version_check
+        self._version_check_ttl = version_check_ttl
+        self._version_checked_at = None
+        self._version_lock = threading.Lock()
+        if version_check == "eager":
+            self.check_version_compatibility()
+        # Health checks have their own timeout, so a container that never answers cannot
+        # stall them when requests wait indefinitely
+        self._health_check_timeout = get_timeout(health_check_timeout)
+        if self._load_balancer is not None and health_check_interval:
+            self._load_balancer.start_health_checks(
+                self._is_healthy, health_check_interval
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def json_codec(self):
+        return self._codec
+
+    @property
+    def retry_policy(self):
+        return self.post.retry_policy
+
+    @property
+    def retry_stats(self):
+        return self._retry_stats
+
+    @property
+    def compression(self):
+        return self.post.compression
+
+    @property
+    def compression_stats(self):
+        return self._compression_stats
+
+    @property
+    def hedging(self):
+        return self.post.hedging
+
+    @property
+    def hedging_stats(self):
+        return self._hedging_stats
+
+    @property
+    def load_balancer(self):
+        return self._load_balancer
+
+    @property
+    def timeout(self):
+        return self.post.timeout
+
+    @property
+    def circuit_breaker(self):
+        return self.post.circuit_breaker
+
+    @property
+    def circuit_states(self) -> dict:
+        """
+        The state of the circuit of every container, "closed", "open" or "half_open", by url
+        """
+        if self.circuit_breaker is None:
+            return {}
+        return {
+            base_uri: self.circuit_breaker.state(base_uri)
+            for base_uri in self._uris.pai_uris
+        }
+
+    def close(self):
+        """
+        Closes the pooled connections held by the client.
+        Sessions passed in by the caller are left open for the caller to manage.
+        """
+        if self._load_balancer is not None:
+            self._load_balancer.stop_health_checks()
+        self.post.close()
+        if self._owns_session:
+            self._session.close()
 
     def _add_auth(self, auth_type, auth_val):
         auth_header = {}
@@ -53,10 +234,23 @@ class PAIClient:
             )
 
     def check_version_compatibility(self) -> None:
-        if self._container_version is None:
-            self.get_version()
-        else:
-            self._version_warning()
+        """
+        Warns when the container's version may be incompatible with the client's.
+        Does nothing with version_check="off" or when the version was checked recently.
+        """
+        if self._version_check == "off" or self._version_is_fresh():
+            return
+        with self._version_lock:
+            # Another caller may have checked while this one waited for the lock
+            if not self._version_is_fresh():
+                self.get_version()
+
+    def _version_is_fresh(self) -> bool:
+        checked_at = self._version_checked_at
+        return checked_at is not None and (
+            self._version_check_ttl is None
+            or time.monotonic() - checked_at < self._version_check_ttl
+        )
 
     def add_api_key(self, api_key: str):
         self._add_auth("api_key", api_key)
@@ -64,86 +258,206 @@ class PAIClient:
     def add_bearer_token(self, token: str):
         self._add_auth("bearer_token", token)
 
-    def ping(self):
+    def ping(self, timeout: Union[Timeout, float, tuple, None] = None):
         """
         Makes a call to the Private-AI service's health endpoint.
         Can be used as a validator to ensure the service is running.
         """
-        response = self.get.health()
+        response = self.get.health(timeout=timeout)
         if response.status_code != 200:
             logging.warning(f"The Private AI server cannot be reached")
             return False
         return True
 
-    def get_metrics(self):
+    def check_health(self) -> dict:
+        """
+        Calls the health endpoint of every container the client sends requests to. With several
+        urls, containers that fail are ejected from the load balancer and those that pass are
+        readmitted. Returns whether each container is healthy by url.
+        """
+        if self._load_balancer is None:
+            return {self._uris.pai_uri: self._is_healthy(self._uris.pai_uri)}
+        return self._load_balancer.check_health(self._is_healthy)
+
+    def _is_healthy(self, base_uri: str) -> bool:
+        try:
+            response = self._session.get(
+                self._uris.for_base(self._uris.health, base_uri),
+                headers=self.get.headers,
+                timeout=self._health_check_timeout.for_attempt(
+                    self._health_check_timeout.start()
+                ),
+            )
+        except requests.RequestException:
+            return False
+        return response.status_code == 200
+
+    def get_metrics(self, timeout: Union[Timeout, float, tuple, None] = None):
         """
         Returns information about the Private-AI's server
         """
         self.check_version_compatibility()
-        return MetricsResponse(self.get.metrics())
+        return MetricsResponse(self.get.metrics(timeout=timeout), self._codec)
 
-    def get_version(self):
+    def get_version(self, timeout: Union[Timeout, float, tuple, None] = None):
         """
         Returns the version of the container application code
         """
-        ret = VersionResponse(self.get.version())
+        ret = VersionResponse(self.get.version(timeout=timeout), self._codec)
         self._container_version = ret.app_version
+        self._version_checked_at = time.monotonic()
         self._version_warning()
         return ret
 
-    def get_diagnostics(self):
+    def get_diagnostics(self, timeout: Union[Timeout, float, tuple, None] = None):
         """
         Returns diagnostic information about the Private-AI container host
         """
         self.check_version_compatibility()
-        return DiagnosticResponse(self.get.diagnostics())
+        return DiagnosticResponse(self.get.diagnostics(timeout=timeout), self._codec)
 
-    def process_text(self, request_object: Union[dict, ProcessTextRequest]):
+    def process_text(
+        self,
+        request_object: Union[dict, ProcessTextRequest, TemplatedRequest],
+        *,
+        stream: bool = False,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ):
         """
         Used to deidentify text
+        With stream=True the body is read from the connection and decompressed in chunks, then
+        parsed once, and the raw content is not kept on the response
         """
         if type(request_object) is ProcessTextRequest:
             self.check_version_compatibility()
-            response = TextResponse(self.post.process_text(request_object.to_dict()))
+            response = TextResponse(
+                self.post.process_text(
+                    request_object.to_dict(), stream=stream, timeout=timeout
+                ),
+                self._codec,
+            )
         elif type(request_object) is dict:
             self.check_version_compatibility()
-            response = TextResponse(self.post.process_text(request_object))
+            response = TextResponse(
+                self.post.process_text(request_object, stream=stream, timeout=timeout),
+                self._codec,
+            )
+        elif (
+            type(request_object) is TemplatedRequest
+            and request_object.request_class is ProcessTextRequest
+        ):
+            self.check_version_compatibility()
+            response = TextResponse(
+                self.post.process_text(
+                    request_object.encode(self._codec), stream=stream, timeout=timeout
+                ),
+                self._codec,
+            )
         else:
             raise ValueError(
                 "request_object can only be a dictionary or a ProcessTextRequest object"
             )
+        if stream:
+            # Reads the body now so the connection is released
+            response.body
         return response
 
-    def reidentify_text(self, request_object: Union[dict, ReidentifyTextRequest]):
+    def process_text_batched(
+        self,
+        texts: List[Union[str, List[str]]],
+        max_items: int = 100,
+        max_chars: int = 100000,
+        link_batch: Optional[bool] = None,
+        entity_detection: Optional[EntityDetection] = None,
+        processed_text: Optional[ProcessedText] = None,
+        project_id: Optional[str] = None,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ):
+        """
+        Used to deidentify a large list of texts in appropriately sized requests.
+        Texts are packed into requests of at most max_items texts and max_chars characters and
+        the responses are merged into a single BatchedTextResponse in the order of texts.
+        A nested list of strings is a linked group that is always sent together with link_batch
+        enabled. Passing link_batch=True links all of the texts, so they are sent as one group.
+        """
+        if link_batch:
+            linked_group = []
+            for text in texts:
+                linked_group.extend(text if isinstance(text, list) else [text])
+            texts = [linked_group]
+        batches = pack_texts(texts, max_items, max_chars)
+        if not batches:
+            raise ValueError(
+                "Invalid value for texts. Accepted value is a list containing at least one text."
+            )
+        responses = []
+        # The options are the same for every batch, so they are only serialized once
+        templates = {}
+        for batch, linked in batches:
+            batch_link_batch = True if linked else link_batch
+            if batch_link_batch not in templates:
+                templates[batch_link_batch] = RequestTemplate(
+                    ProcessTextRequest(
+                        text=[],
+                        link_batch=batch_link_batch,
+                        entity_detection=entity_detection,
+                        processed_text=processed_text,
+                        project_id=project_id,
+                    )
+                )
+            request_object = templates[batch_link_batch].with_text(batch)
+            responses.append(
+                self.process_text(request_object, timeout=timeout, stream=True)
+            )
+        return BatchedTextResponse(responses)
+
+    def reidentify_text(
+        self,
+        request_object: Union[dict, ReidentifyTextRequest],
+        *,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ):
         """
         Used to reidentify text
         """
         if type(request_object) is ReidentifyTextRequest:
             self.check_version_compatibility()
             response = ReidentifyTextResponse(
-                self.post.reidentify_text(request_object.to_dict())
+                self.post.reidentify_text(request_object.to_dict(), timeout=timeout),
+                self._codec,
             )
         elif type(request_object) is dict:
             self.check_version_compatibility()
-            response = ReidentifyTextResponse(self.post.reidentify_text(request_object))
+            response = ReidentifyTextResponse(
+                self.post.reidentify_text(request_object, timeout=timeout), self._codec
+            )
         else:
             raise ValueError(
                 "request_object can only be a dictionary or a ReidentifyTextRequest object"
             )
         return response
 
-    def process_files_uri(self, request_object: Union[dict, ProcessFileUriRequest]):
+    def process_files_uri(
+        self,
+        request_object: Union[dict, ProcessFileUriRequest],
+        *,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ):
         """
         Used to deidentify files by uri
         """
         if type(request_object) is ProcessFileUriRequest:
             self.check_version_compatibility()
             response = FilesUriResponse(
-                self.post.process_files_uri(request_object.to_dict())
+                self.post.process_files_uri(request_object.to_dict(), timeout=timeout),
+                self._codec,
             )
         elif type(request_object) is dict:
             self.check_version_compatibility()
-            response = FilesUriResponse(self.post.process_files_uri(request_object))
+            response = FilesUriResponse(
+                self.post.process_files_uri(request_object, timeout=timeout),
+                self._codec,
+            )
         else:
             raise ValueError(
                 "request_object can only be a dictionary or a ProcessFileUriRequest object"
@@ -151,20 +465,32 @@ class PAIClient:
         return response
 
     def process_files_base64(
-        self, request_object: Union[dict, ProcessFileBase64Request]
+        self,
+        request_object: Union[dict, ProcessFileBase64Request],
+        *,
+        stream: bool = False,
+        timeout: Union[Timeout, float, tuple, None] = None,
     ):
         """
         Used to deidentify base64 files
+        With stream=True the body is only downloaded when it is read, so
+        FilesBase64Response.save_processed_file can write the file straight to disk
         """
         if type(request_object) is ProcessFileBase64Request:
             self.check_version_compatibility()
             response = FilesBase64Response(
-                self.post.process_files_base64(request_object.to_dict())
+                self.post.process_files_base64(
+                    request_object.to_dict(), stream=stream, timeout=timeout
+                ),
+                self._codec,
             )
         elif type(request_object) is dict:
             self.check_version_compatibility()
             response = FilesBase64Response(
-                self.post.process_files_base64(request_object)
+                self.post.process_files_base64(
+                    request_object, stream=stream, timeout=timeout
+                ),
+                self._codec,
             )
         else:
             raise ValueError(
@@ -172,52 +498,151 @@ class PAIClient:
             )
         return response
 
-    def bleep(self, request_object: Union[dict, BleepRequest]):
+    def bleep(
+        self,
+        request_object: Union[dict, BleepRequest],
+        *,
+        stream: bool = False,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ):
         """
         Used to deidentify audio files by uri
+        With stream=True the body is only downloaded when it is read, so
+        BleepResponse.save_bleeped_file can write the file straight to disk
         """
         if type(request_object) is BleepRequest:
             self.check_version_compatibility()
-            response = BleepResponse(self.post.bleep(request_object.to_dict()))
+            response = BleepResponse(
+                self.post.bleep(
+                    request_object.to_dict(), stream=stream, timeout=timeout
+                ),
+                self._codec,
+            )
         elif type(request_object) is dict:
             self.check_version_compatibility()
-            response = BleepResponse(self.post.bleep(request_object))
+            response = BleepResponse(
+                self.post.bleep(request_object, stream=stream, timeout=timeout),
+                self._codec,
+            )
         else:
             raise ValueError(
                 "request_object can only be a dictionary or a BleepRequest object"
             )
         return response
 
-    def ner_text(self, request_object: Union[dict, NerTextRequest]):
+    def ner_text(
+        self,
+        request_object: Union[dict, NerTextRequest, TemplatedRequest],
+        *,
+        stream: bool = False,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ):
         """
         Used to deidentify text
+        With stream=True the body is read from the connection and decompressed in chunks, then
+        parsed once, and the raw content is not kept on the response
         """
         if type(request_object) is NerTextRequest:
             self.check_version_compatibility()
-            response = NerTextResponse(self.post.ner_text(request_object.to_dict()))
+            response = NerTextResponse(
+                self.post.ner_text(
+                    request_object.to_dict(), stream=stream, timeout=timeout
+                ),
+                self._codec,
+            )
         elif type(request_object) is dict:
             self.check_version_compatibility()
-            response = NerTextResponse(self.post.ner_text(request_object))
+            response = NerTextResponse(
+                self.post.ner_text(request_object, stream=stream, timeout=timeout),
+                self._codec,
+            )
+        elif (
+            type(request_object) is TemplatedRequest
+            and request_object.request_class is NerTextRequest
+        ):
+            self.check_version_compatibility()
+            response = NerTextResponse(
+                self.post.ner_text(
+                    request_object.encode(self._codec), stream=stream, timeout=timeout
+                ),
+                self._codec,
+            )
         else:
             raise ValueError(
                 "request_object can only be a dictionary or a NerTextRequest object"
             )
+        if stream:
+            # Reads the body now so the connection is released
+            response.body
         return response
 
-    def analyze_text(self, request_object: Union[dict, AnalyzeTextRequest]):
+    def analyze_text(
+        self,
+        request_object: Union[dict, AnalyzeTextRequest, TemplatedRequest],
+        *,
+        stream: bool = False,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ):
         """
         Used to analyze text
+        With stream=True the body is read from the connection and decompressed in chunks, then
+        parsed once, and the raw content is not kept on the response
         """
         if type(request_object) is AnalyzeTextRequest:
             self.check_version_compatibility()
             response = AnalyzeTextResponse(
-                self.post.analyze_text(request_object.to_dict())
+                self.post.analyze_text(
+                    request_object.to_dict(), stream=stream, timeout=timeout
+                ),
+                self._codec,
             )
         elif type(request_object) is dict:
             self.check_version_compatibility()
-            response = AnalyzeTextResponse(self.post.analyze_text(request_object))
+            response = AnalyzeTextResponse(
+                self.post.analyze_text(request_object, stream=stream, timeout=timeout),
+                self._codec,
+            )
+        elif (
+            type(request_object) is TemplatedRequest
+            and request_object.request_class is AnalyzeTextRequest
+        ):
+            self.check_version_compatibility()
+            response = AnalyzeTextResponse(
+                self.post.analyze_text(
+                    request_object.encode(self._codec), stream=stream, timeout=timeout
+                ),
+                self._codec,
+            )
         else:
             raise ValueError(
                 "request_object can only be a dictionary or an AnalyzeTextRequest object"
             )
+        if stream:
+            # Reads the body now so the connection is released
+            response.body
         return response
+
+    def map(
+        self,
+        endpoint: str,
+        requests: Iterable,
+        concurrency: int = 8,
+        ordered: bool = True,
+        timeout: Union[Timeout, float, tuple, None] = None,
+    ) -> Iterator[MapResult]:
+        """
+        Sends many requests to an endpoint concurrently, e.g. client.map("process_text", requests).
+        Yields a MapResult per request, either in input order or, with ordered=False, as they complete.
+        No more than concurrency requests are in flight and the requests iterable is consumed lazily.
+        Errors such as an HTTPError are captured in MapResult.error rather than stopping the batch.
+        All requests share the client's pooled session, so pool_maxsize should be at least concurrency.
+        timeout, if given, replaces the client's timeout for each request.
+        """
+        if endpoint not in self.mappable_endpoints:
+            raise ValueError(
+                f"{endpoint} is not valid. endpoint can only be one of the following: {', '.join(self.mappable_endpoints)}"
+            )
+        send = getattr(self, endpoint)
+        if timeout is not None:
+            send = functools.partial(send, timeout=get_timeout(timeout))
+        return fan_out(send, requests, concurrency, ordered)
@@ -1,4 +1,8 @@
-from typing import Callable
+import copy
+import os
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterator, Literal, Optional
 
 from privateai_client.components import AnalyzeTextResponse
 
@@ -10,6 +14,9 @@ def deidentify_text(
     response: AnalyzeTextResponse,
     entity_processors: dict[str, EntityProcessor],
     default_processor: EntityProcessor,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    state_scope: Literal["batch", "text"] = "batch",
 ) -> list[str]:
     """
     Deidentifies analyzed text by processing entities with multiple processors, adjusting text dynamically.
@@ -21,30 +28,235 @@ def deidentify_text(
             `{ENTITY_TYPE: entity_processor_fn}`, where `entity_processor_fn` takes an entity dictionary
             and returns modified text for all occurrences of that entity type.
         default_processor: A fallback function used to process entities not found in `entity_processors`.
+        workers: The number of processes the texts are split across. With the default of 1, texts are
+            processed in the calling thread.
+        executor: An optional `concurrent.futures.Executor` to split the texts across instead of a new
+            process pool. Processors must be picklable when a process pool is used. With other
+            executors, processors that are not stateful are shared by the threads and must be thread-safe.
+        state_scope: How stateful processors, i.e. processors with a `counts` attribute such as
+            `MarkerEntityProcessor` unless their `stateful` attribute is False, count entities. With "batch", counts carry on from one text to the
+            next, exactly as when processing sequentially, and the processors' counts are updated.
+            With "text", every text is counted from the processors' current counts, which are left unchanged.
 
 
     Returns:
         A list of de-identified text messages, with the same length and order as the `text` argument.
 
+    Entities are replaced in a single left-to-right pass. When entity spans overlap, the entity that
+    starts first is kept, preferring the longest one when they start at the same index, and entities
+    overlapping an entity that was already replaced are left out without calling their processor.
+    Processors with a `process_many` method, such as `FuzzyMatchEntityProcessor`, are called once
+    with all of their entities instead of once per entity.
     """
-    modified_texts = []
-    for t, entities in zip(text, response.entities):
-        offset = 0
-        modified_text = t
-        for entity in sorted(entities, key=lambda e: e["location"]["stt_idx"]):
-            start_idx = entity["location"]["stt_idx"] + offset
-            end_idx = entity["location"]["end_idx"] + offset
+    if state_scope not in ["batch", "text"]:
+        raise ValueError(
+            "Invalid value for state_scope. Accepted values: 'batch' and 'text'"
+        )
+    if not isinstance(workers, int) or workers < 1:
+        raise ValueError(
+            "Invalid value for workers. Accepted value is a positive integer."
+        )
+
+    entities = response.entities
+    if workers == 1 and executor is None:
+        modified_texts, _ = _deidentify_chunk(
+            (text, entities, entity_processors, default_processor, state_scope, None)
+        )
+        return modified_texts
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        return _deidentify_parallel(
+            text,
+            entities,
+            entity_processors,
+            default_processor,
+            state_scope,
+            executor,
+            workers if workers > 1 else os.cpu_count() or 1,
+        )
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def _is_stateful(processor) -> bool:
+    # Matches CachedEntityProcessor: a stateful attribute, e.g. False for masking fuzzy match
+    # processors, takes precedence over having a counts attribute
+    return getattr(processor, "stateful", hasattr(processor, "counts"))
+
+
+def _stateful_processors(entity_processors, default_processor) -> list:
+    # Processors keep their state in a counts attribute, which is what has to be carried across chunks
+    processors = []
+    for processor in [*entity_processors.values(), default_processor]:
+        if (
+            _is_stateful(processor)
+            and hasattr(processor, "counts")
+            and all(processor is not p for p in processors)
+        ):
+            processors.append(processor)
+    return processors
+
+
+def _get_counts(processors) -> list[dict]:
+    return [dict(processor.counts) for processor in processors]
+
 
+def _set_counts(processors, counts: list[dict]):
+    for processor, processor_counts in zip(processors, counts):
+        processor.counts = defaultdict(int, processor_counts)
+
+
+def _add_counts(counts: list[dict], other: list[dict]) -> list[dict]:
+    added = []
+    for processor_counts, other_counts in zip(counts, other):
+        processor_counts = dict(processor_counts)
+        for key, count in other_counts.items():
+            processor_counts[key] = processor_counts.get(key, 0) + count
+        added.append(processor_counts)
+    return added
+
+
+def _kept_entities(entities: list[dict]) -> list[dict]:
+    kept = []
+    cursor = 0
+    for entity in sorted(
+        entities,
+        key=lambda e: (e["location"]["stt_idx"], -e["location"]["end_idx"]),
+    ):
+        if entity["location"]["stt_idx"] < cursor:
+            continue
+        kept.append(entity)
+        cursor = entity["location"]["end_idx"]
+    return kept
+
+
+def _process_many(
+    kept: list[list[dict]], entity_processors, default_processor
+) -> dict[int, Iterator[str]]:
+    # Processors with a process_many method get all of their entities in one call, in the order
+    # they would otherwise be called. Their results are consumed in that same order.
+    batches = {}
+    for text_entities in kept:
+        for entity in text_entities:
             processor = entity_processors.get(entity["best_label"], default_processor)
-            modified_entity_text = processor(entity)
+            if hasattr(processor, "process_many"):
+                batches.setdefault(id(processor), (processor, []))[1].append(entity)
+    return {
+        key: iter(processor.process_many(entities))
+        for key, (processor, entities) in batches.items()
+    }
 
-            length_diff = len(modified_entity_text) - len(entity["text"])
-            offset += length_diff
 
-            modified_text = (
-                modified_text[:start_idx]
-                + modified_entity_text
-                + modified_text[end_idx:]
-            )
-        modified_texts.append(modified_text)
+def _deidentify_texts(
+    texts: list[str], entities: list[list[dict]], entity_processors, default_processor
+) -> list[str]:
+    kept = [_kept_entities(text_entities) for text_entities in entities]
+    processed = _process_many(kept, entity_processors, default_processor)
+
+    modified_texts = []
+    for t, text_entities in zip(texts, kept):
+        segments = []
+        cursor = 0
+        for entity in text_entities:
+            processor = entity_processors.get(entity["best_label"], default_processor)
+            segments.append(t[cursor : entity["location"]["stt_idx"]])
+            if id(processor) in processed:
+                segments.append(next(processed[id(processor)]))
+            else:
+                segments.append(processor(entity))
+            cursor = entity["location"]["end_idx"]
+        segments.append(t[cursor:])
+        modified_texts.append("".join(segments))
     return modified_texts
+
+
+def _deidentify_chunk(args) -> tuple[list[str], list[dict]]:
+    # Takes a single tuple so it can be passed to Executor.map
+    texts, entities, entity_processors, default_processor, state_scope, counts = args
+    stateful = _stateful_processors(entity_processors, default_processor)
+    if counts is not None:
+        _set_counts(stateful, counts)
+    initial_counts = _get_counts(stateful)
+
+    if state_scope == "batch":
+        modified_texts = _deidentify_texts(
+            texts, entities, entity_processors, default_processor
+        )
+        return modified_texts, _get_counts(stateful)
+
+    modified_texts = []
+    for t, text_entities in zip(texts, entities):
+        _set_counts(stateful, initial_counts)
+        modified_texts.extend(
+            _deidentify_texts(
+                [t], [text_entities], entity_processors, default_processor
+            )
+        )
+    _set_counts(stateful, initial_counts)
+    return modified_texts, _get_counts(stateful)
+
+
+def _deidentify_parallel(
+    text, entities, entity_processors, default_processor, state_scope, executor, workers
+) -> list[str]:
+    # Contiguous chunks, a few per worker to even out the load
+    chunk_size = max(1, -(-len(text) // (workers * 4)))
+    bounds = [(i, i + chunk_size) for i in range(0, len(text), chunk_size)]
+    stateful = _stateful_processors(entity_processors, default_processor)
+    initial_counts = _get_counts(stateful)
+
+    # Processors that are not stateful are shared by the chunks rather than copied, keeping
+    # e.g. the index of a FuzzyMatchEntityProcessor and the entries of a CachedEntityProcessor
+    shared = {
+        id(processor): processor
+        for processor in [*entity_processors.values(), default_processor]
+        if not _is_stateful(processor)
+    }
+
+    def processors():
+        # Chunks sent to other processes get their own copies when pickled,
+        # other executors need copies of stateful processors so chunks do not share state
+        if isinstance(executor, ProcessPoolExecutor):
+            return entity_processors, default_processor
+        return copy.deepcopy((entity_processors, default_processor), dict(shared))
+
+    def run(chunk_counts, chunk_bounds):
+        return list(
+            executor.map(
+                _deidentify_chunk,
+                [
+                    (
+                        text[start:end],
+                        entities[start:end],
+                        *processors(),
+                        state_scope,
+                        counts,
+                    )
+                    for counts, (start, end) in zip(chunk_counts, chunk_bounds)
+                ],
+            )
+        )
+
+    if state_scope == "text" or not stateful:
+        results = run([initial_counts] * len(bounds), bounds)
+        return [t for modified_texts, _ in results for t in modified_texts]
+
+    # With batch scoped state, each chunk must start from the counts left by all of the chunks
+    # before it. A first pass finds how much each chunk counts, starting the first chunk from the
+    # current counts so its output can be kept, and a second pass redoes the later chunks.
+    empty_counts = [{} for _ in stateful]
+    first_pass = run([initial_counts] + [empty_counts] * (len(bounds) - 1), bounds)
+    offsets = [first_pass[0][1]] if first_pass else []
+    for _, chunk_counts in first_pass[1:-1]:
+        offsets.append(_add_counts(offsets[-1], chunk_counts))
+    second_pass = run(offsets, bounds[1:])
+
+    if first_pass:
+        final_counts = second_pass[-1][1] if second_pass else first_pass[0][1]
+        _set_counts(stateful, final_counts)
+    results = first_pass[:1] + second_pass
+    return [t for modified_texts, _ in results for t in modified_texts]
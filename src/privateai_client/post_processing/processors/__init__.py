@@ -1,2 +1,3 @@
+from .cached import CachedEntityProcessor
 from .default import *
 from .fuzzy_match import FuzzyMatchEntityProcessor
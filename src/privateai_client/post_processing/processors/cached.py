@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class CachedEntityProcessor:
+    """
+    Wraps an entity processor and remembers its results by (best_label, text), keeping the
+    maxsize most recently used ones. With maxsize=None the cache is unbounded.
+
+    Stateful processors, i.e. processors with a counts attribute such as MarkerEntityProcessor
+    or a stateful attribute set to True, return a different text for each occurrence and are
+    always called. The cache can be shared by several threads.
+    """
+
+    def __init__(self, processor: Callable[[dict], str], maxsize: Optional[int] = 1024):
+        self.processor = processor
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._validate_attributes()
+
+    def __getstate__(self):
+        # Locks cannot be pickled, e.g. to send the processor to a process pool
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def stateful(self) -> bool:
+        return getattr(self.processor, "stateful", hasattr(self.processor, "counts"))
+
+    @property
+    def counts(self):
+        # Lets deidentify_text manage the counts of a wrapped stateful processor
+        return self.processor.counts
+
+    @counts.setter
+    def counts(self, counts):
+        self.processor.counts = counts
+
+    @property
+    def currsize(self) -> int:
+        return len(self._cache)
+
+    def cache_clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __call__(self, entity: dict) -> str:
+        if self.stateful:
+            return self.processor(entity)
+        key = (entity["best_label"], entity["text"])
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+        result = self.processor(entity)
+        with self._lock:
+            self._store(key, result)
+        return result
+
+    def process_many(self, entities: list[dict]) -> list[str]:
+        if self.stateful:
+            if hasattr(self.processor, "process_many"):
+                return self.processor.process_many(entities)
+            return [self.processor(entity) for entity in entities]
+
+        results = {}
+        missing = {}
+        with self._lock:
+            for entity in entities:
+                key = (entity["best_label"], entity["text"])
+                if key in results or key in missing:
+                    self.hits += 1
+                elif key in self._cache:
+                    self.hits += 1
+                    self._cache.move_to_end(key)
+                    results[key] = self._cache[key]
+                else:
+                    self.misses += 1
+                    missing[key] = entity
+
+        if hasattr(self.processor, "process_many"):
+            processed = self.processor.process_many(list(missing.values()))
+        else:
+            processed = [self.processor(entity) for entity in missing.values()]
+        with self._lock:
+            for key, result in zip(missing, processed):
+                results[key] = result
+                self._store(key, result)
+        return [results[(entity["best_label"], entity["text"])] for entity in entities]
+
+    def _store(self, key: tuple[str, str], result: str):
+        self._cache[key] = result
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def _validate_attributes(self):
+        if not callable(self.processor):
+            raise ValueError(
+                f"Invalid value for processor. Accepted value is a callable entity processor"
+            )
+        if self.maxsize is not None and (
+            not isinstance(self.maxsize, int) or self.maxsize < 1
+        ):
+            raise ValueError(
+                f"Invalid value for maxsize. Accepted value is a positive integer or None."
+            )
@@ -22,22 +22,27 @@ class FuzzyMatchEntityProcessor:
         self.masking_character = masking_character
         self.counts: defaultdict[str, int] = defaultdict(int)
         self._validate_attributes()
+        self._build_index()
+
+    @property
+    def stateful(self) -> bool:
+        # Only markers are numbered, masked or allowed texts are always the same for a text
+        return self.process_type == "MARKER"
 
     def __call__(self, entity: dict) -> str:
-        if self.ignore_casing:
-            lower_text = entity["text"].lower()
-            min_dist = min(
-                damerau_levenshtein_distance(lower_text, word.lower())
-                for word in self.known_words_list
-            )
-        else:
-            min_dist = min(
-                damerau_levenshtein_distance(entity["text"], word)
-                for word in self.known_words_list
-            )
-        should_allow = self.strategy == "ALLOW"
-        is_similar = min_dist <= self.threshold
+        return self._process(entity, self._is_similar(entity["text"]))
 
+    def process_many(self, entities: list[dict]) -> list[str]:
+        """
+        Processes many entities at once, returning what calling the processor on each entity
+        in turn would. Each distinct text is compared to all known words of a length at once
+        with a bit-parallel algorithm, which is much faster than __call__ for long word lists.
+        """
+        similar = self._similar_many({entity["text"] for entity in entities})
+        return [self._process(entity, similar[entity["text"]]) for entity in entities]
+
+    def _process(self, entity: dict, is_similar: bool) -> str:
+        should_allow = self.strategy == "ALLOW"
         if is_similar == should_allow:
             return entity["text"]
         else:
@@ -47,6 +52,65 @@ class FuzzyMatchEntityProcessor:
             self.counts[key] += 1
             return f"[{key}_{self.counts[key]}]"
 
+    def _build_index(self):
+        # The known words are indexed once, so later changes to known_words_list are not picked up.
+        # Words are grouped by length since the distance between two words is at least the
+        # difference of their lengths. A BK-tree is not used because the restricted
+        # Damerau-Levenshtein distance does not satisfy the triangle inequality.
+        words = {self._prepare(word) for word in self.known_words_list}
+        self._known_words = frozenset(words)
+        self._words_by_length: dict[int, list[str]] = defaultdict(list)
+        for word in sorted(words):
+            self._words_by_length[len(word)].append(word)
+        # Packed lazily, only process_many uses them
+        self._packed_by_length: dict[int, _PackedWords] = {}
+
+    def _prepare(self, text: str) -> str:
+        return text.lower() if self.ignore_casing else text
+
+    def _is_similar(self, text: str) -> bool:
+        text = self._prepare(text)
+        if text in self._known_words:
+            return True
+        length = len(text)
+        # Closest lengths first, as they are the likeliest to be within the threshold
+        for length_diff in range(self.threshold + 1):
+            for word_length in {length - length_diff, length + length_diff}:
+                for word in self._words_by_length.get(word_length, ()):
+                    if damerau_levenshtein_distance(text, word) <= self.threshold:
+                        return True
+        return False
+
+    def _similar_many(self, texts: set[str]) -> dict[str, bool]:
+        similar = {}
+        for text in texts:
+            prepared = self._prepare(text)
+            if prepared in self._known_words:
+                similar[text] = True
+                continue
+            similar[text] = False
+            length = len(prepared)
+            for length_diff in range(self.threshold + 1):
+                for word_length in {length - length_diff, length + length_diff}:
+                    packed = self._packed(word_length)
+                    if packed is not None and packed.any_within(
+                        prepared, self.threshold
+                    ):
+                        similar[text] = True
+                        break
+                if similar[text]:
+                    break
+        return similar
+
+    def _packed(self, word_length: int) -> "_PackedWords | None":
+        if word_length not in self._words_by_length:
+            return None
+        if word_length not in self._packed_by_length:
+            self._packed_by_length[word_length] = _PackedWords(
+                self._words_by_length[word_length]
+            )
+        return self._packed_by_length[word_length]
+
     def _validate_attributes(self):
         if self.strategy not in ["BLOCK", "ALLOW"]:
             raise ValueError(
@@ -74,3 +138,64 @@ class FuzzyMatchEntityProcessor:
             raise ValueError(
                 f"Invalid value for ignore_casing. Accepted values: True and False"
             )
+
+
+class _PackedWords:
+    """
+    Words of the same length packed into one integer, one bit field per word, so the
+    restricted Damerau-Levenshtein distance from a text to all of them is computed at once.
+    This is Hyyrö's bit-vector algorithm with every word as a pattern in its own field.
+    """
+
+    def __init__(self, words: list[str]):
+        length = len(words[0])
+        self.length = length
+        # Room for the word's bits, a bit for the carry out of them and for the per word sums below
+        self.width = max(length + 1, (2 * length).bit_length() + 1)
+        self.low = int(("0" * (self.width - 1) + "1") * len(words), 2)
+        self.fields = self.low * ((1 << length) - 1)
+        self.high = self.low << (self.width - 1)
+
+        bits_by_char: dict[str, bytearray] = {}
+        size = (self.width * len(words) + 7) // 8
+        for i, word in enumerate(words):
+            for j, char in enumerate(word):
+                if char not in bits_by_char:
+                    bits_by_char[char] = bytearray(size)
+                position = i * self.width + j
+                bits_by_char[char][position >> 3] |= 1 << (position & 7)
+        self.matches = {
+            char: int.from_bytes(bits, "little") for char, bits in bits_by_char.items()
+        }
+
+    def any_within(self, text: str, threshold: int) -> bool:
+        fields, low = self.fields, self.low
+        vp, vn, d0, previous_match = fields, 0, 0, 0
+        for char in text:
+            match = self.matches.get(char, 0)
+            transposed = ((~d0 & match) << 1) & previous_match
+            d0 = ((((match & vp) + vp) ^ vp) | match | vn | transposed) & fields
+            hp = (vn | ~(d0 | vp)) & fields
+            hn = d0 & vp
+            hp = ((hp << 1) | low) & fields
+            hn = (hn << 1) & fields
+            vp = (hn | ~(d0 | hp)) & fields
+            vn = hp & d0
+            previous_match = match
+
+        # The distance to each word is len(text) plus the vertical deltas of the last column,
+        # i.e. len(text) + popcount(vp) - popcount(vn) in its field. It is within the threshold
+        # when length - popcount(vp) + popcount(vn) >= minimum, which is checked for all fields
+        # at once by adding to each the amount that carries into its high bit when it is.
+        minimum = self.length + len(text) - threshold
+        if minimum <= 0:
+            return True
+        sums = self.length * low - self._popcounts(vp) + self._popcounts(vn)
+        sums += ((1 << (self.width - 1)) - minimum) * low
+        return bool(sums & self.high)
+
+    def _popcounts(self, bits: int) -> int:
+        counts = 0
+        for shift in range(self.length):
+            counts += (bits >> shift) & self.low
+        return counts
@@ -0,0 +1,185 @@
+import asyncio
+import base64
+import json
+
+import pytest
+from requests import HTTPError
+
+from ..async_pai_client import AsyncPAIClient
+from ..components import (
+    File,
+    ProcessFileBase64Request,
+    ProcessTextRequest,
+    RequestTemplate,
+    TextResponse,
+)
+
+httpx = pytest.importorskip("httpx")
+
+VERSION_BODY = {"app_version": "4.2.0"}
+
+
+def _handler(request):
+    if request.url.path == "/":
+        return httpx.Response(200, json=VERSION_BODY)
+    if request.url.path == "/healthz":
+        return httpx.Response(200, text="OK")
+    body = json.loads(request.content)
+    if request.url.path == "/process/text":
+        return httpx.Response(
+            200,
+            json=[
+                {"processed_text": f"[{t}]", "entities": [], "characters_processed": 4}
+                for t in body["text"]
+            ],
+        )
+    if request.url.path == "/analyze/text":
+        return httpx.Response(400, json={"detail": "bad request"})
+    return httpx.Response(404)
+
+
+def _get_client(**kwargs):
+    async_client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    return AsyncPAIClient(
+        url="http://localhost:8080", async_client=async_client, **kwargs
+    )
+
+
+def test_async_process_text():
+    async def run():
+        async with _get_client() as client:
+            return await client.process_text(ProcessTextRequest(text=["a", "b"]))
+
+    response = asyncio.run(run())
+    assert isinstance(response, TextResponse)
+    assert response.processed_text == ["[a]", "[b]"]
+
+
+def test_async_process_text_with_request_template():
+    template = RequestTemplate(ProcessTextRequest(text=[]))
+
+    async def run():
+        async with _get_client() as client:
+            return await client.process_text(template.with_text(["a", "b"]))
+
+    assert asyncio.run(run()).processed_text == ["[a]", "[b]"]
+
+
+def test_async_concurrent_requests():
+    async def run():
+        async with _get_client() as client:
+            return await asyncio.gather(
+                *[client.process_text({"text": [str(i)]}) for i in range(50)]
+            )
+
+    responses = asyncio.run(run())
+    assert [r.processed_text for r in responses] == [[f"[{i}]"] for i in range(50)]
+
+
+def test_async_error_response():
+    async def run():
+        async with _get_client() as client:
+            await client.analyze_text({"text": ["a"]})
+
+    with pytest.raises(HTTPError, match="400"):
+        asyncio.run(run())
+
+
+def test_async_invalid_request_object():
+    async def run():
+        async with _get_client() as client:
+            await client.ner_text(["a"])
+
+    with pytest.raises(
+        ValueError,
+        match="request_object can only be a dictionary or a NerTextRequest object",
+    ):
+        asyncio.run(run())
+
+
+def test_async_auth_and_ping():
+    async def run():
+        async with _get_client(api_key="test") as client:
+            assert client.post.headers["x-api-key"] == "test"
+            return await client.ping()
+
+    assert asyncio.run(run())
+
+
+def test_async_process_files_base64_streams_file(tmp_path):
+    path = tmp_path / "sample.pdf"
+    path.write_bytes(b"%PDF" * 100000)
+    received = {}
+
+    async def handler(request):
+        if request.url.path == "/":
+            return httpx.Response(200, json=VERSION_BODY)
+        received["headers"] = request.headers
+        received["body"] = await request.aread()
+        return httpx.Response(200, json={"processed_file": "", "entities": []})
+
+    async def run():
+        async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncPAIClient(
+            url="http://localhost", async_client=async_client
+        ) as client:
+            request = ProcessFileBase64Request(
+                file=File.from_path(path, "application/pdf")
+            )
+            await client.process_files_base64(request)
+
+    asyncio.run(run())
+    assert int(received["headers"]["Content-Length"]) == len(received["body"])
+    assert json.loads(received["body"])["file"]["data"] == base64.b64encode(
+        path.read_bytes()
+    ).decode("ascii")
+
+
+def test_async_version_checked_once():
+    version_requests = []
+
+    def handler(request):
+        if request.url.path == "/":
+            version_requests.append(request)
+        return _handler(request)
+
+    async def run(**kwargs):
+        async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncPAIClient(
+            url="http://localhost:8080", async_client=async_client, **kwargs
+        ) as client:
+            checked = len(version_requests)
+            await asyncio.gather(
+                *[client.process_text({"text": [str(i)]}) for i in range(20)]
+            )
+            return checked
+
+    assert asyncio.run(run()) == 0
+    assert len(version_requests) == 1
+    assert asyncio.run(run(version_check="eager")) == 2
+    assert len(version_requests) == 2
+    asyncio.run(run(version_check="off"))
+    assert len(version_requests) == 2
+
+
+def test_async_version_check_with_client_created_outside_the_loop():
+    version_requests = []
+
+    def handler(request):
+        if request.url.path == "/":
+            version_requests.append(request)
+        return _handler(request)
+
+    client = AsyncPAIClient(
+        url="http://localhost:8080",
+        async_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    async def run():
+        async with client:
+            await asyncio.gather(
+                *[client.process_text({"text": [str(i)]}) for i in range(20)]
+            )
+
+    asyncio.run(run())
+    assert len(version_requests) == 1
@@ -1,6 +1,38 @@
+import gzip
+import json
+import socket
+import time
+from urllib.parse import urlparse
+
 import pytest
+import requests
 
+from ..components import (
+    BatchedTextResponse,
+    CircuitBreaker,
+    CircuitOpenError,
+    CompressionPolicy,
+    File,
+    HedgingPolicy,
+    JSONCodec,
+    LoadBalancer,
+    NerTextRequest,
+    PAIURIs,
+    ProcessFileBase64Request,
+    ProcessTextRequest,
+    RequestTemplate,
+    RetryPolicy,
+    Timeout,
+    circuit_breaker,
+    get_codec,
+    get_timeout,
+    pack_texts,
+    timeouts,
+)
+from ..components.retry import _parse_retry_after
 from ..pai_client import PAIClient
+from . import utils
+from .utils import MockAdapter, echo_text_handler, mock_client
 
 
 def test_initialization_with_auth():
@@ -17,3 +49,959 @@ def test_initialization_error_message():
     assert e.match(
         "PAIClient needs either a url, or a scheme and host to initialize. You can find more information on which url to use here: https://docs.private-ai.com/thin-client/"
     )
+
+
+def test_get_and_post_share_pooled_session():
+    client = PAIClient(url="http://localhost:8080", pool_maxsize=32, pool_block=True)
+    assert client.get.session is client.post.session is client.session
+    adapter = client.session.get_adapter("http://localhost:8080")
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block is True
+
+
+def test_keep_alive_disabled():
+    client = PAIClient(url="http://localhost:8080", keep_alive=False)
+    assert client.session.headers["Connection"] == "close"
+
+
+def test_close_only_owned_session(monkeypatch):
+    closed = []
+    session = requests.Session()
+    monkeypatch.setattr(session, "close", lambda: closed.append("external"))
+    with PAIClient(url="http://localhost:8080", session=session) as client:
+        assert client.session is session
+    assert closed == []
+
+    client = PAIClient(url="http://localhost:8080")
+    monkeypatch.setattr(client.session, "close", lambda: closed.append("owned"))
+    with client:
+        pass
+    assert closed == ["owned"]
+
+
+def test_process_text_batched_packs_and_reassembles():
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    texts = ["aaaa", "bb", "cccccc", "d", "ee", "f"]
+    response = client.process_text_batched(texts, max_items=3, max_chars=8)
+
+    sent = [json.loads(r.body)["text"] for r in adapter.requests if r.method == "POST"]
+    assert sent == [["aaaa", "bb"], ["cccccc", "d"], ["ee", "f"]]
+    assert isinstance(response, BatchedTextResponse)
+    assert response.processed_text == [f"[{text}]" for text in texts]
+    assert response.characters_processed == [len(text) for text in texts]
+    assert [entity[0]["text"] for entity in response.entities] == texts
+    assert response.best_labels == ["NAME"] * len(texts)
+
+
+def test_process_text_with_request_template():
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    template = RequestTemplate(ProcessTextRequest(text=[], link_batch=True))
+    response = client.process_text(template.with_text(["a", "b"]))
+
+    assert json.loads(adapter.requests[-1].body) == {
+        "text": ["a", "b"],
+        "link_batch": True,
+    }
+    assert adapter.requests[-1].headers["Content-Type"] == "application/json"
+    assert response.processed_text == ["[a]", "[b]"]
+    with pytest.raises(ValueError, match="NerTextRequest"):
+        client.ner_text(template.with_text(["a"]))
+    with pytest.raises(ValueError, match="ProcessTextRequest"):
+        client.process_text(RequestTemplate(NerTextRequest(text=[])).with_text(["a"]))
+
+
+def test_process_text_batched_never_splits_linked_groups():
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    texts = ["a", ["b", "c", "d"], "e", "f"]
+    response = client.process_text_batched(texts, max_items=2, max_chars=100)
+
+    sent = [json.loads(r.body) for r in adapter.requests if r.method == "POST"]
+    assert [(body["text"], body.get("link_batch")) for body in sent] == [
+        (["a"], None),
+        (["b", "c", "d"], True),
+        (["e", "f"], None),
+    ]
+    assert response.processed_text == ["[a]", "[b]", "[c]", "[d]", "[e]", "[f]"]
+
+
+def test_process_text_batched_link_batch_sends_one_group():
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    client.process_text_batched(["a", "b", "c"], max_items=1, link_batch=True)
+
+    sent = [json.loads(r.body) for r in adapter.requests if r.method == "POST"]
+    assert sent == [{"text": ["a", "b", "c"], "link_batch": True}]
+
+
+def test_pack_texts_oversized_text_is_sent_alone():
+    assert pack_texts(["a", "x" * 20, "b"], max_items=10, max_chars=5) == [
+        (["a"], False),
+        (["x" * 20], False),
+        (["b"], False),
+    ]
+
+
+def test_pack_texts_skips_empty_groups():
+    assert pack_texts(["a", [], "b", [], ["c"]], max_items=10, max_chars=10) == [
+        (["a", "b"], False),
+        (["c"], True),
+    ]
+
+
+@pytest.mark.parametrize("texts", [[], [[]], [[], []]])
+def test_process_text_batched_rejects_no_texts(texts):
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    error_msg = "Invalid value for texts. Accepted value is a list containing at least one text."
+    with pytest.raises(ValueError) as excinfo:
+        client.process_text_batched(texts)
+    assert error_msg in str(excinfo.value)
+    with pytest.raises(ValueError):
+        client.process_text_batched(texts, link_batch=True)
+    assert not [r for r in adapter.requests if r.method == "POST"]
+
+
+def _slow_echo_handler(path, payload):
+    text = payload["text"][0]
+    if text == "fail":
+        return 400, {"detail": "bad request"}
+    time.sleep(0.05 if text == "slow" else 0.001)
+    return echo_text_handler(path, payload)
+
+
+def test_map_ordered_captures_errors():
+    client = PAIClient(url="http://localhost:8080")
+    mock_client(client, _slow_echo_handler)
+    texts = ["slow", "a", "fail", "b"]
+    results = list(
+        client.map("process_text", ({"text": [t]} for t in texts), concurrency=3)
+    )
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert [result.ok for result in results] == [True, True, False, True]
+    assert isinstance(results[2].error, requests.HTTPError)
+    assert results[3].response.processed_text == ["[b]"]
+
+
+def test_map_as_completed():
+    client = PAIClient(url="http://localhost:8080")
+    mock_client(client, _slow_echo_handler)
+    texts = ["slow", "a", "b"]
+    results = list(
+        client.map(
+            "ner_text", [{"text": [t]} for t in texts], concurrency=3, ordered=False
+        )
+    )
+    assert sorted(result.index for result in results) == [0, 1, 2]
+    assert results[-1].index == 0
+
+
+def test_map_bounds_in_flight_requests():
+    pulled = []
+
+    def requests_iter():
+        for i in range(100):
+            pulled.append(i)
+            yield {"text": [str(i)]}
+
+    client = PAIClient(url="http://localhost:8080")
+    mock_client(client, echo_text_handler)
+    results = client.map("analyze_text", requests_iter(), concurrency=4)
+    next(results)
+    assert len(pulled) <= 5
+    results.close()
+
+
+def test_map_invalid_endpoint():
+    client = PAIClient(url="http://localhost:8080")
+    with pytest.raises(ValueError, match="get_version is not valid"):
+        client.map("get_version", [])
+
+
+def test_map_invalid_arguments_raise_on_call():
+    client = PAIClient(url="http://localhost:8080")
+    with pytest.raises(ValueError, match="concurrency must be a positive integer"):
+        client.map("process_text", [], concurrency=0)
+    with pytest.raises(ValueError, match="Invalid value for"):
+        client.map("process_text", [], timeout=-1)
+
+
+class CountingCodec(JSONCodec):
+    def __init__(self):
+        self.calls = []
+
+    def dumps(self, obj):
+        self.calls.append("dumps")
+        return super(CountingCodec, self).dumps(obj)
+
+    def loads(self, data):
+        self.calls.append("loads")
+        return super(CountingCodec, self).loads(data)
+
+
+def test_client_uses_selected_json_codec():
+    codec = CountingCodec()
+    client = PAIClient(url="http://localhost:8080", json_codec=codec)
+    adapter = mock_client(client, echo_text_handler)
+    response = client.process_text({"text": ["héllo"]})
+
+    assert response.processed_text == ["[héllo]"]
+    post = [r for r in adapter.requests if r.method == "POST"][0]
+    assert isinstance(post.body, bytes)
+    assert post.headers["Content-Type"] == "application/json"
+    assert json.loads(post.body) == {"text": ["héllo"]}
+    # version check and process text responses, and the process text payload
+    assert sorted(codec.calls) == ["dumps", "loads", "loads"]
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "ujson"])
+def test_json_codecs_round_trip(name):
+    try:
+        codec = get_codec(name)
+    except ImportError:
+        pytest.skip(f"{name} is not installed")
+    payload = {"text": ["My name is John", "Ünïcödé"], "link_batch": True}
+    assert codec.loads(codec.dumps(payload)) == payload
+
+
+def test_invalid_json_codec():
+    with pytest.raises(ValueError, match="simdjson is not valid"):
+        PAIClient(url="http://localhost:8080", json_codec="simdjson")
+
+
+def _failing_handler(statuses, headers=None):
+    # Answers with each status in turn, then echoes the texts
+    statuses = list(statuses)
+
+    def handler(path, payload):
+        if statuses:
+            status = statuses.pop(0)
+            if isinstance(status, Exception):
+                raise status
+            return status, {"detail": "busy"}, headers or {}
+        return echo_text_handler(path, payload)
+
+    return handler
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_retry_on_retryable_status(sleeps):
+    client = PAIClient(
+        url="http://localhost:8080",
+        retry_policy=RetryPolicy(max_attempts=3, backoff_base=0.5, jitter=False),
+    )
+    adapter = mock_client(client, _failing_handler([503, 429]))
+
+    response = client.process_text({"text": ["John"]})
+    assert response.processed_text == ["[John]"]
+    text_requests = [r for r in adapter.requests if r.url.endswith("/process/text")]
+    assert len(text_requests) == 3
+    assert sleeps == [0.5, 1.0]
+    assert client.retry_stats.retries == 2
+    assert client.retry_stats.retried == {503: 1, 429: 1}
+    assert client.retry_stats.exhausted == 0
+
+
+def test_retry_exhausted(sleeps):
+    client = PAIClient(
+        url="http://localhost:8080",
+        retry_policy=RetryPolicy(max_attempts=2, backoff_base=0),
+    )
+    mock_client(client, _failing_handler([503] * 5))
+
+    with pytest.raises(requests.HTTPError):
+        client.process_text({"text": ["John"]})
+    assert client.retry_stats.retries == 1
+    assert client.retry_stats.exhausted == 1
+
+
+def test_no_retry_without_policy():
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, _failing_handler([503]))
+
+    with pytest.raises(requests.HTTPError):
+        client.process_text({"text": ["John"]})
+    assert len([r for r in adapter.requests if r.url.endswith("/process/text")]) == 1
+    assert client.retry_stats.retries == 0
+
+
+def test_retry_after_is_respected(sleeps):
+    client = PAIClient(
+        url="http://localhost:8080",
+        retry_policy=RetryPolicy(backoff_max=10),
+    )
+    mock_client(client, _failing_handler([429, 429], {"Retry-After": "3"}))
+    client.process_text({"text": ["John"]})
+    assert sleeps == [3.0, 3.0]
+
+    client.retry_policy.backoff_max = 2
+    mock_client(client, _failing_handler([429], {"Retry-After": "3"}))
+    client.process_text({"text": ["John"]})
+    assert sleeps[-1] == 2
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after("5") == 5.0
+    assert _parse_retry_after("-5") == 0.0
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert _parse_retry_after("soon") is None
+    assert _parse_retry_after(None) is None
+
+
+def test_retry_non_idempotent_endpoint(sleeps):
+    client = PAIClient(
+        url="http://localhost:8080", retry_policy=RetryPolicy(backoff_base=0)
+    )
+    mock_client(client, _failing_handler([502]))
+    with pytest.raises(requests.HTTPError):
+        client.process_files_uri({"uri": "/data/file.pdf"})
+
+    mock_client(client, _failing_handler([503, requests.ConnectionError()]))
+    with pytest.raises(requests.ConnectionError):
+        client.process_files_uri({"uri": "/data/file.pdf"})
+    assert client.retry_stats.retried == {503: 1}
+
+
+def test_retry_refused_connection_on_non_idempotent_endpoint(sleeps):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    client = PAIClient(
+        url=f"http://127.0.0.1:{port}",
+        version_check="off",
+        retry_policy=RetryPolicy(max_attempts=2, backoff_base=0),
+    )
+    with pytest.raises(requests.ConnectionError):
+        client.process_files_uri({"uri": "/data/file.pdf"})
+    assert client.retry_stats.retried == {"ConnectionError": 1}
+    assert client.retry_stats.exhausted == 1
+
+
+def test_retry_connection_errors_on_idempotent_requests(sleeps):
+    client = PAIClient(
+        url="http://localhost:8080", retry_policy=RetryPolicy(backoff_base=0)
+    )
+    mock_client(
+        client,
+        _failing_handler([requests.ConnectionError(), requests.ReadTimeout()]),
+    )
+    response = client.process_text({"text": ["John"]})
+    assert response.processed_text == ["[John]"]
+    assert client.retry_stats.retried == {"ConnectionError": 1, "ReadTimeout": 1}
+
+
+def test_retry_rewinds_streamed_file(sleeps, tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"some file contents")
+    bodies = []
+
+    def handler(path, payload):
+        bodies.append(payload["file"]["data"])
+        if len(bodies) == 1:
+            return 503, {"detail": "busy"}
+        return 200, {"processed_file": payload["file"]["data"]}
+
+    client = PAIClient(
+        url="http://localhost:8080", retry_policy=RetryPolicy(backoff_base=0)
+    )
+    mock_client(client, handler)
+    request_object = ProcessFileBase64Request(file=File.from_path(path, "text/plain"))
+    client.process_files_base64(request_object)
+    assert bodies[0] == bodies[1] != ""
+
+
+def test_invalid_retry_policy():
+    with pytest.raises(ValueError, match="Invalid value for max_attempts"):
+        RetryPolicy(max_attempts=0)
+
+
+def _fleet_client(host_statuses, **kwargs):
+    # A client for a fleet of containers where each answers process/text and healthz
+    # with the status given for it, echoing the texts when it is 200
+    client = PAIClient(url=[f"http://{host}" for host in host_statuses], **kwargs)
+
+    def handler(path, payload):
+        host = urlparse(adapter.requests[-1].url).netloc
+        status = host_statuses[host]
+        if status != 200:
+            return status, {"detail": "unavailable"}
+        if path == "/healthz":
+            return 200, {}
+        return echo_text_handler(path, payload)
+
+    adapter = mock_client(client, handler)
+    return client, adapter
+
+
+def _hosts(adapter, path="/process/text"):
+    return [
+        urlparse(request.url).netloc
+        for request in adapter.requests
+        if urlparse(request.url).path == path
+    ]
+
+
+def test_uris_for_multiple_urls():
+    uris = PAIURIs(url=["http://a:8080/", "http://b:8080"])
+    assert uris.pai_uris == ["http://a:8080/", "http://b:8080"]
+    assert uris.process_text == "http://a:8080/process/text"
+    assert uris.for_base(uris.process_text, "http://b:8080") == (
+        "http://b:8080/process/text"
+    )
+    assert uris.for_base(uris.version, "http://b:8080") == "http://b:8080/"
+    with pytest.raises(ValueError):
+        PAIURIs(url=[])
+
+
+def test_single_url_has_no_load_balancer():
+    assert PAIClient(url="http://localhost:8080").load_balancer is None
+
+
+def test_load_balancing_spreads_requests():
+    client, adapter = _fleet_client({"a": 200, "b": 200})
+    for _ in range(30):
+        assert client.process_text({"text": ["John"]}).processed_text == ["[John]"]
+    assert set(_hosts(adapter)) == {"a", "b"}
+
+
+def test_least_outstanding_prefers_idle_host():
+    balancer = LoadBalancer(["http://a", "http://b"])
+    with balancer.acquire() as busy:
+        assert busy.outstanding == 1
+        for _ in range(10):
+            assert balancer.choose() is not busy
+    assert busy.outstanding == 0
+
+
+def test_power_of_two_avoids_busiest_host():
+    balancer = LoadBalancer(["http://a", "http://b", "http://c"], "power_of_two")
+    balancer.hosts[0].outstanding = 5
+    for _ in range(30):
+        assert balancer.choose() is not balancer.hosts[0]
+
+
+def test_failing_host_is_ejected(sleeps):
+    client, adapter = _fleet_client(
+        {"a": 200, "b": 503},
+        eject_after=2,
+        retry_policy=RetryPolicy(max_attempts=5, backoff_base=0),
+    )
+    for _ in range(20):
+        assert client.process_text({"text": ["John"]}).processed_text == ["[John]"]
+    assert _hosts(adapter).count("b") == 2
+    a, b = client.load_balancer.hosts
+    assert a.healthy and not b.healthy
+
+
+def test_all_hosts_ejected_still_sends():
+    balancer = LoadBalancer(["http://a", "http://b"], eject_after=1)
+    for host in balancer.hosts:
+        balancer.record_failure(host)
+    assert not any(host.healthy for host in balancer.hosts)
+    assert balancer.choose() in balancer.hosts
+
+
+def test_check_health_ejects_and_readmits():
+    host_statuses = {"a": 200, "b": 500}
+    client, adapter = _fleet_client(host_statuses)
+    assert client.check_health() == {"http://a": True, "http://b": False}
+    assert _hosts(adapter, "/healthz") == ["a", "b"]
+    for _ in range(10):
+        client.process_text({"text": ["John"]})
+    assert set(_hosts(adapter)) == {"a"}
+
+    host_statuses["b"] = 200
+    assert client.check_health() == {"http://a": True, "http://b": True}
+    assert all(host.healthy for host in client.load_balancer.hosts)
+
+
+def test_check_health_uses_health_check_timeout():
+    client, adapter = _fleet_client({"a": 200, "b": 200}, health_check_timeout=2)
+    client.check_health()
+    assert adapter.timeouts == [(2, 2), (2, 2)]
+
+
+def test_invalid_load_balancing():
+    with pytest.raises(ValueError, match="load_balancing can only be one of"):
+        PAIClient(url=["http://a", "http://b"], load_balancing="round_robin")
+
+
+def test_circuit_opens_and_fails_fast():
+    client = PAIClient(
+        url="http://localhost:8080",
+        circuit_breaker=CircuitBreaker(minimum_requests=4, window_size=4),
+    )
+    adapter = mock_client(client, _failing_handler([503] * 3))
+    assert client.circuit_states == {"http://localhost:8080": "closed"}
+
+    # With the successful version check, the third failure makes 3 of 4 requests fail
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            client.process_text({"text": ["John"]})
+    assert client.circuit_states == {"http://localhost:8080": "open"}
+
+    sent = len(adapter.requests)
+    with pytest.raises(CircuitOpenError):
+        client.process_text({"text": ["John"]})
+    assert len(adapter.requests) == sent
+    assert client.circuit_breaker.rejected == 1
+
+
+def test_circuit_half_open(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(minimum_requests=2, window_size=2, cooldown=10)
+    breaker.record_failure("http://a")
+    breaker.record_failure("http://a")
+    assert breaker.state("http://a") == "open"
+
+    now[0] = 10
+    assert breaker.state("http://a") == "half_open"
+    breaker.before_request("http://a")
+    assert not breaker.available("http://a")
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("http://a")
+    breaker.record_failure("http://a")
+    assert breaker.state("http://a") == "open"
+
+    now[0] = 20
+    breaker.before_request("http://a")
+    breaker.record_response("http://a", 200)
+    assert breaker.state("http://a") == "closed"
+    assert breaker.states == {"http://a": "closed"}
+
+
+def test_circuit_breaker_routes_to_other_hosts(sleeps):
+    client, adapter = _fleet_client(
+        {"a": 200, "b": 503},
+        eject_after=100,
+        circuit_breaker=CircuitBreaker(minimum_requests=2, window_size=2),
+        retry_policy=RetryPolicy(max_attempts=5, backoff_base=0),
+    )
+    for _ in range(20):
+        assert client.process_text({"text": ["John"]}).processed_text == ["[John]"]
+    assert _hosts(adapter).count("b") <= 2
+    assert client.circuit_states == {"http://a": "closed", "http://b": "open"}
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"failure_rate_threshold": 0}, "Invalid value for failure_rate_threshold"),
+        ({"minimum_requests": 0}, "Invalid value for minimum_requests"),
+        ({"half_open_requests": 1.5}, "Invalid value for half_open_requests"),
+    ],
+)
+def test_invalid_circuit_breaker(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        CircuitBreaker(**kwargs)
+
+
+def test_client_timeout():
+    client = PAIClient(url="http://localhost:8080", timeout=5)
+    adapter = mock_client(client, echo_text_handler)
+    client.process_text({"text": ["John"]})
+    assert adapter.timeouts == [(5, 5), (5, 5)]
+
+    client.process_text({"text": ["John"]}, timeout=Timeout(connect=1, read=2))
+    client.get_version(timeout=(3, 4))
+    assert adapter.timeouts[2:] == [(1, 2), (3, 4)]
+
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    client.process_text({"text": ["John"]})
+    assert adapter.timeouts == [None, None]
+
+
+def test_map_timeout():
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    requests_ = [{"text": [text]} for text in ["John", "Jane"]]
+    assert all(result.ok for result in client.map("process_text", requests_, timeout=7))
+    assert adapter.timeouts[-2:] == [(7, 7), (7, 7)]
+
+
+def test_deadline_spans_retries(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    client = PAIClient(
+        url="http://localhost:8080",
+        retry_policy=RetryPolicy(max_attempts=10, backoff_base=4, jitter=False),
+        timeout=Timeout(read=30, deadline=10),
+    )
+    adapter = mock_client(client, _failing_handler([503] * 10))
+    client.get_version()
+
+    # The second attempt starts at 4s, and the next one could not start before 12s
+    with pytest.raises(requests.HTTPError):
+        client.process_text({"text": ["John"]})
+    assert adapter.timeouts[1:] == [(10, 10), (6, 6)]
+    assert client.retry_stats.retries == 1
+    assert client.retry_stats.exhausted == 1
+
+
+def test_timeout_for_attempt(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(timeouts.time, "monotonic", lambda: now[0])
+    timeout = Timeout(connect=2, deadline=5)
+    deadline_at = timeout.start()
+    assert timeout.for_attempt(deadline_at) == (2, 5)
+    now[0] = 4
+    assert timeout.for_attempt(deadline_at) == (1, 1)
+    now[0] = 5
+    with pytest.raises(timeouts.DeadlineExceeded):
+        timeout.for_attempt(deadline_at)
+    assert Timeout().for_attempt() is None
+
+
+def test_get_timeout():
+    assert (get_timeout(3).connect, get_timeout(3).read) == (3, 3)
+    assert (get_timeout((1, 2)).connect, get_timeout((1, 2)).read) == (1, 2)
+    assert get_timeout(None).for_attempt() is None
+    with pytest.raises(ValueError, match="timeout can only be"):
+        get_timeout("5")
+    with pytest.raises(ValueError, match="Invalid value for deadline"):
+        Timeout(deadline=0)
+    with pytest.raises(ValueError, match="timeout can only be"):
+        get_timeout(True)
+    with pytest.raises(ValueError, match="Invalid value for connect"):
+        get_timeout((True, True))
+
+
+def test_stream_and_timeout_are_keyword_only():
+    client = PAIClient(url="http://localhost:8080", version_check="off")
+    mock_client(client, echo_text_handler)
+    for endpoint in ["process_text", "ner_text", "analyze_text"]:
+        with pytest.raises(TypeError):
+            getattr(client, endpoint)({"text": ["a"]}, True)
+    with pytest.raises(TypeError):
+        client.post.process_files_base64({"file": {}}, True)
+
+
+def _version_requests(adapter):
+    return [r for r in adapter.requests if urlparse(r.url).path == "/"]
+
+
+def test_version_checked_once(monkeypatch, caplog):
+    monkeypatch.setattr(utils, "__version__", "0.0.1")
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    for _ in range(5):
+        client.process_text({"text": ["John"]})
+    assert len(_version_requests(adapter)) == 1
+    assert caplog.text.count("Version mismatch") == 1
+
+
+def test_version_check_ttl(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    client = PAIClient(url="http://localhost:8080", version_check_ttl=60)
+    adapter = mock_client(client, echo_text_handler)
+    client.process_text({"text": ["John"]})
+    now[0] = 59
+    client.process_text({"text": ["John"]})
+    assert len(_version_requests(adapter)) == 1
+    now[0] = 60
+    client.process_text({"text": ["John"]})
+    assert len(_version_requests(adapter)) == 2
+
+
+def test_version_check_eager_and_off():
+    session = requests.Session()
+    adapter = MockAdapter(echo_text_handler)
+    session.mount("http://", adapter)
+    PAIClient(url="http://localhost:8080", session=session, version_check="eager")
+    assert len(_version_requests(adapter)) == 1
+
+    client = PAIClient(url="http://localhost:8080", version_check="off")
+    adapter = mock_client(client, echo_text_handler)
+    client.process_text({"text": ["John"]})
+    assert _version_requests(adapter) == []
+
+
+def test_version_checked_once_concurrently(monkeypatch):
+    client = PAIClient(url="http://localhost:8080")
+    adapter = mock_client(client, echo_text_handler)
+    get_version = client.get_version
+
+    def slow_get_version():
+        time.sleep(0.05)
+        return get_version()
+
+    monkeypatch.setattr(client, "get_version", slow_get_version)
+    requests_ = [{"text": [str(i)]} for i in range(16)]
+    assert all(r.ok for r in client.map("process_text", requests_, concurrency=8))
+    assert len(_version_requests(adapter)) == 1
+
+
+def test_invalid_version_check():
+    with pytest.raises(ValueError, match="version_check can only be one of"):
+        PAIClient(url="http://localhost:8080", version_check="always")
+
+
+def test_compression_above_threshold():
+    client = PAIClient(
+        url="http://localhost:8080",
+        compression=CompressionPolicy(threshold=1000),
+        version_check="off",
+    )
+    adapter = mock_client(client, echo_text_handler)
+    client.process_text({"text": ["short"]})
+    client.process_text({"text": ["a long text " * 200]})
+
+    small, large = adapter.requests
+    assert "Content-Encoding" not in small.headers
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(large.body)) == {"text": ["a long text " * 200]}
+    stats = client.compression_stats
+    assert stats.compressed == 1
+    assert stats.bytes_in == len(
+        json.dumps({"text": ["a long text " * 200]}, separators=(",", ":"))
+    )
+    assert stats.bytes_out == len(large.body)
+    assert stats.bytes_saved > 0 and stats.cpu_time >= 0
+
+
+def test_compression_thresholds_per_endpoint():
+    client = PAIClient(
+        url="http://localhost:8080",
+        compression=CompressionPolicy(
+            threshold=0, thresholds={"ner_text": None, "analyze_text": 10**6}
+        ),
+        version_check="off",
+    )
+    adapter = mock_client(client, echo_text_handler)
+    payload = {"text": ["a long text " * 200]}
+    client.process_text(payload)
+    client.ner_text(payload)
+    client.analyze_text(payload)
+    assert [r.headers.get("Content-Encoding") for r in adapter.requests] == [
+        "gzip",
+        None,
+        None,
+    ]
+
+
+def test_incompressible_body_is_sent_uncompressed():
+    client = PAIClient(
+        url="http://localhost:8080",
+        compression=CompressionPolicy(threshold=0),
+        version_check="off",
+    )
+    adapter = mock_client(client, echo_text_handler)
+    client.process_text({"text": ["a"]})
+    assert "Content-Encoding" not in adapter.requests[0].headers
+    assert client.compression_stats.compressed == 0
+    assert client.compression_stats.uncompressed == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs,message",
+    [
+        ({"encoding": "br"}, "br is not valid. encoding can only be one of"),
+        ({"threshold": -1}, "Invalid value for threshold."),
+        ({"thresholds": {"version": 0}}, "version is not valid. thresholds can only"),
+        ({"thresholds": {"ner_text": 1.5}}, "Invalid value for ner_text."),
+    ],
+)
+def test_invalid_compression_policy(kwargs, message):
+    with pytest.raises(ValueError) as excinfo:
+        CompressionPolicy(**kwargs)
+    assert message in str(excinfo.value)
+
+
+def test_zstd_compression():
+    zstandard = pytest.importorskip("zstandard")
+    policy = CompressionPolicy(encoding="zstd", threshold=0)
+    data = b'{"text":["' + b"a long text " * 200 + b'"]}'
+    compressed, encoding = policy.apply(data)
+    assert encoding == "zstd"
+    assert zstandard.ZstdDecompressor().decompress(compressed) == data
+
+
+def test_accept_encoding_is_advertised():
+    client = PAIClient(url="http://localhost:8080", version_check="off")
+    adapter = mock_client(client, echo_text_handler)
+    client.process_text({"text": ["a"]})
+    assert "gzip" in adapter.requests[0].headers["Accept-Encoding"]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_compressed_text_response(stream):
+    client = PAIClient(url="http://localhost:8080", version_check="off")
+    adapter = mock_client(client, echo_text_handler, compress_responses=True)
+    texts = [f"text {i}" for i in range(1000)]
+    response = client.process_text({"text": texts}, stream=stream)
+
+    assert response().headers["Content-Encoding"] == "gzip"
+    assert response.processed_text == [f"[{text}]" for text in texts]
+    if stream:
+        # The body was parsed straight from the connection
+        assert response()._content is False
+        assert response().raw.closed
+
+
+def test_process_text_batched_streams_responses():
+    client = PAIClient(url="http://localhost:8080", version_check="off")
+    mock_client(client, echo_text_handler, compress_responses=True)
+    texts = ["aaaa", "bb", "cccccc", "d"]
+    response = client.process_text_batched(texts, max_items=2)
+    assert response.processed_text == [f"[{text}]" for text in texts]
+    assert all(r().raw.closed for r in response.responses)
+
+
+def _hedged_client(policy, slow_requests=1, delay=0.5):
+    # A client for two containers where the first slow_requests process_text requests
+    # are answered after delay seconds, whichever container they go to
+    client = PAIClient(url=["http://a", "http://b"], hedging=policy)
+    received = []
+
+    def handler(path, payload):
+        received.append(urlparse(adapter.current.request.url).netloc)
+        if len(received) <= slow_requests:
+            time.sleep(delay)
+        return echo_text_handler(path, payload)
+
+    adapter = mock_client(client, handler, compress_responses=True)
+    return client, adapter
+
+
+def _warm_up(policy, latency=0.01, samples=20):
+    for _ in range(samples):
+        policy.record_latency("process_text", latency)
+
+
+def test_hedged_request_goes_to_other_host():
+    policy = HedgingPolicy(budget=1)
+    _warm_up(policy)
+    client, adapter = _hedged_client(policy)
+    start = time.monotonic()
+    response = client.process_text({"text": ["John"]})
+    assert time.monotonic() - start < 0.4
+    assert response.processed_text == ["[John]"]
+    assert sorted(_hosts(adapter)) == ["a", "b"]
+    stats = client.hedging_stats
+    assert (stats.requests, stats.hedged, stats.hedge_wins) == (1, 1, 1)
+
+
+def test_hedging_closes_losing_response():
+    policy = HedgingPolicy(budget=1)
+    _warm_up(policy)
+    client, adapter = _hedged_client(policy, delay=0.2)
+    client.process_text({"text": ["John"]})
+    time.sleep(0.4)
+    # The slow response, answered last, was closed when it arrived
+    loser = adapter.responses[-1]
+    assert loser.raw.closed and loser._content is False
+
+
+def test_fast_request_is_not_hedged():
+    policy = HedgingPolicy(budget=1)
+    _warm_up(policy, latency=1.0)
+    client, adapter = _hedged_client(policy, slow_requests=0)
+    client.process_text({"text": ["John"]})
+    assert len(_hosts(adapter)) == 1
+    assert client.hedging_stats.hedged == 0
+
+
+def test_hedging_requires_several_urls():
+    error_msg = (
+        "Invalid value for hedging. Accepted value is None when a single url is given"
+    )
+    with pytest.raises(ValueError) as excinfo:
+        PAIClient(url="http://a", hedging=HedgingPolicy())
+    assert error_msg in str(excinfo.value)
+
+
+def test_no_hedge_without_another_available_host():
+    policy = HedgingPolicy(budget=1)
+    _warm_up(policy)
+    client, adapter = _hedged_client(policy, delay=0.1)
+    client.load_balancer.hosts[1].ejected_until = time.monotonic() + 60
+    client.process_text({"text": ["John"]})
+    assert _hosts(adapter) == ["a"]
+    assert client.hedging_stats.hedged == 0
+
+
+def test_no_hedge_when_workers_are_busy():
+    policy = HedgingPolicy(budget=1, max_workers=1)
+    _warm_up(policy)
+    client, adapter = _hedged_client(policy, delay=0.1)
+    client.process_text({"text": ["John"]})
+    assert len(_hosts(adapter)) == 1
+    assert client.hedging_stats.hedged == 0
+    assert policy._credit == 1
+
+
+def test_hedging_budget():
+    policy = HedgingPolicy(budget=0.5)
+    _warm_up(policy)
+    client, adapter = _hedged_client(policy, slow_requests=2, delay=0.1)
+    client.process_text({"text": ["John"]})
+    client.process_text({"text": ["John"]})
+    stats = client.hedging_stats
+    # The first request only earned half a hedge
+    assert (stats.requests, stats.hedged, stats.budget_exhausted) == (2, 1, 1)
+
+
+def test_hedging_waits_for_latencies():
+    policy = HedgingPolicy(budget=1, min_samples=3)
+    client, adapter = _hedged_client(policy, slow_requests=0)
+    for _ in range(3):
+        assert policy.delay("process_text") is None
+        client.process_text({"text": ["John"]})
+    assert policy.delay("process_text") is not None
+    assert client.hedging_stats.requests == 3
+    assert client.hedging_stats.hedged == 0
+
+
+def test_hedging_delay_percentile():
+    policy = HedgingPolicy(percentile=90, window=100, min_delay=0.05)
+    for latency in range(200):
+        policy.record_latency("process_text", latency / 1000)
+    # Only the last 100 latencies, 0.1 to 0.199 seconds, are kept
+    assert policy.delay("process_text") == pytest.approx(0.19)
+    policy = HedgingPolicy(min_delay=0.05)
+    _warm_up(policy)
+    assert policy.delay("process_text") == 0.05
+
+
+def test_hedging_skips_other_endpoints():
+    policy = HedgingPolicy(budget=1, endpoints=["ner_text"])
+    _warm_up(policy)
+    client, adapter = _hedged_client(policy, delay=0.1)
+    client.process_text({"text": ["John"]})
+    assert len(_hosts(adapter)) == 1
+    assert client.hedging_stats.requests == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"percentile": 100}, "Invalid value for percentile"),
+        ({"budget": -1}, "Invalid value for budget or max_burst"),
+        ({"window": 0}, "Invalid value for window"),
+        ({"max_workers": 0}, "Invalid value for max_workers"),
+        (
+            {"endpoints": ["process_files_uri"]},
+            "process_files_uri is not valid. endpoints can only contain",
+        ),
+    ],
+)
+def test_invalid_hedging_policy(kwargs, message):
+    with pytest.raises(ValueError) as excinfo:
+        HedgingPolicy(**kwargs)
+    assert message in str(excinfo.value)
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+import requests
+
+from ..components import HTTP2Adapter, ProcessTextRequest, create_session
+from ..components.http2 import _StreamedBody
+from ..pai_client import PAIClient
+from .utils import H2Server, echo_text_handler
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("h2")
+
+
+def test_http2_session_mounts_http2_adapter():
+    session = create_session(http2=True)
+    assert isinstance(session.get_adapter("http://localhost:8080"), HTTP2Adapter)
+    assert isinstance(session.get_adapter("https://localhost:8080"), HTTP2Adapter)
+    session.close()
+
+
+def test_http2_requires_keep_alive():
+    error_msg = (
+        "Invalid value for keep_alive. Accepted value is True when http2 is enabled."
+    )
+    with pytest.raises(ValueError) as excinfo:
+        create_session(keep_alive=False, http2=True)
+    assert error_msg in str(excinfo.value)
+
+
+def test_http2_process_text():
+    with H2Server(echo_text_handler) as server:
+        with PAIClient(url=server.url, http2=True) as client:
+            response = client.process_text(ProcessTextRequest(text=["a", "bb"]))
+    assert response.processed_text == ["[a]", "[bb]"]
+    assert response.characters_processed == [1, 2]
+
+
+def test_http2_multiplexes_concurrent_requests():
+    with H2Server(echo_text_handler, delay=0.2) as server:
+        with PAIClient(url=server.url, http2=True, pool_maxsize=1) as client:
+            results = list(
+                client.map(
+                    "process_text",
+                    [{"text": [str(i)]} for i in range(20)],
+                    concurrency=20,
+                )
+            )
+    assert [result.response.processed_text for result in results] == [
+        [f"[{i}]"] for i in range(20)
+    ]
+    # The requests were in flight together over the same connection
+    assert server.connections == 1
+    assert server.max_in_flight > 1
+
+
+def test_http2_connection_error():
+    with H2Server(echo_text_handler) as server:
+        url = server.url
+    with PAIClient(url=url, http2=True, version_check="off") as client:
+        with pytest.raises(requests.ConnectionError):
+            client.process_text({"text": ["a"]})
+
+
+def test_http2_streamed_response():
+    payload = {"data": "x" * 100000}
+    with H2Server(lambda path, body: (200, payload)) as server:
+        session = create_session(http2=True)
+        response = session.post(server.url + "/bleep", json={}, stream=True)
+        assert json.loads(b"".join(response.iter_content(4096))) == payload
+        session.close()
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (httpx.ReadTimeout("timed out"), requests.ReadTimeout),
+        (httpx.RemoteProtocolError("reset"), requests.ConnectionError),
+    ],
+)
+def test_http2_streamed_body_errors_are_requests_errors(error, expected):
+    class Response:
+        async def aiter_bytes(self):
+            yield b"{"
+            raise error
+
+    adapter = HTTP2Adapter()
+    response = requests.Response()
+    response.raw = _StreamedBody(adapter, Response())
+    with pytest.raises(expected):
+        b"".join(response.iter_content(1))
+    adapter.close()
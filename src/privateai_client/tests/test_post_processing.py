@@ -1,10 +1,16 @@
+import copy
 import json
+import pickle
+import random
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 import requests
+from pyxdameraulevenshtein import damerau_levenshtein_distance
 
 from ..components.pai_responses import AnalyzeTextResponse
 from ..post_processing import (
+    CachedEntityProcessor,
     FuzzyMatchEntityProcessor,
     MarkerEntityProcessor,
     MaskEntityProcessor,
@@ -106,6 +112,62 @@ def test_deidentify_text_with_fuzzy_matching():
     assert text_out == ["My name is ####."]
 
 
+def _analyze_response(entities_per_text):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(
+        [
+            {"entities": entities, "entities_present": bool(entities)}
+            for entities in entities_per_text
+        ]
+    ).encode("utf-8")
+    return AnalyzeTextResponse(response)
+
+
+def _entity(text, stt_idx, label):
+    return {
+        "text": text,
+        "location": {"stt_idx": stt_idx, "end_idx": stt_idx + len(text)},
+        "best_label": label,
+    }
+
+
+def test_deidentify_text_multiple_entities_out_of_order():
+    text = "John Smith met Jane in Paris."
+    entities = [
+        _entity("Paris", 23, "LOCATION_CITY"),
+        _entity("John Smith", 0, "NAME"),
+        _entity("Jane", 15, "NAME"),
+    ]
+    text_out = deidentify_text(
+        text=[text],
+        response=_analyze_response([entities]),
+        entity_processors={"LOCATION_CITY": MaskEntityProcessor()},
+        default_processor=MarkerEntityProcessor(),
+    )
+    assert text_out == ["[NAME_1] met [NAME_2] in #####."]
+
+
+def test_deidentify_text_overlapping_entities():
+    text = "Dr. John Smith lives at 12 Main Street."
+    entities = [
+        _entity("John", 4, "NAME_GIVEN"),
+        _entity("John Smith", 4, "NAME"),
+        _entity("Smith lives", 9, "OCCUPATION"),
+        _entity("12 Main Street", 24, "LOCATION_ADDRESS"),
+        _entity("Main", 27, "LOCATION_ADDRESS_STREET"),
+    ]
+    processor = MarkerEntityProcessor()
+    text_out = deidentify_text(
+        text=[text],
+        response=_analyze_response([entities]),
+        entity_processors={},
+        default_processor=processor,
+    )
+    assert text_out == ["Dr. [NAME_1] lives at [LOCATION_ADDRESS_1]."]
+    assert dict(processor.counts) == {"NAME": 1, "LOCATION_ADDRESS": 1}
+
+
 # Mask processors
 def test_mask_processor():
     entity_text = "John"
@@ -286,3 +348,278 @@ def test_fuzzy_match_processor_invalid_attrs(
             masking_character=masking_character,
             ignore_casing=ignore_casing,
         )
+
+
+def _marker_batch(count):
+    texts, entities = [], []
+    for i in range(count):
+        texts.append(f"John met Jane and John{i}.")
+        entities.append(
+            [
+                _entity("John", 0, "NAME_GIVEN"),
+                _entity("Jane", 9, "NAME_GIVEN"),
+                _entity(f"John{i}", 18, "NAME"),
+            ]
+        )
+    return texts, _analyze_response(entities)
+
+
+@pytest.mark.parametrize("state_scope", ["batch", "text"])
+def test_deidentify_text_parallel_matches_sequential(state_scope):
+    texts, response = _marker_batch(37)
+    sequential_processor = MarkerEntityProcessor()
+    sequential = deidentify_text(
+        texts, response, {}, sequential_processor, state_scope=state_scope
+    )
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        parallel_processor = MarkerEntityProcessor()
+        parallel = deidentify_text(
+            texts,
+            response,
+            {},
+            parallel_processor,
+            executor=executor,
+            state_scope=state_scope,
+        )
+    assert parallel == sequential
+    assert parallel_processor.counts == sequential_processor.counts
+
+
+def test_deidentify_text_batch_scope_continues_counts():
+    texts, response = _marker_batch(3)
+    processor = MarkerEntityProcessor()
+    text_out = deidentify_text(texts, response, {}, processor, workers=2)
+    assert text_out[2] == "[NAME_GIVEN_5] met [NAME_GIVEN_6] and [NAME_3]."
+    assert processor.counts == {"NAME_GIVEN": 6, "NAME": 3}
+
+
+def test_deidentify_text_text_scope_restarts_counts():
+    texts, response = _marker_batch(3)
+    processor = MarkerEntityProcessor()
+    text_out = deidentify_text(
+        texts, response, {}, processor, workers=2, state_scope="text"
+    )
+    assert text_out[2] == "[NAME_GIVEN_1] met [NAME_GIVEN_2] and [NAME_1]."
+    assert processor.counts == {}
+
+
+def test_deidentify_text_invalid_state_scope():
+    texts, response = _marker_batch(1)
+    with pytest.raises(ValueError, match="Invalid value for state_scope"):
+        deidentify_text(
+            texts, response, {}, MarkerEntityProcessor(), state_scope="message"
+        )
+
+
+@pytest.mark.parametrize("threshold", [1, 2, 3])
+@pytest.mark.parametrize("ignore_casing", [True, False])
+def test_fuzzy_match_index_matches_brute_force(threshold, ignore_casing):
+    rng = random.Random(threshold)
+    alphabet = "abcAB"
+    known_words = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8)))
+        for _ in range(200)
+    ]
+    processor = FuzzyMatchEntityProcessor(
+        known_words_list=known_words,
+        threshold=threshold,
+        process_type="MASK",
+        ignore_casing=ignore_casing,
+    )
+    prepare = str.lower if ignore_casing else str
+    entities = []
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 10)))
+        entities.append({"text": text, "best_label": "NAME"})
+    expected = [
+        min(
+            damerau_levenshtein_distance(prepare(entity["text"]), prepare(word))
+            for word in known_words
+        )
+        <= threshold
+        for entity in entities
+    ]
+    masked = [processor(entity) != entity["text"] for entity in entities]
+    assert masked == expected
+    masked = [
+        processed != entity["text"]
+        for entity, processed in zip(entities, processor.process_many(entities))
+    ]
+    assert masked == expected
+
+
+@pytest.mark.parametrize("strategy", ["BLOCK", "ALLOW"])
+def test_fuzzy_match_process_many_matches_calls(strategy):
+    known_words = ["John", "Jonathan", "Mary", "Anne", ""]
+    entities = [
+        {"text": text, "best_label": label}
+        for text, label in [
+            ("Jon", "NAME_GIVEN"),
+            ("Mark", "NAME_GIVEN"),
+            ("jonahtan", "NAME"),
+            ("Jon", "NAME_GIVEN"),
+            ("Ann", "NAME"),
+            ("Bartholomew", "NAME"),
+            ("", "NAME"),
+        ]
+    ]
+    processor = FuzzyMatchEntityProcessor(known_words, 1, strategy=strategy)
+    batch_processor = FuzzyMatchEntityProcessor(known_words, 1, strategy=strategy)
+
+    assert batch_processor.process_many(entities) == [
+        processor(entity) for entity in entities
+    ]
+    assert batch_processor.counts == processor.counts
+
+
+def test_deidentify_text_uses_process_many():
+    class BatchProcessor(MarkerEntityProcessor):
+        def __init__(self):
+            super().__init__()
+            self.batches = []
+
+        def process_many(self, entities):
+            self.batches.append([entity["text"] for entity in entities])
+            return [self(entity) for entity in entities]
+
+    texts = ["John met Jane.", "Paris", "Mary"]
+    response = _analyze_response(
+        [
+            [_entity("Jane", 9, "NAME"), _entity("John", 0, "NAME")],
+            [_entity("Paris", 0, "LOCATION")],
+            [_entity("Mary", 0, "NAME")],
+        ]
+    )
+    processor = BatchProcessor()
+
+    text_out = deidentify_text(texts, response, {"NAME": processor}, processor)
+    assert text_out == ["[NAME_1] met [NAME_2].", "[LOCATION_1]", "[NAME_3]"]
+    assert processor.batches == [["John", "Jane", "Paris", "Mary"]]
+
+    processor = BatchProcessor()
+    text_out = deidentify_text(
+        texts, response, {"NAME": processor}, processor, state_scope="text"
+    )
+    assert text_out == ["[NAME_1] met [NAME_2].", "[LOCATION_1]", "[NAME_1]"]
+    assert processor.batches == [["John", "Jane"], ["Paris"], ["Mary"]]
+
+
+class CountingProcessor(MaskEntityProcessor):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def __call__(self, entity):
+        self.calls += 1
+        return super().__call__(entity)
+
+
+def test_cached_entity_processor():
+    processor = CountingProcessor()
+    cached = CachedEntityProcessor(processor, maxsize=2)
+    entities = [
+        {"text": text, "best_label": label}
+        for text, label in [
+            ("John", "NAME"),
+            ("John", "NAME"),
+            ("Acme", "ORGANIZATION"),
+            ("John", "NAME_GIVEN"),
+            ("John", "NAME"),
+        ]
+    ]
+
+    assert [cached(entity) for entity in entities] == ["####"] * 5
+    # ("John", "NAME") is evicted by ("John", "NAME_GIVEN") as the least recently used entry
+    assert processor.calls == 4
+    assert (cached.hits, cached.misses, cached.currsize) == (1, 4, 2)
+
+    cached.cache_clear()
+    assert (cached.hits, cached.misses, cached.currsize) == (0, 0, 0)
+
+
+def test_cached_entity_processor_process_many():
+    processor = CountingProcessor()
+    cached = CachedEntityProcessor(processor)
+    entities = [
+        {"text": text, "best_label": "NAME"} for text in ["John", "Jo", "John", "Jo"]
+    ]
+
+    assert cached.process_many(entities) == ["####", "##", "####", "##"]
+    assert cached.process_many(entities[:1]) == ["####"]
+    assert processor.calls == 2
+    assert (cached.hits, cached.misses) == (3, 2)
+
+
+@pytest.mark.parametrize(
+    "processor",
+    [
+        MarkerEntityProcessor(),
+        FuzzyMatchEntityProcessor(["John"], 1, process_type="MARKER"),
+    ],
+)
+def test_cached_entity_processor_bypasses_stateful(processor):
+    expected_processor = copy.deepcopy(processor)
+    cached = CachedEntityProcessor(processor)
+    texts, response = _marker_batch(3)
+
+    text_out = deidentify_text(texts, response, {}, cached)
+    assert text_out == deidentify_text(texts, response, {}, expected_processor)
+    assert processor.counts == expected_processor.counts
+    assert cached.currsize == 0
+    assert cached.stateful
+
+
+def test_cached_entity_processor_deidentify_text():
+    processor = CountingProcessor()
+    cached = CachedEntityProcessor(
+        FuzzyMatchEntityProcessor(["John"], 1, process_type="MASK")
+    )
+    texts = ["John", "Jon", "Jon"]
+    response = _analyze_response(
+        [[_entity(text, 0, "NAME")] for text in texts],
+    )
+
+    text_out = deidentify_text(texts, response, {"NAME": cached}, processor)
+    assert text_out == ["####", "###", "###"]
+    assert (cached.hits, cached.misses) == (1, 2)
+    assert not cached.stateful
+
+
+def test_cached_entity_processor_shared_by_threads():
+    fuzzy = FuzzyMatchEntityProcessor(["John"], 1, process_type="MASK")
+    cached = CachedEntityProcessor(fuzzy)
+    texts = ["John", "Jon", "Jane"] * 20
+    response = _analyze_response(
+        [[_entity(text, 0, "NAME")] for text in texts],
+    )
+    sequential = deidentify_text(texts, response, {"NAME": fuzzy}, fuzzy)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        parallel = deidentify_text(
+            texts, response, {"NAME": cached}, fuzzy, executor=executor
+        )
+    assert parallel == sequential
+    # Masking processors are not stateful, so each entity was processed once, by the
+    # processor passed in rather than by copies
+    assert cached.hits + cached.misses == len(texts)
+    assert cached.currsize == 3
+
+
+def test_cached_entity_processor_pickles():
+    cached = CachedEntityProcessor(MaskEntityProcessor())
+    cached({"best_label": "NAME", "text": "John"})
+    restored = pickle.loads(pickle.dumps(cached))
+    assert restored({"best_label": "NAME", "text": "John"}) == "####"
+    assert (restored.hits, restored.misses) == (1, 1)
+
+
+@pytest.mark.parametrize(
+    "processor, maxsize, message",
+    [
+        ("MASK", 10, "Invalid value for processor"),
+        (MaskEntityProcessor(), 0, "Invalid value for maxsize"),
+        (MaskEntityProcessor(), 1.5, "Invalid value for maxsize"),
+    ],
+)
+def test_cached_entity_processor_invalid_attrs(processor, maxsize, message):
+    with pytest.raises(ValueError, match=message):
+        CachedEntityProcessor(processor, maxsize=maxsize)
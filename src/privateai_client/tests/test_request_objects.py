@@ -2000,3 +2000,98 @@ def test_synthetic_invalid_accuracy():
     with pytest.raises(ValueError) as excinfo:
         processed_text.synthetic_entity_accuracy = "invalid"
     assert error_msg in str(excinfo.value)
+
+
+# Serialization Tests
+def test_request_objects_have_no_instance_dict():
+    request = ProcessTextRequest(
+        text=["test"],
+        entity_detection=EntityDetection(),
+        processed_text=ProcessedText(type="MASK"),
+    )
+    for obj in [request, request.entity_detection, request.processed_text]:
+        assert not hasattr(obj, "__dict__")
+    with pytest.raises(AttributeError):
+        request.garbage = "value"
+
+
+def test_to_dict_skips_unset_and_empty_values():
+    request = ProcessTextRequest(
+        text=["test"],
+        entity_detection=EntityDetection(
+            entity_types=[EntityTypeSelector(type="ENABLE", value=["NAME"])],
+            filter=[FilterSelector(type="BLOCK", pattern="x", entity_type="NAME")],
+        ),
+        processed_text=ProcessedText(type="MASK", mask_character="*"),
+    )
+    assert request.to_dict() == {
+        "text": ["test"],
+        "entity_detection": {
+            "accuracy": "high_automatic",
+            "entity_types": [{"type": "ENABLE", "value": ["NAME"]}],
+            "filter": [
+                {"type": "BLOCK", "pattern": "x", "entity_type": "NAME", "threshold": 1}
+            ],
+            "return_entity": True,
+            "enable_non_max_suppression": False,
+        },
+        "processed_text": {"type": "MASK", "mask_character": "*"},
+    }
+    assert list(request.to_dict()) == ["text", "entity_detection", "processed_text"]
+
+
+def test_processed_text_to_dict_after_type_change():
+    processed_text = ProcessedText(type="SYNTHETIC")
+    processed_text.type = "MARKER"
+    assert processed_text.to_dict() == {
+        "type": "MARKER",
+        "pattern": "[UNIQUE_NUMBERED_ENTITY_TYPE]",
+        "marker_language": "en",
+        "coreference_resolution": "heuristics",
+    }
+
+
+# Request Template Tests
+def test_request_template_matches_request_object():
+    request = ProcessTextRequest(
+        text=["Hello Alice", 'a "quoted" text'],
+        link_batch=True,
+        entity_detection=EntityDetection(
+            entity_types=[EntityTypeSelector(type="ENABLE", value=["NAME"])]
+        ),
+        processed_text=ProcessedText(type="MASK"),
+    )
+    template = RequestTemplate(request)
+    templated = template.with_text(request.text)
+    assert templated.to_dict() == request.to_dict()
+    for codec in [JSONCodec(), get_codec()]:
+        assert templated.encode(codec) == codec.dumps(request.to_dict())
+
+
+def test_request_template_is_a_copy():
+    entity_detection = EntityDetection(accuracy="high")
+    request = NerTextRequest(text=[], entity_detection=entity_detection)
+    template = RequestTemplate(request)
+    entity_detection.accuracy = "standard"
+    assert template.with_text(["a"]).to_dict() == {
+        "text": ["a"],
+        "entity_detection": {
+            "accuracy": "high",
+            "return_entity": True,
+            "enable_non_max_suppression": False,
+        },
+    }
+
+
+def test_request_template_invalid_request_object():
+    error_msg = "request_object can only be a ProcessTextRequest, NerTextRequest or AnalyzeTextRequest object"
+    with pytest.raises(ValueError) as excinfo:
+        RequestTemplate(ReidentifyTextRequest())
+    assert error_msg in str(excinfo.value)
+
+
+def test_request_template_invalid_text():
+    template = RequestTemplate(AnalyzeTextRequest(text=[], locale="en-US"))
+    with pytest.raises(TypeError) as excinfo:
+        template.with_text("a")
+    assert "text can only be a list" in str(excinfo.value)
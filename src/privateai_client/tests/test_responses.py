@@ -0,0 +1,60 @@
+import json
+
+import pytest
+import requests
+
+from ..components.pai_responses import TextResponse
+
+
+def _make_response(body, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode("utf-8")
+    return response
+
+
+def _text_body(count):
+    return [
+        {
+            "processed_text": f"[NAME_{i}]",
+            "entities": [
+                {
+                    "processed_text": f"[NAME_{i}]",
+                    "text": "John",
+                    "best_label": "NAME",
+                }
+            ],
+            "entities_present": True,
+            "characters_processed": 4,
+            "languages_detected": {"en": 1.0},
+        }
+        for i in range(count)
+    ]
+
+
+def test_response_body_is_parsed_once(monkeypatch):
+    response = _make_response(_text_body(3))
+    calls = []
+    original_json = response.json
+    monkeypatch.setattr(
+        response, "json", lambda **kwargs: calls.append(1) or original_json(**kwargs)
+    )
+    text_response = TextResponse(response)
+    assert text_response.processed_text == ["[NAME_0]", "[NAME_1]", "[NAME_2]"]
+    assert text_response.best_labels == ["NAME"] * 3
+    assert len(text_response.get_reidentify_entities()) == 3
+    assert text_response.characters_processed == [4, 4, 4]
+    assert text_response.languages_detected == [{"en": 1.0}] * 3
+    assert len(calls) == 1
+
+
+def test_replacing_response_clears_cached_body():
+    text_response = TextResponse(_make_response(_text_body(1)))
+    assert len(text_response.processed_text) == 1
+    text_response.response = _make_response(_text_body(2))
+    assert len(text_response.processed_text) == 2
+
+
+def test_error_response_includes_body():
+    with pytest.raises(requests.HTTPError, match="bad request"):
+        TextResponse(_make_response({"detail": "bad request"}, 400))
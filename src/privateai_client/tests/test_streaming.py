@@ -0,0 +1,239 @@
+import base64
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from ..components import (
+    Base64FileReader,
+    File,
+    JSONCodec,
+    ProcessFileBase64Request,
+    StreamingJSONBody,
+)
+from ..components.pai_responses import BleepResponse, FilesBase64Response
+from ..components.streaming import decode_base64_field, encode_payload
+from ..pai_client import PAIClient
+from .utils import HTTPServer
+
+
+@pytest.fixture
+def binary_file(tmp_path):
+    path = tmp_path / "sample.pdf"
+    path.write_bytes(bytes(range(256)) * 1000 + b"tail")
+    return path
+
+
+@pytest.fixture
+def echo_server():
+    # Answers with the file it received as processed_file
+    received = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received["headers"] = dict(self.headers)
+            received["body"] = self.rfile.read(int(self.headers["Content-Length"]))
+            file_data = json.loads(received["body"])["file"]["data"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"entities": [], "processed_file": "')
+            self.wfile.write(file_data.encode("ascii"))
+            self.wfile.write(b'", "entities_present": false}')
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", received
+    server.shutdown()
+    server.server_close()
+
+
+def test_base64_file_reader_matches_b64encode(binary_file):
+    reader = Base64FileReader(binary_file, chunk_size=3 * 7)
+    expected = base64.b64encode(binary_file.read_bytes())
+    assert b"".join(reader.iter_chunks()) == expected
+    assert reader.encoded_length == len(expected)
+
+
+def test_base64_file_reader_invalid_chunk_size(binary_file):
+    with pytest.raises(ValueError, match="multiple of 3"):
+        Base64FileReader(binary_file, chunk_size=1000)
+
+
+def test_file_from_path(binary_file):
+    file = File.from_path(binary_file, "application/pdf")
+    assert isinstance(file.data, Base64FileReader)
+    assert file.content_type == "application/pdf"
+
+
+def test_streaming_body_reads_in_blocks(binary_file):
+    request = ProcessFileBase64Request(
+        file=File.from_path(binary_file, "application/pdf")
+    )
+    body = encode_payload(request.to_dict(), JSONCodec())
+    assert isinstance(body, StreamingJSONBody)
+
+    blocks = []
+    while True:
+        block = body.read(8192)
+        if not block:
+            break
+        assert len(block) <= 8192
+        blocks.append(block)
+    encoded = b"".join(blocks)
+    assert len(encoded) == len(body)
+    assert json.loads(encoded)["file"]["data"] == base64.b64encode(
+        binary_file.read_bytes()
+    ).decode("ascii")
+
+    body.rewind()
+    assert body.read() == encoded
+
+
+def test_payload_without_files_is_encoded_to_bytes():
+    payload = {"text": ["a"], "entity_detection": {"entity_types": []}}
+    assert (
+        encode_payload(payload, JSONCodec())
+        == b'{"text":["a"],"entity_detection":{"entity_types":[]}}'
+    )
+
+
+def test_process_files_base64_streams_file(binary_file, echo_server):
+    url, received = echo_server
+    # The echo server only answers POST requests
+    client = PAIClient(url=url, version_check="off")
+    request = ProcessFileBase64Request(
+        file=File.from_path(binary_file, "application/pdf")
+    )
+    client.process_files_base64(request)
+
+    assert "Transfer-Encoding" not in received["headers"]
+    assert int(received["headers"]["Content-Length"]) == len(received["body"])
+    body = json.loads(received["body"])
+    assert body["file"] == {
+        "data": base64.b64encode(binary_file.read_bytes()).decode("ascii"),
+        "content_type": "application/pdf",
+    }
+
+
+def _make_response(content):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    return response
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_decode_base64_field(chunk_size):
+    data = bytes(range(256)) * 10
+    encoded = base64.b64encode(data).replace(b"/", b"\\/")
+    document = (
+        b'{"entities": [{"text": "a"}], "processed_file" : "' + encoded + b'", "x": 1}'
+    )
+    chunks = [document[i : i + chunk_size] for i in range(0, len(document), chunk_size)]
+    output = io.BytesIO()
+    written, rest = decode_base64_field(chunks, "processed_file", output)
+    assert output.getvalue() == data
+    assert written == len(data)
+    assert json.loads(rest) == {
+        "entities": [{"text": "a"}],
+        "processed_file": "",
+        "x": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    "document",
+    [b'{"entities": []}', b'{"processed_file": "YWJj', b'{"processed_file": "YW*j"}'],
+)
+def test_decode_base64_field_invalid(document):
+    with pytest.raises(ValueError):
+        decode_base64_field([document], "processed_file", io.BytesIO())
+
+
+def test_save_bleeped_file_from_loaded_response(tmp_path):
+    response = BleepResponse(_make_response(b'{"bleeped_file": "YWJjZA=="}'))
+    assert response.save_bleeped_file(tmp_path / "out.mp3") == 4
+    assert (tmp_path / "out.mp3").read_bytes() == b"abcd"
+    assert response.bleeped_file == "YWJjZA=="
+
+
+def test_save_processed_file_from_stream(binary_file, echo_server, tmp_path):
+    url, _ = echo_server
+    client = PAIClient(url=url, version_check="off")
+    request = ProcessFileBase64Request(
+        file=File.from_path(binary_file, "application/pdf")
+    )
+    response = client.process_files_base64(request, stream=True)
+    assert response.response._content is False
+
+    output = tmp_path / "redacted.pdf"
+    assert response.save_processed_file(output) == binary_file.stat().st_size
+    assert output.read_bytes() == binary_file.read_bytes()
+    assert response.entities_present is False
+    assert response.processed_file == ""
+
+
+def _calls_return_connection(status_code, call):
+    # With a blocking pool of a single connection, a second request only gets a connection if
+    # the first returned it
+    errors = []
+
+    def run():
+        with HTTPServer(
+            lambda path, payload: (status_code, {"detail": "error"})
+        ) as server:
+            with PAIClient(
+                url=server.url, version_check="off", pool_maxsize=1, pool_block=True
+            ) as client:
+                for _ in range(2):
+                    with pytest.raises(requests.HTTPError) as excinfo:
+                        call(client)
+                    errors.append(str(excinfo.value))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    return errors
+
+
+@pytest.mark.parametrize("status_code", [400, 500])
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda client: client.process_text({"text": ["a"]}, stream=True),
+        lambda client: client.process_text_batched(["a", "b"]),
+    ],
+)
+def test_streamed_error_response_releases_connection(status_code, call):
+    errors = _calls_return_connection(status_code, call)
+    assert len(errors) == 2
+    assert f"returned with a {status_code}" in errors[0]
+
+
+@pytest.mark.parametrize("status_code", [400, 500])
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda client: client.process_files_base64(
+            {"file": {"data": "YWJj", "content_type": "text/plain"}}, stream=True
+        ),
+        lambda client: client.bleep(
+            {"file": {"data": "YWJj", "content_type": "audio/mp3"}, "timestamps": []},
+            stream=True,
+        ),
+    ],
+)
+def test_streamed_file_error_response_releases_connection(status_code, call):
+    errors = _calls_return_connection(status_code, call)
+    assert len(errors) == 2
+    assert f"returned with a {status_code}" in errors[0]
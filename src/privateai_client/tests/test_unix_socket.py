@@ -0,0 +1,92 @@
+import os
+import socket
+
+import pytest
+import requests
+
+from ..async_pai_client import AsyncPAIClient
+from ..components import (
+    CompressionPolicy,
+    PAIURIs,
+    ProcessTextRequest,
+    UnixSocketAdapter,
+    create_session,
+)
+from ..pai_client import PAIClient
+from .utils import HTTPServer, echo_text_handler
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="unix domain sockets are not available"
+)
+
+
+def test_unix_socket_uris():
+    uris = PAIURIs(url="unix:///var/run/pai.sock")
+    assert uris.pai_uri == "http+unix://%2Fvar%2Frun%2Fpai.sock"
+    assert uris.process_text == "http+unix://%2Fvar%2Frun%2Fpai.sock/process/text"
+    assert uris.version == "http+unix://%2Fvar%2Frun%2Fpai.sock/"
+    assert uris.unix_socket
+    assert not PAIURIs(url="http://localhost:8080").unix_socket
+
+
+def test_unix_socket_uris_from_scheme_and_host():
+    uris = PAIURIs(scheme="unix", host="/var/run/pai.sock")
+    assert uris.pai_uri == "http+unix://%2Fvar%2Frun%2Fpai.sock"
+
+
+def test_unix_socket_requires_absolute_path():
+    error_msg = (
+        "Invalid value for unix socket path. Accepted value is an absolute path."
+    )
+    with pytest.raises(ValueError) as excinfo:
+        PAIURIs(url="unix://pai.sock")
+    assert error_msg in str(excinfo.value)
+
+
+def test_session_mounts_unix_socket_adapter():
+    session = create_session()
+    adapter = session.get_adapter("http+unix://%2Fvar%2Frun%2Fpai.sock/process/text")
+    assert isinstance(adapter, UnixSocketAdapter)
+    session.close()
+
+
+def test_unix_socket_does_not_support_http2():
+    error_msg = (
+        "Invalid value for http2. Accepted value is False when url is a unix socket."
+    )
+    with pytest.raises(ValueError) as excinfo:
+        PAIClient(url="unix:///var/run/pai.sock", http2=True)
+    assert error_msg in str(excinfo.value)
+
+
+def test_async_client_rejects_unix_socket():
+    with pytest.raises(ValueError) as excinfo:
+        AsyncPAIClient(url="unix:///var/run/pai.sock")
+    assert "unix sockets are only supported by PAIClient" in str(excinfo.value)
+
+
+def test_unix_socket_process_text():
+    with HTTPServer(echo_text_handler, unix_socket=True) as server:
+        with PAIClient(url=server.url, version_check="eager") as client:
+            response = client.process_text(ProcessTextRequest(text=["a", "bb"]))
+            second = client.process_text({"text": ["ccc"]})
+    assert response.processed_text == ["[a]", "[bb]"]
+    assert response.characters_processed == [1, 2]
+    assert second.processed_text == ["[ccc]"]
+
+
+def test_unix_socket_compressed_request():
+    with HTTPServer(echo_text_handler, unix_socket=True) as server:
+        with PAIClient(
+            url=server.url, compression=CompressionPolicy(threshold=0)
+        ) as client:
+            response = client.process_text({"text": ["a" * 2000]})
+    assert response.processed_text == [f"[{'a' * 2000}]"]
+    assert client.compression_stats.compressed == 1
+
+
+def test_unix_socket_connection_error(tmp_path):
+    path = os.path.join(tmp_path, "missing.sock")
+    with PAIClient(url=f"unix://{path}", version_check="off") as client:
+        with pytest.raises(requests.ConnectionError):
+            client.process_text({"text": ["a"]})
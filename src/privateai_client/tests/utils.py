@@ -0,0 +1,294 @@
+import gzip
+import io
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+from urllib3 import HTTPResponse
+
+from ..__about__ import __version__
+
+
+class MockAdapter(BaseAdapter):
+    """
+    A requests transport adapter that answers requests with a handler instead of the network.
+    The handler receives the path and the decoded json payload, gunzipped if needed, and returns a status code,
+    a json serializable body and optionally response headers. The version endpoint is
+    answered automatically. With compress_responses, bodies are gzipped when the request
+    accepts it. current.request is the request the handler is answering in the calling thread.
+    """
+
+    def __init__(self, handler, compress_responses: bool = False):
+        super(MockAdapter, self).__init__()
+        self.handler = handler
+        self.compress_responses = compress_responses
+        self.requests = []
+        self.responses = []
+        self.timeouts = []
+        self.current = threading.local()
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        self.current.request = request
+        self.timeouts.append(kwargs.get("timeout"))
+        path = urlparse(request.url).path
+        headers = {}
+        if path == "/":
+            status_code, body = 200, {"app_version": __version__}
+        else:
+            body = request.body
+            if hasattr(body, "read"):
+                body = body.read()
+            if request.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            payload = json.loads(body) if body else None
+            status_code, body, *headers = self.handler(path, payload)
+            headers = headers[0] if headers else {}
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        response.reason = "OK" if status_code < 400 else "Error"
+        response.url = request.url
+        response.request = request
+        content = json.dumps(body).encode("utf-8")
+        if self.compress_responses and "gzip" in request.headers.get(
+            "Accept-Encoding", ""
+        ):
+            # Served like a real connection, so the body is decompressed as it is read
+            response.headers["Content-Encoding"] = "gzip"
+            response.raw = HTTPResponse(
+                body=io.BytesIO(gzip.compress(content)),
+                headers=response.headers,
+                status=status_code,
+                preload_content=False,
+            )
+        else:
+            response._content = content
+            response._content_consumed = True
+        self.responses.append(response)
+        return response
+
+    def close(self):
+        pass
+
+
+def mock_client(client, handler, compress_responses: bool = False):
+    adapter = MockAdapter(handler, compress_responses)
+    client.session.mount("http://", adapter)
+    return adapter
+
+
+def echo_text_handler(path, payload):
+    # Mimics process/text by marking every text and counting its characters
+    return 200, [
+        {
+            "processed_text": f"[{text}]",
+            "entities": [
+                {
+                    "processed_text": "[NAME_1]",
+                    "text": text,
+                    "best_label": "NAME",
+                }
+            ],
+            "entities_present": True,
+            "characters_processed": len(text),
+            "languages_detected": {"en": 1.0},
+        }
+        for text in payload["text"]
+    ]
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Responses are written in one piece, as headers and body sent separately are
+    # delayed by Nagle's algorithm on TCP connections
+    wbufsize = -1
+
+    def do_GET(self):
+        self._send(200, {"app_version": __version__})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        path = urlparse(self.path).path
+        self._send(*self.server.handler(path, json.loads(body) if body else None)[:2])
+
+    def _send(self, status_code, body):
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        self.wfile.flush()
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return str(self.client_address)
+
+    def log_message(self, *args):
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class HTTPServer:
+    """
+    A local HTTP/1.1 server that answers requests with a handler, like MockAdapter, listening on
+    a unix domain socket when unix_socket is True and on a loopback TCP port otherwise.
+    url is the url to give to PAIClient.
+    """
+
+    def __init__(self, handler, unix_socket: bool = False):
+        if unix_socket:
+            self._directory = tempfile.TemporaryDirectory()
+            self.socket_path = os.path.join(self._directory.name, "pai.sock")
+            self._server = _UnixHTTPServer(self.socket_path, _HTTPHandler)
+            self.url = f"unix://{self.socket_path}"
+        else:
+            self._directory = None
+            self._server = ThreadingHTTPServer(("127.0.0.1", 0), _HTTPHandler)
+            self._server.daemon_threads = True
+            self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._server.handler = handler
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._directory is not None:
+            self._directory.cleanup()
+
+
+class H2Server:
+    """
+    A local HTTP/2 server without TLS (h2c) that answers requests with a handler, like MockAdapter.
+    Each response is sent after delay seconds. connections counts the connections made to the
+    server and max_in_flight the most requests it was answering at once.
+    """
+
+    def __init__(self, handler, delay: float = 0.0):
+        self.handler = handler
+        self.delay = delay
+        self.connections = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._counter_lock = threading.Lock()
+        self._listener = socket.create_server(("127.0.0.1", 0), backlog=128)
+        self.url = f"http://127.0.0.1:{self._listener.getsockname()[1]}"
+
+    def __enter__(self):
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Closing a socket blocked in accept() on another thread does not stop it listening
+        # on Linux, shutting it down does
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+        self._accept_thread.join()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            with self._counter_lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock):
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        connection = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        lock = threading.Lock()
+        connection.initiate_connection()
+        sock.sendall(connection.data_to_send())
+        streams = {}
+        with sock:
+            while True:
+                try:
+                    data = sock.recv(65535)
+                except OSError:
+                    return
+                if not data:
+                    return
+                with lock:
+                    for event in connection.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            streams[event.stream_id] = (
+                                dict(event.headers),
+                                bytearray(),
+                            )
+                            with self._counter_lock:
+                                self._in_flight += 1
+                                self.max_in_flight = max(
+                                    self.max_in_flight, self._in_flight
+                                )
+                        elif isinstance(event, h2.events.DataReceived):
+                            streams[event.stream_id][1].extend(event.data)
+                            connection.acknowledge_received_data(
+                                event.flow_controlled_length, event.stream_id
+                            )
+                        elif isinstance(event, h2.events.StreamEnded):
+                            headers, body = streams.pop(event.stream_id)
+                            threading.Thread(
+                                target=self._respond,
+                                args=(sock, connection, lock, event.stream_id),
+                                kwargs={"headers": headers, "body": bytes(body)},
+                                daemon=True,
+                            ).start()
+                    sock.sendall(connection.data_to_send())
+
+    def _respond(self, sock, connection, lock, stream_id, headers, body):
+        time.sleep(self.delay)
+        path = urlparse(headers[":path"]).path
+        if path == "/":
+            status_code, response_body = 200, {"app_version": __version__}
+        else:
+            status_code, response_body = self.handler(
+                path, json.loads(body) if body else None
+            )[:2]
+        content = json.dumps(response_body).encode("utf-8")
+        with self._counter_lock:
+            self._in_flight -= 1
+        with lock:
+            connection.send_headers(
+                stream_id,
+                [
+                    (":status", str(status_code)),
+                    ("content-type", "application/json"),
+                    ("content-length", str(len(content))),
+                ],
+            )
+            frame_size = connection.max_outbound_frame_size
+            for start in range(0, len(content), frame_size):
+                connection.send_data(stream_id, content[start : start + frame_size])
+            connection.end_stream(stream_id)
+            try:
+                sock.sendall(connection.data_to_send())
+            except OSError:
+                pass